@@ -0,0 +1,34 @@
+import atexit
+import logging.config
+
+from myfunds.autofetch.scheduler import Scheduler
+from myfunds.autofetch.scheduler import get_logger
+from myfunds.config import init_config
+from myfunds.config import init_env_parser
+from myfunds.core.models import db_proxy
+from myfunds.database import init_database
+
+
+@atexit.register
+def log_exit():
+    logger = get_logger()
+    logger.info("Scheduler stops working, exit.")
+
+
+def main() -> None:
+    parser = init_env_parser()
+    args = parser.parse_args()
+
+    config = init_config(args.env)
+    if config.LOGGING_CONFIG != {}:
+        logging.config.dictConfig(config.LOGGING_CONFIG)
+
+    db = init_database(config.DATABASE_PATH, config.SLOW_QUERY_THRESHOLD)
+    db_proxy.initialize(db)
+
+    scheduler = Scheduler(config)
+    scheduler.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+import peewee as pw
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    migrator.add_fields(
+        "balances",
+        remainders_dirty_since=pw.DateTimeField(null=True),
+    )
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    migrator.remove_fields("balances", "remainders_dirty_since")
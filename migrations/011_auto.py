@@ -0,0 +1,48 @@
+import peewee as pw
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    @migrator.create_model
+    class BalanceCheckpoint(pw.Model):
+        id = pw.AutoField()
+        balance = pw.ForeignKeyField(
+            backref="balancecheckpoint_set",
+            column_name="balance_id",
+            field="id",
+            model=migrator.orm["balances"],
+            on_delete="CASCADE",
+        )
+        month = pw.DateField()
+        closing_amount = pw.IntegerField()
+        transactions_count = pw.IntegerField()
+
+        class Meta:
+            table_name = "balance_checkpoints"
+            indexes = [(("balance_id", "month"), True)]
+
+    migrator.sql(
+        """
+        INSERT INTO "balance_checkpoints"
+            ("balance_id", "month", "closing_amount", "transactions_count")
+        SELECT
+            "balance_id",
+            "month",
+            SUM("amount") OVER (PARTITION BY "balance_id" ORDER BY "month"),
+            "transactions_count"
+        FROM (
+            SELECT
+                "balance_id",
+                date("created_at", 'start of month') AS "month",
+                SUM(
+                    CASE WHEN "direction" = 'INCOME' THEN "amount" ELSE -"amount" END
+                ) AS "amount",
+                COUNT(*) AS "transactions_count"
+            FROM "transactions"
+            GROUP BY "balance_id", "month"
+        )
+        """
+    )
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    migrator.remove_model("balance_checkpoints")
@@ -0,0 +1,27 @@
+INDEXES = [
+    ("transaction_balance_id_created_at", "transactions", ("balance_id", "created_at")),
+    ("category_account_id_direction", "categories", ("account_id", "direction")),
+    (
+        "cryptotransaction_account_id_direction",
+        "crypto_transactions",
+        ("account_id", "direction"),
+    ),
+    (
+        "cryptoactionlog_account_id_created_at",
+        "crypto_action_logs",
+        ("account_id", "created_at"),
+    ),
+]
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    for name, table, columns in INDEXES:
+        columns = ", ".join(f'"{i}"' for i in columns)
+        migrator.sql(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({columns})')
+
+    migrator.sql("ANALYZE")
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    for name, _, _ in INDEXES:
+        migrator.sql(f'DROP INDEX IF EXISTS "{name}"')
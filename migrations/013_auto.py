@@ -0,0 +1,56 @@
+import peewee as pw
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    @migrator.create_model
+    class BalanceAggregate(pw.Model):
+        id = pw.AutoField()
+        balance = pw.ForeignKeyField(
+            backref="balanceaggregate_set",
+            column_name="balance_id",
+            field="id",
+            model=migrator.orm["balances"],
+            on_delete="CASCADE",
+        )
+        month = pw.DateField()
+        direction = pw.CharField(max_length=255)
+        category = pw.ForeignKeyField(
+            backref="balanceaggregate_set",
+            column_name="category_id",
+            field="id",
+            model=migrator.orm["categories"],
+            null=True,
+            on_delete="CASCADE",
+        )
+        amount = pw.IntegerField()
+        transactions_count = pw.IntegerField()
+
+        class Meta:
+            table_name = "balance_aggregates"
+            indexes = [(("balance_id", "month", "direction", "category_id"), True)]
+
+    migrator.sql(
+        """
+        INSERT INTO "balance_aggregates" (
+            "balance_id",
+            "month",
+            "direction",
+            "category_id",
+            "amount",
+            "transactions_count"
+        )
+        SELECT
+            "balance_id",
+            date("created_at", 'start of month') AS "month",
+            "direction",
+            "category_id",
+            SUM("amount"),
+            COUNT(*)
+        FROM "transactions"
+        GROUP BY "balance_id", "month", "direction", "category_id"
+        """
+    )
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    migrator.remove_model("balance_aggregates")
@@ -0,0 +1,56 @@
+TRIGGERS = [
+    (
+        "transactions_search_ai",
+        """
+        AFTER INSERT ON "transactions" WHEN new."comment" IS NOT NULL BEGIN
+            INSERT INTO "transactions_search" ("rowid", "comment")
+            VALUES (new."id", new."comment");
+        END
+        """,
+    ),
+    (
+        "transactions_search_ad",
+        """
+        AFTER DELETE ON "transactions" WHEN old."comment" IS NOT NULL BEGIN
+            INSERT INTO "transactions_search"
+                ("transactions_search", "rowid", "comment")
+            VALUES ('delete', old."id", old."comment");
+        END
+        """,
+    ),
+    (
+        "transactions_search_au",
+        """
+        AFTER UPDATE OF "comment" ON "transactions" BEGIN
+            INSERT INTO "transactions_search"
+                ("transactions_search", "rowid", "comment")
+            SELECT 'delete', old."id", old."comment" WHERE old."comment" IS NOT NULL;
+            INSERT INTO "transactions_search" ("rowid", "comment")
+            SELECT new."id", new."comment" WHERE new."comment" IS NOT NULL;
+        END
+        """,
+    ),
+]
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    migrator.sql(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS "transactions_search"
+        USING fts5 ("comment", content="transactions", content_rowid=id)
+        """
+    )
+
+    for name, trigger in TRIGGERS:
+        migrator.sql(f'CREATE TRIGGER IF NOT EXISTS "{name}" {trigger}')
+
+    migrator.sql(
+        'INSERT INTO "transactions_search" ("transactions_search") VALUES (\'rebuild\')'
+    )
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    for name, _ in TRIGGERS:
+        migrator.sql(f'DROP TRIGGER IF EXISTS "{name}"')
+
+    migrator.sql('DROP TABLE IF EXISTS "transactions_search"')
@@ -0,0 +1,48 @@
+import hashlib
+
+import peewee as pw
+
+
+def fingerprint_transactions(database):
+    cursor = database.execute_sql(
+        'SELECT "id", "balance_id", "created_at", "direction", "amount", "comment"'
+        ' FROM "transactions" ORDER BY "balance_id", "id"'
+    )
+
+    occurrences = {}
+    rows = []
+    for id_, balance_id, created_at, direction, amount, comment in cursor.fetchall():
+        key = (
+            str(created_at),
+            direction,
+            str(amount),
+            " ".join((comment or "").lower().split()),
+        )
+        occurrence = occurrences.get((balance_id, key), 0)
+        occurrences[(balance_id, key)] = occurrence + 1
+
+        data = "|".join(key + (str(occurrence),))
+        rows.append((hashlib.sha1(data.encode()).hexdigest(), id_))
+
+    for batch in pw.chunked(rows, 1000):
+        database.cursor().executemany(
+            'UPDATE "transactions" SET "fingerprint" = ? WHERE "id" = ?', batch
+        )
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    migrator.add_fields(
+        "transactions",
+        fingerprint=pw.CharField(max_length=40, null=True),
+    )
+    migrator.python(fingerprint_transactions, database)
+    migrator.sql(
+        'CREATE UNIQUE INDEX IF NOT EXISTS "transaction_balance_id_fingerprint"'
+        ' ON "transactions" ("balance_id", "fingerprint")'
+    )
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    migrator.sql('DROP INDEX IF EXISTS "transaction_balance_id_fingerprint"')
+    # Unlike the table copy of remove_fields it keeps the comments search triggers.
+    migrator.sql('ALTER TABLE "transactions" DROP COLUMN "fingerprint"')
@@ -0,0 +1,27 @@
+import peewee as pw
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    @migrator.create_model
+    class StagedTransaction(pw.Model):
+        id = pw.AutoField()
+        balance = pw.ForeignKeyField(
+            backref="stagedtransaction_set",
+            column_name="balance_id",
+            field="id",
+            model=migrator.orm["balances"],
+            on_delete="CASCADE",
+        )
+        token = pw.CharField(index=True, max_length=255)
+        direction = pw.CharField(max_length=255)
+        amount = pw.IntegerField()
+        comment = pw.TextField(null=True)
+        created_at = pw.DateTimeField()
+        staged_at = pw.DateTimeField()
+
+        class Meta:
+            table_name = "staged_transactions"
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    migrator.remove_model("staged_transactions")
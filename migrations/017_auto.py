@@ -0,0 +1,20 @@
+import peewee as pw
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    @migrator.create_model
+    class CryptoPrice(pw.Model):
+        id = pw.AutoField()
+        cmc_id = pw.IntegerField()
+        convert = pw.CharField(max_length=255)
+        price = pw.FloatField()
+        fetched_at = pw.DateTimeField()
+        refresh_started_at = pw.DateTimeField(null=True)
+
+        class Meta:
+            table_name = "crypto_prices"
+            indexes = [(("cmc_id", "convert"), True)]
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    migrator.remove_model("crypto_prices")
@@ -0,0 +1,24 @@
+import peewee as pw
+
+
+try:
+    import playhouse.sqlite_ext as pw_pext
+except ImportError:
+    pass
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    @migrator.create_model
+    class ExchangeRatesSnapshot(pw.Model):
+        id = pw.AutoField()
+        source = pw.CharField(max_length=255, unique=True)
+        rates = pw_pext.JSONField()
+        fetched_at = pw.DateTimeField()
+        refresh_started_at = pw.DateTimeField(null=True)
+
+        class Meta:
+            table_name = "exchange_rates_snapshots"
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    migrator.remove_model("exchange_rates_snapshots")
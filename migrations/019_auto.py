@@ -0,0 +1,12 @@
+import peewee as pw
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    migrator.add_fields(
+        "accounts",
+        data_version=pw.IntegerField(default=0),
+    )
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    migrator.remove_fields("accounts", "data_version")
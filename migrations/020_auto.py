@@ -0,0 +1,16 @@
+import peewee as pw
+
+
+def migrate(migrator, database, fake=False, **kwargs):
+    @migrator.create_model
+    class CacheVersion(pw.Model):
+        id = pw.AutoField()
+        name = pw.CharField(max_length=255, unique=True)
+        version = pw.IntegerField()
+
+        class Meta:
+            table_name = "cache_versions"
+
+
+def rollback(migrator, database, fake=False, **kwargs):
+    migrator.remove_model("cache_versions")
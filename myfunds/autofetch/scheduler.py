@@ -0,0 +1,55 @@
+import logging
+import time
+
+from myfunds.config import Config
+from myfunds.core.models import TransactionImportSettings
+from myfunds.core.usecase import fetching
+from myfunds.core.usecase.transactions import make_transactions
+
+
+# New import settings are noticed within this delay.
+MAX_SLEEP = 60
+
+
+def get_logger() -> logging.Logger:
+    return logging.getLogger("myfunds.autofetch")
+
+
+class Scheduler:
+    def __init__(self, config: Config):
+        self._interval = config.AUTOFETCH_INTERVAL
+        self._logger = get_logger()
+
+    def run(self) -> None:
+        self._logger.info(f"Starts fetching every {self._interval}s ...")
+
+        while True:
+            delay = self.run_pending()
+            time.sleep(delay)
+
+    def run_pending(self) -> int:
+        """Fetches the balances which are due, returns seconds to the next fetch."""
+        delays = [MAX_SLEEP]
+        for settings in TransactionImportSettings.select():
+            delay = fetching.seconds_to_next_fetch(settings, self._interval)
+            if delay == 0:
+                self._fetch(settings)
+                delay = fetching.seconds_to_next_fetch(settings, self._interval)
+
+            delays.append(delay)
+
+        return max(1, min(delays))
+
+    def _fetch(self, settings: TransactionImportSettings) -> None:
+        try:
+            since = fetching.fetch_since(settings)
+            txns = fetching.fetch_new_transactions(settings, since)
+            imported_count = make_transactions(settings.balance, txns)
+        except Exception:
+            self._logger.exception(f"Balance {settings.balance_id} fetch error:")
+            return
+
+        self._logger.info(
+            f"Balance {settings.balance_id}: {imported_count} transactions imported"
+            f" since {since}."
+        )
@@ -13,7 +13,9 @@ class Config:
     PBKDF2_PWD_HASHER_ITERATIONS: int
     PBKDF2_PWD_HASHER_SALT_LENGTH: int
     MAX_YEARS_OF_STATISTICS: int
+    DEFER_BALANCE_REMAINDERS: bool
     LOGGING_CONFIG: dict
+    SLOW_QUERY_THRESHOLD: float
 
     WEB_SECRET_KEY: str
     WEB_RUN_ON_HOST: str
@@ -22,6 +24,21 @@ class Config:
     TGBOT_TOKEN: Optional[str]
     TGBOT_UPDATES_LIMIT: int
     TGBOT_UPDATES_TIMEOUT: int
+    TGBOT_WORKERS: int
+    TGBOT_QUEUE_SIZE: int
+    TGBOT_CHAT_QUEUE_SIZE: int
+    TGBOT_WEBHOOK_URL: Optional[str]
+    TGBOT_WEBHOOK_SECRET: Optional[str]
+    TGBOT_WEBHOOK_HOST: str
+    TGBOT_WEBHOOK_PORT: int
+
+    AUTOFETCH_INTERVAL: int
+
+    CRYPTO_PRICES_TTL: int
+    CRYPTO_PRICES_MAX_STALE: int
+    EXCHANGE_RATES_TTL: int
+    EXCHANGE_RATES_MAX_STALE: int
+    LOOKUPS_TIMEOUT: float
 
 
 def init_config(env_path: Optional[str] = None) -> Config:
@@ -36,13 +53,28 @@ def init_config(env_path: Optional[str] = None) -> Config:
             PBKDF2_PWD_HASHER_ITERATIONS=env.int("PBKDF2_PWD_HASHER_ITERATIONS"),
             PBKDF2_PWD_HASHER_SALT_LENGTH=env.int("PBKDF2_PWD_HASHER_SALT_LENGTH"),
             MAX_YEARS_OF_STATISTICS=env.int("MAX_YEARS_OF_STATISTICS", 5),
+            DEFER_BALANCE_REMAINDERS=env.bool("DEFER_BALANCE_REMAINDERS", False),
             LOGGING_CONFIG=env.json("LOGGING_CONFIG", "{}"),
+            SLOW_QUERY_THRESHOLD=env.float("SLOW_QUERY_THRESHOLD", 0.1),
             WEB_SECRET_KEY=env.str("WEB_SECRET_KEY"),
             WEB_RUN_ON_HOST=env.str("WEB_RUN_ON_HOST", "localhost"),
             WEB_RUN_ON_PORT=env.int("WEB_RUN_ON_PORT", 8080),
             TGBOT_TOKEN=env.str("TGBOT_TOKEN", None),
             TGBOT_UPDATES_LIMIT=env.int("TGBOT_UPDATES_LIMIT", 10),
             TGBOT_UPDATES_TIMEOUT=env.int("TGBOT_UPDATES_TIMEOUT", 20),
+            TGBOT_WORKERS=env.int("TGBOT_WORKERS", 4),
+            TGBOT_QUEUE_SIZE=env.int("TGBOT_QUEUE_SIZE", 100),
+            TGBOT_CHAT_QUEUE_SIZE=env.int("TGBOT_CHAT_QUEUE_SIZE", 10),
+            TGBOT_WEBHOOK_URL=env.str("TGBOT_WEBHOOK_URL", None),
+            TGBOT_WEBHOOK_SECRET=env.str("TGBOT_WEBHOOK_SECRET", None),
+            TGBOT_WEBHOOK_HOST=env.str("TGBOT_WEBHOOK_HOST", "localhost"),
+            TGBOT_WEBHOOK_PORT=env.int("TGBOT_WEBHOOK_PORT", 8081),
+            AUTOFETCH_INTERVAL=env.int("AUTOFETCH_INTERVAL", 60 * 60),
+            CRYPTO_PRICES_TTL=env.int("CRYPTO_PRICES_TTL", 60),
+            CRYPTO_PRICES_MAX_STALE=env.int("CRYPTO_PRICES_MAX_STALE", 60 * 60),
+            EXCHANGE_RATES_TTL=env.int("EXCHANGE_RATES_TTL", 60 * 60),
+            EXCHANGE_RATES_MAX_STALE=env.int("EXCHANGE_RATES_MAX_STALE", 24 * 60 * 60),
+            LOOKUPS_TIMEOUT=env.float("LOOKUPS_TIMEOUT", 5),
         )
 
 
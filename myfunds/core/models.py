@@ -2,7 +2,10 @@ import inspect
 from typing import List
 
 import peewee as pw
+from playhouse.sqlite_ext import FTS5Model
 from playhouse.sqlite_ext import JSONField
+from playhouse.sqlite_ext import RowIDField
+from playhouse.sqlite_ext import SearchField
 
 from myfunds.core.constants import CryptoDirection
 from myfunds.core.constants import FundsDirection
@@ -30,6 +33,8 @@ class Account(BaseModel):
 
     username = pw.CharField(max_length=100, unique=True)
     password_hash = pw.TextField()
+    # Bumped by the writes of the account data to invalidate the cached reports.
+    data_version = pw.IntegerField(default=0)
 
 
 class Balance(BaseModel):
@@ -42,11 +47,13 @@ class Balance(BaseModel):
     name = pw.CharField()
     amount = pw.IntegerField()
     created_at = pw.DateTimeField()
+    remainders_dirty_since = pw.DateTimeField(null=True)
 
 
 class Category(BaseModel):
     class Meta:
         table_name = "categories"
+        indexes = ((("account_id", "direction"), False),)
 
     account = pw.ForeignKeyField(Account)
     direction = pw.CharField(
@@ -59,6 +66,10 @@ class Category(BaseModel):
 class Transaction(BaseModel):
     class Meta:
         table_name = "transactions"
+        indexes = (
+            (("balance_id", "created_at"), False),
+            (("balance_id", "fingerprint"), True),
+        )
 
     balance = pw.ForeignKeyField(Balance, on_delete="CASCADE")
     balance_remainder = pw.IntegerField()
@@ -69,6 +80,47 @@ class Transaction(BaseModel):
     amount = pw.IntegerField()
     comment = pw.TextField(null=True)
     created_at = pw.DateTimeField(index=True)
+    # Identifies the transactions to skip them on the imports, manual ones included.
+    fingerprint = pw.CharField(max_length=40, null=True)
+
+
+class TransactionSearch(BaseModel, FTS5Model):
+    """Full-text index of the transaction comments.
+
+    It's kept in sync by the triggers created in the 014 migration.
+    """
+
+    class Meta:
+        table_name = "transactions_search"
+        options = {"content": Transaction, "content_rowid": "id"}
+        depends_on = [Transaction]
+
+    rowid = RowIDField()
+    comment = SearchField()
+
+
+class BalanceCheckpoint(BaseModel):
+    class Meta:
+        table_name = "balance_checkpoints"
+        indexes = ((("balance_id", "month"), True),)
+
+    balance = pw.ForeignKeyField(Balance, on_delete="CASCADE")
+    month = pw.DateField()
+    closing_amount = pw.IntegerField()
+    transactions_count = pw.IntegerField()
+
+
+class BalanceAggregate(BaseModel):
+    class Meta:
+        table_name = "balance_aggregates"
+        indexes = ((("balance_id", "month", "direction", "category_id"), True),)
+
+    balance = pw.ForeignKeyField(Balance, on_delete="CASCADE")
+    month = pw.DateField()
+    direction = pw.CharField(choices=[FundsDirection.EXPENSE, FundsDirection.INCOME])
+    category = pw.ForeignKeyField(Category, null=True, on_delete="CASCADE")
+    amount = pw.IntegerField()
+    transactions_count = pw.IntegerField()
 
 
 class TransactionImportSettings(BaseModel):
@@ -81,6 +133,21 @@ class TransactionImportSettings(BaseModel):
     internal_data = JSONField()
 
 
+class StagedTransaction(BaseModel):
+    """Fetched provider transaction awaiting the import approval."""
+
+    class Meta:
+        table_name = "staged_transactions"
+
+    balance = pw.ForeignKeyField(Balance, on_delete="CASCADE")
+    token = pw.CharField(index=True)
+    direction = pw.CharField(choices=[FundsDirection.EXPENSE, FundsDirection.INCOME])
+    amount = pw.IntegerField()
+    comment = pw.TextField(null=True)
+    created_at = pw.DateTimeField()
+    staged_at = pw.DateTimeField()
+
+
 class BalanceLimit(BaseModel):
     class Meta:
         table_name = "balance_limits"
@@ -119,6 +186,28 @@ class CryptoCurrency(BaseModel):
     icon = pw.TextField()
 
 
+class CryptoPrice(BaseModel):
+    class Meta:
+        table_name = "crypto_prices"
+        indexes = ((("cmc_id", "convert"), True),)
+
+    cmc_id = pw.IntegerField()
+    convert = pw.CharField()
+    price = pw.FloatField()
+    fetched_at = pw.DateTimeField()
+    refresh_started_at = pw.DateTimeField(null=True)
+
+
+class ExchangeRatesSnapshot(BaseModel):
+    class Meta:
+        table_name = "exchange_rates_snapshots"
+
+    source = pw.CharField(unique=True)
+    rates = JSONField()
+    fetched_at = pw.DateTimeField()
+    refresh_started_at = pw.DateTimeField(null=True)
+
+
 class CryptoBalance(BaseModel):
     class Meta:
         table_name = "crypto_balances"
@@ -132,6 +221,7 @@ class CryptoBalance(BaseModel):
 class CryptoTransaction(BaseModel):
     class Meta:
         table_name = "crypto_transactions"
+        indexes = ((("account_id", "direction"), False),)
 
     account = pw.ForeignKeyField(Account)
     direction = pw.CharField(
@@ -147,12 +237,23 @@ class CryptoTransaction(BaseModel):
 class CryptoActionLog(BaseModel):
     class Meta:
         table_name = "crypto_action_logs"
+        indexes = ((("account_id", "created_at"), False),)
 
     account = pw.ForeignKeyField(Account)
     message = pw.TextField()
     created_at = pw.DateTimeField(index=True)
 
 
+class CacheVersion(BaseModel):
+    """Version of the cached data, bumped on writes to invalidate the caches."""
+
+    class Meta:
+        table_name = "cache_versions"
+
+    name = pw.CharField(unique=True)
+    version = pw.IntegerField()
+
+
 class TelegramBotAccount(BaseModel):
     class Meta:
         table_name = "telegram_bot_accounts"
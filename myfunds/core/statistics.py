@@ -0,0 +1,296 @@
+from datetime import date
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+import peewee as pw
+
+from myfunds.core.constants import FundsDirection
+from myfunds.core.models import Account
+from myfunds.core.models import Balance
+from myfunds.core.models import BalanceAggregate
+from myfunds.core.models import BalanceCheckpoint
+from myfunds.core.models import BalanceLimit
+from myfunds.core.models import Category
+from myfunds.core.models import Currency
+from myfunds.core.models import JointLimit
+from myfunds.core.models import JointLimitParticipant
+
+
+class CategoryStats(NamedTuple):
+    # The category id is None for transactions without a category.
+    id: Optional[int]
+    name: Optional[str]
+    color_sign: Optional[str]
+    amount: int
+    limit_amount: Optional[int]
+
+
+class BalanceStats(NamedTuple):
+    start_balance: Optional[int]
+    # The end balance of the month in progress isn't known yet.
+    end_balance: Optional[int]
+    income: Optional[int]
+    expense: Optional[int]
+    expense_categories: List[CategoryStats]
+
+    @property
+    def expense_pct(self) -> Optional[float]:
+        if self.start_balance is None or self.expense is None:
+            return None
+        return round((self.expense / self.start_balance) * 100, 2)
+
+    @property
+    def savings(self) -> Optional[int]:
+        if self.start_balance is None or self.expense is None:
+            return None
+        return self.start_balance - self.expense
+
+    @property
+    def savings_pct(self) -> Optional[float]:
+        if self.savings is None:
+            return None
+        return round((self.savings / self.start_balance) * 100, 2)
+
+    def category_expense_pct(self, category: CategoryStats) -> Optional[float]:
+        """Returns the category share of the expense, None without expense."""
+        if not self.expense:
+            return None
+        return round((category.amount / self.expense) * 100, 2)
+
+
+class JointLimitBalanceStats(NamedTuple):
+    id: int
+    name: str
+    expense_amount: int
+
+
+class JointLimitParticipantStats(NamedTuple):
+    account: Account
+    category: Category
+    balances: List[JointLimitBalanceStats]
+    total_expense: int
+
+    @property
+    def balances_count(self) -> int:
+        return len(self.balances)
+
+
+class JointLimitStats(NamedTuple):
+    limit: JointLimit
+    currency: Currency
+    participants: List[JointLimitParticipantStats]
+    total_expense: int
+    total_expense_pct: float
+
+
+def _closing_amount_query(balance: Balance, since: Optional[date], until: date):
+    condition = (
+        (BalanceCheckpoint.balance == balance)
+        & (BalanceCheckpoint.month < until)
+        & (BalanceCheckpoint.transactions_count > 0)
+    )
+    if since is not None:
+        condition &= BalanceCheckpoint.month >= since
+
+    # fmt: off
+    return (
+        BalanceCheckpoint
+        .select(BalanceCheckpoint.closing_amount)
+        .where(condition)
+        .order_by(BalanceCheckpoint.month.desc())
+        .limit(1)
+    )
+    # fmt: on
+
+
+def calculate_balance_stats(
+    balance: Balance,
+    stats_range: Tuple[date, date],
+    excluded_categories: Optional[Set[Optional[int]]] = None,
+) -> BalanceStats:
+    """Calculates the balance statistics for the months range in two queries.
+
+    Expense excludes the given category ids, None stands for the transactions
+    without a category.
+    """
+    excluded_categories = excluded_categories or set()
+    since, until = stats_range
+
+    # fmt: off
+    start_balance, end_balance = (
+        Balance
+        .select(
+            _closing_amount_query(balance, None, since).alias("start_balance"),
+            _closing_amount_query(balance, since, until).alias("end_balance"),
+        )
+        .where(Balance.id == balance.id)
+        .tuples()
+        .get()
+    )
+    # fmt: on
+
+    # fmt: off
+    query = (
+        BalanceAggregate
+        .select(
+            BalanceAggregate.direction,
+            BalanceAggregate.category_id,
+            Category.name,
+            Category.color_sign,
+            pw.fn.SUM(BalanceAggregate.amount),
+            BalanceLimit.amount,
+        )
+        .join(Category, pw.JOIN.LEFT_OUTER)
+        .switch(BalanceAggregate)
+        .join(
+            BalanceLimit,
+            pw.JOIN.LEFT_OUTER,
+            on=(
+                (BalanceLimit.balance_id == BalanceAggregate.balance_id)
+                & (BalanceLimit.category_id == BalanceAggregate.category_id)
+            ),
+        )
+        .where(
+            (BalanceAggregate.balance == balance)
+            & (BalanceAggregate.month >= since)
+            & (BalanceAggregate.month < until)
+        )
+        .group_by(BalanceAggregate.direction, BalanceAggregate.category_id)
+        .tuples()
+    )
+    # fmt: on
+
+    income, expense = None, None
+    expense_categories = []
+    for direction, category_id, name, color_sign, amount, limit_amount in query:
+        if direction == FundsDirection.INCOME:
+            income = (income or 0) + amount
+            continue
+
+        expense_categories.append(
+            CategoryStats(category_id, name, color_sign, amount, limit_amount)
+        )
+        if category_id not in excluded_categories:
+            expense = (expense or 0) + amount
+
+    expense_categories.sort(key=lambda i: i.amount, reverse=True)
+
+    if until > date.today():
+        end_balance = None
+
+    return BalanceStats(
+        start_balance=start_balance,
+        end_balance=end_balance,
+        income=income,
+        expense=expense,
+        expense_categories=expense_categories,
+    )
+
+
+def calculate_joint_limits_stats(
+    account: Account, stats_range: Tuple[date, date]
+) -> List[JointLimitStats]:
+    """Calculates the expense of the account joint limits for the months range.
+
+    It's a single query grouped by the limit participants and their balances of
+    the limit currency, participants without expense are skipped.
+    """
+    since, until = stats_range
+
+    # fmt: off
+    limits_ids = (
+        JointLimitParticipant
+        .select(JointLimitParticipant.limit_id)
+        .join(Category)
+        .where(
+            (Category.account == account)
+            & (Category.direction == FundsDirection.EXPENSE)
+        )
+    )
+    query = (
+        JointLimitParticipant
+        .select(
+            JointLimitParticipant,
+            JointLimit,
+            Currency,
+            Category,
+            Account.id,
+            Account.username,
+            Balance.id,
+            Balance.name,
+            pw.fn.SUM(BalanceAggregate.amount).alias("expense_amount"),
+        )
+        .join(JointLimit)
+        .join(Currency)
+        .switch(JointLimitParticipant)
+        .join(Category)
+        .join(Account)
+        .join(
+            Balance,
+            on=(
+                (Balance.account_id == Account.id)
+                & (Balance.currency_id == JointLimit.currency_id)
+            ),
+        )
+        .join(
+            BalanceAggregate,
+            on=(
+                (BalanceAggregate.balance_id == Balance.id)
+                & (BalanceAggregate.category_id == Category.id)
+            ),
+        )
+        .where(
+            (JointLimitParticipant.limit_id.in_(limits_ids))
+            & (BalanceAggregate.direction == FundsDirection.EXPENSE)
+            & (BalanceAggregate.month >= since)
+            & (BalanceAggregate.month < until)
+        )
+        .group_by(JointLimitParticipant.id, Balance.id)
+        .order_by(JointLimit.id, JointLimitParticipant.id, Balance.id)
+    )
+    # fmt: on
+
+    # The rows are ordered by the limits and participants, they're collected in
+    # the order of appearance.
+    limits_rows, participants_rows = {}, {}
+    for row in query:
+        limits_rows.setdefault(row.limit.id, row.limit)
+        participant_balances = participants_rows.setdefault(row.id, (row, []))[1]
+
+        balance = row.category.account.balance
+        participant_balances.append(
+            JointLimitBalanceStats(balance.id, balance.name, row.expense_amount)
+        )
+
+    participants = {}
+    for row, balances in participants_rows.values():
+        participants.setdefault(row.limit.id, []).append(
+            JointLimitParticipantStats(
+                account=row.category.account,
+                category=row.category,
+                balances=balances,
+                total_expense=sum(i.expense_amount for i in balances),
+            )
+        )
+
+    result = []
+    for limit_id, limit in limits_rows.items():
+        total_expense = sum(i.total_expense for i in participants[limit_id])
+        total_expense_pct = round((total_expense / limit.amount) * 100, 2)
+        if total_expense_pct > 100:
+            total_expense_pct = round(100 - total_expense_pct, 2)
+
+        result.append(
+            JointLimitStats(
+                limit=limit,
+                currency=limit.currency,
+                participants=participants[limit_id],
+                total_expense=total_expense,
+                total_expense_pct=total_expense_pct,
+            )
+        )
+
+    return result
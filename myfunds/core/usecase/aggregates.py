@@ -0,0 +1,156 @@
+from datetime import date
+from datetime import datetime
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+import peewee as pw
+
+from myfunds.core.models import Balance
+from myfunds.core.models import BalanceAggregate
+from myfunds.core.models import Category
+from myfunds.core.models import Transaction
+from myfunds.core.models import db_proxy
+from myfunds.core.usecase import checkpoints
+from myfunds.modules import check
+
+
+def key_of(
+    created_at: datetime, direction: str, category_id: Optional[int]
+) -> Tuple[date, str, Optional[int]]:
+    return checkpoints.month_of(created_at), direction, category_id
+
+
+def apply_changes(
+    balance_id: int, changes: Dict[Tuple[date, str, Optional[int]], Tuple[int, int]]
+) -> None:
+    """Applies (amount, transactions count) changes grouped by aggregate keys."""
+    with db_proxy.atomic():
+        for (month, direction, category_id), change in changes.items():
+            amount, transactions_count = change
+
+            condition = (
+                (BalanceAggregate.balance_id == balance_id)
+                & (BalanceAggregate.month == month)
+                & (BalanceAggregate.direction == direction)
+            )
+            if category_id is None:
+                condition &= BalanceAggregate.category_id.is_null()
+            else:
+                condition &= BalanceAggregate.category_id == category_id
+
+            # fmt: off
+            updated = (
+                BalanceAggregate
+                .update(
+                    amount=(BalanceAggregate.amount + amount),
+                    transactions_count=(
+                        BalanceAggregate.transactions_count + transactions_count
+                    ),
+                )
+                .where(condition)
+                .execute()
+            )
+            # fmt: on
+
+            if updated == 0:
+                BalanceAggregate.create(
+                    balance=balance_id,
+                    month=month,
+                    direction=direction,
+                    category=category_id,
+                    amount=amount,
+                    transactions_count=transactions_count,
+                )
+            elif transactions_count < 0:
+                # fmt: off
+                (
+                    BalanceAggregate
+                    .delete()
+                    .where(condition & (BalanceAggregate.transactions_count <= 0))
+                    .execute()
+                )
+                # fmt: on
+
+
+def apply_transaction(txn: Transaction, transactions_count: int = 1) -> None:
+    """Adds the transaction to its aggregate, or subtracts it with the -1 count."""
+    apply_changes(
+        txn.balance_id,
+        {
+            key_of(txn.created_at, txn.direction, txn.category_id): (
+                txn.amount * transactions_count,
+                transactions_count,
+            )
+        },
+    )
+
+
+def detach_category(category: Category) -> None:
+    """Moves the category aggregates to the no category ones before its removal."""
+    check.value(category, [check.is_instance(Category)])
+
+    # fmt: off
+    query = (
+        BalanceAggregate
+        .select(
+            BalanceAggregate.balance_id,
+            BalanceAggregate.month,
+            BalanceAggregate.direction,
+            BalanceAggregate.amount,
+            BalanceAggregate.transactions_count,
+        )
+        .where(BalanceAggregate.category == category)
+        .tuples()
+    )
+    # fmt: on
+
+    with db_proxy.atomic():
+        changes = {}
+        for balance_id, month, direction, amount, transactions_count in query:
+            balance_changes = changes.setdefault(balance_id, {})
+            balance_changes[(month, direction, None)] = (amount, transactions_count)
+
+        BalanceAggregate.delete().where(BalanceAggregate.category == category).execute()
+
+        for balance_id, balance_changes in changes.items():
+            apply_changes(balance_id, balance_changes)
+
+
+def rebuild(balance: Balance) -> None:
+    check.value(balance, [check.is_instance(Balance)])
+
+    month = pw.fn.date(Transaction.created_at, "start of month")
+
+    # fmt: off
+    query = (
+        Transaction
+        .select(
+            month.alias("month"),
+            Transaction.direction,
+            Transaction.category_id,
+            pw.fn.SUM(Transaction.amount).alias("amount"),
+            pw.fn.COUNT(Transaction.id).alias("transactions_count"),
+        )
+        .where(Transaction.balance == balance)
+        .group_by(month, Transaction.direction, Transaction.category_id)
+        .tuples()
+    )
+    # fmt: on
+
+    with db_proxy.atomic():
+        BalanceAggregate.delete().where(BalanceAggregate.balance == balance).execute()
+
+        rows = [
+            {
+                "balance": balance,
+                "month": month,
+                "direction": direction,
+                "category": category_id,
+                "amount": amount,
+                "transactions_count": transactions_count,
+            }
+            for month, direction, category_id, amount, transactions_count in query
+        ]
+        for batch in pw.chunked(rows, 100):
+            BalanceAggregate.insert_many(batch).execute()
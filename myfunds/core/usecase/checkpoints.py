@@ -0,0 +1,154 @@
+from datetime import date
+from datetime import datetime
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+import peewee as pw
+
+from myfunds.core.constants import FundsDirection
+from myfunds.core.models import Balance
+from myfunds.core.models import BalanceCheckpoint
+from myfunds.core.models import Transaction
+from myfunds.core.models import db_proxy
+from myfunds.modules import check
+
+
+def month_of(created_at: datetime) -> date:
+    return created_at.date().replace(day=1)
+
+
+def apply_changes(balance_id: int, changes: Dict[date, Tuple[int, int]]) -> None:
+    """Applies (signed amount, transactions count) changes grouped by month."""
+    with db_proxy.atomic():
+        for month in sorted(changes):
+            signed_amount, transactions_count = changes[month]
+
+            # fmt: off
+            updated = (
+                BalanceCheckpoint
+                .update(
+                    closing_amount=(BalanceCheckpoint.closing_amount + signed_amount),
+                    transactions_count=(
+                        BalanceCheckpoint.transactions_count + transactions_count
+                    ),
+                )
+                .where(
+                    (BalanceCheckpoint.balance_id == balance_id)
+                    & (BalanceCheckpoint.month == month)
+                )
+                .execute()
+            )
+            # fmt: on
+
+            if updated == 0:
+                # fmt: off
+                previous_closing_amount = (
+                    BalanceCheckpoint
+                    .select(BalanceCheckpoint.closing_amount)
+                    .where(
+                        (BalanceCheckpoint.balance_id == balance_id)
+                        & (BalanceCheckpoint.month < month)
+                    )
+                    .order_by(BalanceCheckpoint.month.desc())
+                    .limit(1)
+                    .scalar()
+                )
+                # fmt: on
+                BalanceCheckpoint.create(
+                    balance=balance_id,
+                    month=month,
+                    closing_amount=(previous_closing_amount or 0) + signed_amount,
+                    transactions_count=transactions_count,
+                )
+
+            # fmt: off
+            (
+                BalanceCheckpoint
+                .update(
+                    closing_amount=(BalanceCheckpoint.closing_amount + signed_amount)
+                )
+                .where(
+                    (BalanceCheckpoint.balance_id == balance_id)
+                    & (BalanceCheckpoint.month > month)
+                )
+                .execute()
+            )
+            # fmt: on
+
+
+def get_start_balance(balance: Balance, month: date) -> Optional[int]:
+    # fmt: off
+    return (
+        BalanceCheckpoint
+        .select(BalanceCheckpoint.closing_amount)
+        .where(
+            (BalanceCheckpoint.balance == balance)
+            & (BalanceCheckpoint.month < month)
+            & (BalanceCheckpoint.transactions_count > 0)
+        )
+        .order_by(BalanceCheckpoint.month.desc())
+        .limit(1)
+        .scalar()
+    )
+    # fmt: on
+
+
+def get_end_balance(balance: Balance, month: date) -> Optional[int]:
+    # fmt: off
+    return (
+        BalanceCheckpoint
+        .select(BalanceCheckpoint.closing_amount)
+        .where(
+            (BalanceCheckpoint.balance == balance)
+            & (BalanceCheckpoint.month == month)
+            & (BalanceCheckpoint.transactions_count > 0)
+        )
+        .scalar()
+    )
+    # fmt: on
+
+
+def rebuild(balance: Balance) -> None:
+    check.value(balance, [check.is_instance(Balance)])
+
+    month = pw.fn.date(Transaction.created_at, "start of month")
+    signed_amount = pw.Case(
+        None,
+        [(Transaction.direction == FundsDirection.INCOME, Transaction.amount)],
+        Transaction.amount * -1,
+    )
+
+    # fmt: off
+    query = (
+        Transaction
+        .select(
+            month.alias("month"),
+            pw.fn.SUM(signed_amount).alias("amount"),
+            pw.fn.COUNT(Transaction.id).alias("transactions_count"),
+        )
+        .where(Transaction.balance == balance)
+        .group_by(month)
+        .order_by(month)
+        .tuples()
+    )
+    # fmt: on
+
+    with db_proxy.atomic():
+        BalanceCheckpoint.delete().where(BalanceCheckpoint.balance == balance).execute()
+
+        rows = []
+        closing_amount = 0
+        for month, amount, transactions_count in query:
+            closing_amount += amount
+            rows.append(
+                {
+                    "balance": balance,
+                    "month": month,
+                    "closing_amount": closing_amount,
+                    "transactions_count": transactions_count,
+                }
+            )
+
+        for batch in pw.chunked(rows, 100):
+            BalanceCheckpoint.insert_many(batch).execute()
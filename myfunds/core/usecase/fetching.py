@@ -0,0 +1,148 @@
+import json
+import math
+from copy import deepcopy
+from datetime import datetime
+from datetime import timedelta
+from typing import List
+from typing import Optional
+
+import peewee as pw
+
+from myfunds.core.models import Transaction
+from myfunds.core.models import TransactionImportSettings
+from myfunds.core.usecase.transactions import NewTransaction
+from myfunds.core.usecase.transactions import make_fingerprints
+from myfunds.core.usecase.transactions import select_known_fingerprints
+from myfunds.modules import check
+from myfunds.modules import txnfetcher
+
+
+LAST_FETCH_AT_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def get_last_fetch_at(settings: TransactionImportSettings) -> Optional[datetime]:
+    last_fetch_at = settings.internal_data.get("last_fetch_at")
+    if last_fetch_at is None:
+        return None
+
+    return datetime.strptime(last_fetch_at, LAST_FETCH_AT_FORMAT)
+
+
+def is_resumable(settings: TransactionImportSettings) -> bool:
+    """Checks if the last fetch stopped before fetching the whole period."""
+    return settings.internal_data.get("cursor") is not None
+
+
+def seconds_to_next_fetch(
+    settings: TransactionImportSettings,
+    interval: int = 0,
+    now: Optional[datetime] = None,
+) -> int:
+    """Returns seconds left until the next fetch is allowed, 0 if it's allowed now.
+
+    The provider minimal interval between requests overrides a shorter interval,
+    an unfinished fetch is resumed after the minimal interval only.
+    """
+    check.value(settings, [check.is_instance(TransactionImportSettings)])
+
+    min_interval = settings.internal_data.get("min_interval", 0)
+    interval = min_interval if is_resumable(settings) else max(interval, min_interval)
+    last_fetch_at = get_last_fetch_at(settings)
+    if interval <= 0 or last_fetch_at is None:
+        return 0
+
+    now = now or datetime.now()
+    left = last_fetch_at + timedelta(seconds=interval) - now
+    return max(0, math.ceil(left.total_seconds()))
+
+
+def fetch_since(settings: TransactionImportSettings) -> datetime:
+    """Returns the time to fetch from, it's the last transaction time if any."""
+    check.value(settings, [check.is_instance(TransactionImportSettings)])
+
+    since = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    # fmt: off
+    last_txn = (
+        Transaction
+        .select(Transaction.created_at)
+        .where(Transaction.balance == settings.balance_id)
+        .order_by(Transaction.created_at.desc())
+        .first()
+    )
+    # fmt: on
+    if last_txn is not None:
+        since = last_txn.created_at
+
+    since_offset = settings.internal_data.get("since_offset", 0)
+    return since + timedelta(seconds=since_offset)
+
+
+def _save_internal_data(settings: TransactionImportSettings, keys: List[str]) -> None:
+    """Saves the keys of the internal data, the removed ones are deleted.
+
+    The web import and the auto-fetch save the same settings, so the other keys
+    are left as they are in the database.
+    """
+    if len(keys) == 0:
+        return
+
+    internal_data = TransactionImportSettings.internal_data
+    for key in keys:
+        path = f"$.{key}"
+        if key in settings.internal_data:
+            value = json.dumps(settings.internal_data[key])
+            internal_data = pw.fn.json_set(internal_data, path, pw.fn.json(value))
+        else:
+            internal_data = pw.fn.json_remove(internal_data, path)
+
+    # fmt: off
+    (
+        TransactionImportSettings
+        .update(internal_data=internal_data)
+        .where(TransactionImportSettings.id == settings.id)
+        .execute()
+    )
+    # fmt: on
+
+
+def fetch_new_transactions(
+    settings: TransactionImportSettings, since: datetime
+) -> List[NewTransaction]:
+    """Fetches the provider transactions skipping the imported ones.
+
+    The fetch time is saved to the settings before the request, the fetcher state
+    after it.
+    """
+    check.value(settings, [check.is_instance(TransactionImportSettings)])
+
+    settings.internal_data["last_fetch_at"] = datetime.now().strftime(
+        LAST_FETCH_AT_FORMAT
+    )
+    _save_internal_data(settings, ["last_fetch_at"])
+
+    fetcher_class = txnfetcher.get_fetcher(settings.provider)
+    if fetcher_class is None:
+        raise ValueError(f"Provider '{settings.provider}' not found.")
+
+    state = deepcopy(settings.internal_data)
+    fetcher = fetcher_class(settings.config, settings.internal_data)
+    txns = [
+        NewTransaction(i.direction, i.amount, i.created_at, comment=i.comment)
+        for i in fetcher.fetch_transactions(since)
+    ]
+    changed_keys = [
+        key
+        for key in state.keys() | settings.internal_data.keys()
+        if state.get(key) != settings.internal_data.get(key)
+    ]
+    _save_internal_data(settings, changed_keys)
+
+    fingerprints = make_fingerprints(txns)
+    known_fingerprints = select_known_fingerprints(settings.balance, fingerprints)
+
+    return [
+        txn
+        for txn, fingerprint in zip(txns, fingerprints)
+        if fingerprint not in known_fingerprints
+    ]
@@ -0,0 +1,280 @@
+import logging
+import threading
+from collections import namedtuple
+from datetime import datetime
+from datetime import timedelta
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import peewee as pw
+
+from myfunds.core.models import CryptoPrice
+from myfunds.core.models import ExchangeRatesSnapshot
+from myfunds.core.models import db_proxy
+from myfunds.modules import check
+from myfunds.modules import cmc
+from myfunds.modules import convertmymoney
+
+
+# Seconds a price is fresh for and seconds a stale price is still returned
+# while it's refreshed in the background.
+DEFAULT_TTL = 60
+DEFAULT_MAX_STALE = 60 * 60
+
+DEFAULT_EXCHANGE_RATES_TTL = 60 * 60
+DEFAULT_EXCHANGE_RATES_MAX_STALE = 24 * 60 * 60
+EXCHANGE_RATES_SOURCE = "convertmymoney"
+
+# A background refresh which didn't finish in time can be claimed again.
+REFRESH_TIMEOUT = 30
+
+
+ExchangeRates = namedtuple("ExchangeRates", ["rates", "fetched_at"])
+
+
+# The process tier in front of the database one, prices by (cmc_id, convert).
+_prices: Dict[Tuple[int, str], Tuple[float, datetime]] = {}
+_exchange_rates: Optional[ExchangeRates] = None
+_lock = threading.Lock()
+
+
+def get_logger() -> logging.Logger:
+    return logging.getLogger("myfunds.prices")
+
+
+def get_crypto_prices(
+    currencies_ids: List[int],
+    convert: str = "USD",
+    ttl: int = DEFAULT_TTL,
+    max_stale: int = DEFAULT_MAX_STALE,
+) -> Dict[int, float]:
+    """Returns the cached prices, fetches the missing ones from CoinMarketCap.
+
+    Stale prices are returned as is and refreshed in the background by a single
+    process, the cached prices are returned if the fetch fails. So the prices of
+    the currencies which were never fetched may be missing in the result.
+    """
+    check.value(currencies_ids, [check.is_instance(list)])
+
+    now = datetime.now()
+    currencies_ids = set(currencies_ids)
+
+    with _lock:
+        prices = {
+            i: _prices[(i, convert)] for i in currencies_ids if (i, convert) in _prices
+        }
+
+    not_fresh = [i for i in currencies_ids if not _is_fresh(prices.get(i), ttl, now)]
+    if not_fresh:
+        # fmt: off
+        query = (
+            CryptoPrice
+            .select()
+            .where(
+                (CryptoPrice.cmc_id.in_(not_fresh))
+                & (CryptoPrice.convert == convert)
+            )
+        )
+        # fmt: on
+        cached_prices = {i.cmc_id: (i.price, i.fetched_at) for i in query}
+        prices.update(cached_prices)
+        with _lock:
+            for i, value in cached_prices.items():
+                _prices[(i, convert)] = value
+
+    stale, missing = [], []
+    for i in currencies_ids:
+        if _is_fresh(prices.get(i), ttl, now):
+            continue
+
+        if _is_fresh(prices.get(i), ttl + max_stale, now):
+            stale.append(i)
+        else:
+            missing.append(i)
+
+    if missing:
+        try:
+            prices.update(refresh_crypto_prices(missing + stale, convert))
+        except cmc.CMCError as e:
+            if not prices:
+                raise
+            get_logger().warning(f"Failed to refresh prices ({repr(e)}).")
+
+    elif stale:
+        # fmt: off
+        query = (
+            CryptoPrice
+            .update(refresh_started_at=now)
+            .where(
+                (CryptoPrice.cmc_id.in_(stale))
+                & (CryptoPrice.convert == convert)
+            )
+        )
+        # fmt: on
+        if _claim_refresh(query, CryptoPrice, ttl, now):
+            _refresh_in_background(refresh_crypto_prices, stale, convert)
+
+    return {i: price for i, (price, _) in prices.items()}
+
+
+def refresh_crypto_prices(
+    currencies_ids: List[int], convert: str = "USD"
+) -> Dict[int, Tuple[float, datetime]]:
+    """Fetches the prices and saves them to the cache."""
+    fetched_prices = cmc.fetch_prices(currencies_ids, convert)
+    fetched_at = datetime.now()
+
+    prices = {i: (price, fetched_at) for i, price in fetched_prices.items()}
+    if not prices:
+        return prices
+
+    with db_proxy.atomic():
+        # fmt: off
+        (
+            CryptoPrice
+            .insert_many(
+                [
+                    {
+                        "cmc_id": i,
+                        "convert": convert,
+                        "price": price,
+                        "fetched_at": fetched_at,
+                    }
+                    for i, price in fetched_prices.items()
+                ]
+            )
+            .on_conflict(
+                conflict_target=[CryptoPrice.cmc_id, CryptoPrice.convert],
+                update={
+                    CryptoPrice.price: pw.EXCLUDED.price,
+                    CryptoPrice.fetched_at: fetched_at,
+                    CryptoPrice.refresh_started_at: None,
+                },
+            )
+            .execute()
+        )
+        # fmt: on
+
+    with _lock:
+        for i, value in prices.items():
+            _prices[(i, convert)] = value
+
+    return prices
+
+
+def get_exchange_rates(
+    ttl: int = DEFAULT_EXCHANGE_RATES_TTL,
+    max_stale: int = DEFAULT_EXCHANGE_RATES_MAX_STALE,
+) -> ExchangeRates:
+    """Returns the cached exchange rates snapshot, fetches it if it's missing.
+
+    It works like the crypto prices cache, the snapshot keeps its fetch time to
+    show how fresh the rates are.
+    """
+    global _exchange_rates
+
+    now = datetime.now()
+
+    with _lock:
+        snapshot = _exchange_rates
+
+    if not _is_fresh(snapshot, ttl, now):
+        row = ExchangeRatesSnapshot.get_or_none(source=EXCHANGE_RATES_SOURCE)
+        if row is not None:
+            snapshot = ExchangeRates(row.rates, row.fetched_at)
+            with _lock:
+                _exchange_rates = snapshot
+
+    if _is_fresh(snapshot, ttl, now):
+        return snapshot
+
+    if _is_fresh(snapshot, ttl + max_stale, now):
+        query = ExchangeRatesSnapshot.update(refresh_started_at=now).where(
+            ExchangeRatesSnapshot.source == EXCHANGE_RATES_SOURCE
+        )
+        if _claim_refresh(query, ExchangeRatesSnapshot, ttl, now):
+            _refresh_in_background(refresh_exchange_rates)
+
+        return snapshot
+
+    try:
+        return refresh_exchange_rates()
+    except Exception as e:
+        if snapshot is None:
+            raise
+        get_logger().warning(f"Failed to refresh exchange rates ({repr(e)}).")
+        return snapshot
+
+
+def refresh_exchange_rates() -> ExchangeRates:
+    """Fetches the exchange rates and saves them to the cache."""
+    global _exchange_rates
+
+    snapshot = ExchangeRates(convertmymoney.fetch_exchange_rates(), datetime.now())
+
+    # fmt: off
+    (
+        ExchangeRatesSnapshot
+        .insert(
+            source=EXCHANGE_RATES_SOURCE,
+            rates=snapshot.rates,
+            fetched_at=snapshot.fetched_at,
+        )
+        .on_conflict(
+            conflict_target=[ExchangeRatesSnapshot.source],
+            update={
+                ExchangeRatesSnapshot.rates: pw.EXCLUDED.rates,
+                ExchangeRatesSnapshot.fetched_at: snapshot.fetched_at,
+                ExchangeRatesSnapshot.refresh_started_at: None,
+            },
+        )
+        .execute()
+    )
+    # fmt: on
+
+    with _lock:
+        _exchange_rates = snapshot
+
+    return snapshot
+
+
+def _is_fresh(value: Optional[tuple], ttl: int, now: datetime) -> bool:
+    """Checks the cached (value, fetched_at) pair."""
+    return value is not None and value[1] + timedelta(seconds=ttl) > now
+
+
+def _claim_refresh(query: pw.ModelUpdate, model: type, ttl: int, now: datetime) -> bool:
+    """Marks the stale rows as refreshing, it succeeds for a single process."""
+    # fmt: off
+    claimed = (
+        query
+        .where(
+            (model.fetched_at <= now - timedelta(seconds=ttl))
+            & (
+                (model.refresh_started_at.is_null())
+                | (
+                    model.refresh_started_at
+                    <= now - timedelta(seconds=REFRESH_TIMEOUT)
+                )
+            )
+        )
+        .execute()
+    )
+    # fmt: on
+    return claimed > 0
+
+
+def _refresh_in_background(refresh: Callable, *args) -> None:
+    def _refresh() -> None:
+        try:
+            refresh(*args)
+        except Exception as e:
+            get_logger().warning(f"Background {refresh.__name__} failed ({repr(e)}).")
+        finally:
+            if not db_proxy.is_closed():
+                db_proxy.close()
+
+    threading.Thread(target=_refresh, name="prices-refresh", daemon=True).start()
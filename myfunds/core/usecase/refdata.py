@@ -0,0 +1,208 @@
+import threading
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+import peewee as pw
+
+from myfunds.core.constants import FundsDirection
+from myfunds.core.models import Account
+from myfunds.core.models import CacheVersion
+from myfunds.core.models import Category
+from myfunds.core.models import CryptoCurrency
+from myfunds.core.models import Currency
+from myfunds.modules import check
+
+
+# Scopes of the cached data, a write of the scope data bumps its version.
+ACCOUNTS = "accounts"
+CATEGORIES = "categories"
+CURRENCIES = "currencies"
+CRYPTO_CURRENCIES = "crypto_currencies"
+SCOPES = [ACCOUNTS, CATEGORIES, CURRENCIES, CRYPTO_CURRENCIES]
+
+
+# Cached values by scopes and keys. The values are shared by the requests, so
+# they must not be changed.
+_values: Dict[str, Dict[Hashable, Any]] = {}
+# Scope versions seen on the last sync and the local invalidation counters.
+_versions: Dict[str, int] = {}
+_generations: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+def sync() -> None:
+    """Drops the cached data which versions were bumped by any process.
+
+    It's called before handling a request or a bot update, so the cache is
+    checked with a single query instead of loading the data again.
+    """
+    global _versions
+
+    versions = {i.name: i.version for i in CacheVersion.select()}
+
+    with _lock:
+        for scope in set(_versions) | set(versions):
+            if versions.get(scope) != _versions.get(scope):
+                _drop(scope)
+        _versions = versions
+
+
+def invalidate(scope: str) -> None:
+    """Bumps the scope version, it's called in the transaction of the write."""
+    check.value(scope, [check.one_of(SCOPES)])
+
+    # fmt: off
+    (
+        CacheVersion
+        .insert(name=scope, version=1)
+        .on_conflict(
+            conflict_target=[CacheVersion.name],
+            update={CacheVersion.version: CacheVersion.version + 1},
+        )
+        .execute()
+    )
+    # fmt: on
+
+    with _lock:
+        _drop(scope)
+
+
+def clear() -> None:
+    """Drops all the cached data, the next sync reloads the versions."""
+    global _versions
+
+    with _lock:
+        for scope in SCOPES:
+            _drop(scope)
+        _versions = {}
+
+
+def get_account(account_id: int) -> Optional[Account]:
+    """Returns the account without the fresh `data_version`."""
+    return _get_or_load(
+        ACCOUNTS, account_id, lambda: Account.get_or_none(id=account_id)
+    )
+
+
+def get_currencies() -> List[Currency]:
+    return list(_get_currencies().values())
+
+
+def get_currency(currency_id: int) -> Optional[Currency]:
+    return _get_currencies().get(currency_id)
+
+
+def get_crypto_currencies() -> List[CryptoCurrency]:
+    return list(_get_crypto_currencies().values())
+
+
+def get_crypto_currency(currency_id: int) -> Optional[CryptoCurrency]:
+    return _get_crypto_currencies().get(currency_id)
+
+
+def get_categories(account_id: int, direction: str) -> List[Category]:
+    # fmt: off
+    return _get_or_load(
+        CATEGORIES,
+        (account_id, direction),
+        lambda: list(
+            Category
+            .select()
+            .where(
+                (Category.account == account_id)
+                & (Category.direction == direction)
+            )
+            .order_by(Category.name)
+        ),
+    )
+    # fmt: on
+
+
+def get_category(account_id: int, category_id: int) -> Optional[Category]:
+    for direction in [FundsDirection.EXPENSE, FundsDirection.INCOME]:
+        for category in get_categories(account_id, direction):
+            if category.id == category_id:
+                return category
+
+
+def attach_currencies(rows: Iterable[pw.Model]) -> List[pw.Model]:
+    """Sets the cached currencies of the rows instead of loading them one by one.
+
+    It works for the rows with the `currency` foreign key, like the balances and
+    the limits, the crypto balances get the crypto currencies.
+    """
+    rows = list(rows)
+    for row in rows:
+        if type(row).currency.rel_model is CryptoCurrency:
+            currency = get_crypto_currency(row.currency_id)
+        else:
+            currency = get_currency(row.currency_id)
+
+        if currency is not None:
+            row.currency = currency
+
+    return rows
+
+
+def attach_categories(account_id: int, rows: Iterable[pw.Model]) -> List[pw.Model]:
+    """Sets the cached account categories of the rows with the `category` key."""
+    rows = list(rows)
+    for row in rows:
+        if row.category_id is None:
+            continue
+
+        category = get_category(account_id, row.category_id)
+        if category is not None:
+            row.category = category
+
+    return rows
+
+
+def _get_currencies() -> Dict[int, Currency]:
+    return _get_or_load(
+        CURRENCIES,
+        None,
+        lambda: {i.id: i for i in Currency.select().order_by(Currency.code_alpha)},
+    )
+
+
+def _get_crypto_currencies() -> Dict[int, CryptoCurrency]:
+    # fmt: off
+    return _get_or_load(
+        CRYPTO_CURRENCIES,
+        None,
+        lambda: {
+            i.id: i
+            for i in CryptoCurrency.select().order_by(CryptoCurrency.symbol)
+        },
+    )
+    # fmt: on
+
+
+def _get_or_load(scope: str, key: Hashable, load: Callable[[], Any]) -> Any:
+    with _lock:
+        values = _values.get(scope, {})
+        if key in values:
+            return values[key]
+        generation = _generations.get(scope, 0)
+
+    value = load()
+    if value is None:
+        return value
+
+    with _lock:
+        # The data loaded before an invalidation may be outdated.
+        if _generations.get(scope, 0) == generation:
+            _values.setdefault(scope, {})[key] = value
+
+    return value
+
+
+def _drop(scope: str) -> None:
+    _values.pop(scope, None)
+    _generations[scope] = _generations.get(scope, 0) + 1
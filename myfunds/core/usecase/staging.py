@@ -0,0 +1,139 @@
+import secrets
+from datetime import datetime
+from datetime import timedelta
+from typing import List
+
+import peewee as pw
+
+from myfunds.core.models import Balance
+from myfunds.core.models import StagedTransaction
+from myfunds.core.models import db_proxy
+from myfunds.core.usecase.transactions import NewTransaction
+from myfunds.core.usecase.transactions import make_transactions
+from myfunds.modules import check
+
+
+STAGING_TTL = timedelta(hours=6)
+
+
+def stage_transactions(balance: Balance, txns: List[NewTransaction]) -> str:
+    """Stages the transactions for the import approval, returns the staging token.
+
+    The previous staging of the balance and the expired ones are discarded.
+    """
+    check.value(balance, [check.is_instance(Balance)])
+    check.value(txns, [check.is_instance(list)])
+    for txn in txns:
+        check.value(txn, [check.is_instance(NewTransaction)])
+
+    token = secrets.token_urlsafe(8)
+    staged_at = datetime.now()
+
+    with db_proxy.atomic():
+        # fmt: off
+        (
+            StagedTransaction
+            .delete()
+            .where(
+                (StagedTransaction.balance == balance)
+                | (StagedTransaction.staged_at < staged_at - STAGING_TTL)
+            )
+            .execute()
+        )
+        # fmt: on
+
+        rows = [
+            {
+                "balance": balance,
+                "token": token,
+                "direction": txn.direction,
+                "amount": txn.amount,
+                "comment": txn.comment,
+                "created_at": txn.created_at,
+                "staged_at": staged_at,
+            }
+            for txn in txns
+        ]
+        for batch in pw.chunked(rows, 100):
+            StagedTransaction.insert_many(batch).execute()
+
+    return token
+
+
+def get_staged_transactions(balance: Balance, token: str) -> List[StagedTransaction]:
+    check.value(balance, [check.is_instance(Balance)])
+
+    # fmt: off
+    return list(
+        StagedTransaction
+        .select()
+        .where(_staging_condition(balance, token))
+        .order_by(StagedTransaction.id)
+    )
+    # fmt: on
+
+
+def has_staged_transactions(balance: Balance, token: str) -> bool:
+    check.value(balance, [check.is_instance(Balance)])
+
+    return StagedTransaction.select().where(_staging_condition(balance, token)).exists()
+
+
+def import_staged_transactions(
+    balance: Balance, token: str, approved_ids: List[int]
+) -> int:
+    """Imports the approved transactions of the staging and discards it.
+
+    Returns the count of the created transactions, an expired staging isn't
+    imported.
+    """
+    check.value(balance, [check.is_instance(Balance)])
+    check.value(approved_ids, [check.is_instance(list)])
+
+    with db_proxy.atomic():
+        # The batches of the sorted ids keep the transactions in the staging order.
+        txns = []
+        for batch in pw.chunked(sorted(set(approved_ids)), 100):
+            # fmt: off
+            query = (
+                StagedTransaction
+                .select(
+                    StagedTransaction.direction,
+                    StagedTransaction.amount,
+                    StagedTransaction.created_at,
+                    StagedTransaction.comment,
+                )
+                .where(
+                    _staging_condition(balance, token)
+                    & StagedTransaction.id.in_(batch)
+                )
+                .order_by(StagedTransaction.id)
+                .tuples()
+            )
+            # fmt: on
+            txns.extend(
+                NewTransaction(direction, amount, created_at, comment=comment)
+                for direction, amount, created_at, comment in query
+            )
+
+        # fmt: off
+        (
+            StagedTransaction
+            .delete()
+            .where(
+                (StagedTransaction.balance == balance)
+                & (StagedTransaction.token == token)
+            )
+            .execute()
+        )
+        # fmt: on
+
+        return make_transactions(balance, txns)
+
+
+def _staging_condition(balance: Balance, token: str) -> pw.Expression:
+    return (
+        (StagedTransaction.balance == balance)
+        & (StagedTransaction.token == token)
+        & (StagedTransaction.staged_at >= datetime.now() - STAGING_TTL)
+    )
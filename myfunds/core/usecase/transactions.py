@@ -1,5 +1,12 @@
+import hashlib
+from bisect import bisect_left
+from bisect import bisect_right
+from collections import namedtuple
 from datetime import datetime
+from itertools import groupby
+from typing import List
 from typing import Optional
+from typing import Set
 
 import peewee as pw
 
@@ -8,9 +15,19 @@ from myfunds.core.models import Balance
 from myfunds.core.models import Category
 from myfunds.core.models import Transaction
 from myfunds.core.models import db_proxy
+from myfunds.core.usecase import aggregates
+from myfunds.core.usecase import checkpoints
+from myfunds.core.usecase import versions
 from myfunds.modules import check
 
 
+NewTransaction = namedtuple(
+    "NewTransaction",
+    ["direction", "amount", "created_at", "category", "comment"],
+    defaults=[None, None],
+)
+
+
 def _calculate_common_balance_remainder_for_new_transaction(
     balance: Balance,
     created_at: datetime,
@@ -70,12 +87,134 @@ def _calculate_common_balance_remainder_for_new_transaction(
     return common_balance_remainder
 
 
+def _mark_balance_remainders_dirty(balance_id: int, since: datetime) -> None:
+    # fmt: off
+    (
+        Balance
+        .update(
+            remainders_dirty_since=pw.Case(
+                None,
+                [
+                    (
+                        (Balance.remainders_dirty_since.is_null())
+                        | (Balance.remainders_dirty_since > since),
+                        since,
+                    )
+                ],
+                Balance.remainders_dirty_since,
+            )
+        )
+        .where(Balance.id == balance_id)
+        .execute()
+    )
+    # fmt: on
+
+
+def _make_fingerprint(
+    direction: str,
+    amount: int,
+    comment: Optional[str],
+    created_at: datetime,
+    occurrence: int,
+) -> str:
+    data = "|".join(
+        (
+            str(created_at),
+            direction,
+            str(amount),
+            normalize_comment(comment),
+            str(occurrence),
+        )
+    )
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+def _make_unused_fingerprint(
+    balance: Balance,
+    direction: str,
+    amount: int,
+    comment: Optional[str],
+    created_at: datetime,
+) -> str:
+    """Makes a fingerprint of the manual transaction.
+
+    It's the one of the next occurrence of the equal transactions, so an import of
+    the same transaction afterwards skips it like it was imported.
+    """
+    occurrence = 0
+    while True:
+        fingerprint = _make_fingerprint(
+            direction, amount, comment, created_at, occurrence
+        )
+        # fmt: off
+        exists = (
+            Transaction
+            .select()
+            .where(
+                (Transaction.balance == balance)
+                & (Transaction.fingerprint == fingerprint)
+            )
+            .exists()
+        )
+        # fmt: on
+        if not exists:
+            return fingerprint
+        occurrence += 1
+
+
+def _create_transaction_with_deferred_remainder(
+    balance: Balance,
+    direction: str,
+    amount: int,
+    category: Optional[Category],
+    comment: Optional[str],
+    created_at: datetime,
+) -> Transaction:
+    signed_amount = amount if direction == FundsDirection.INCOME else -amount
+
+    # fmt: off
+    (
+        Balance
+        .update(amount=(Balance.amount + signed_amount))
+        .where(Balance.id == balance.id)
+        .execute()
+    )
+    # fmt: on
+    checkpoints.apply_changes(
+        balance.id, {checkpoints.month_of(created_at): (signed_amount, 1)}
+    )
+    _mark_balance_remainders_dirty(balance.id, created_at)
+
+    # The real remainder is set by the repair, the balance amount is a provisional
+    # value that is already correct for the latest transaction.
+    balance_remainder = (
+        Balance.select(Balance.amount).where(Balance.id == balance.id).scalar()
+    )
+
+    txn = Transaction.create(
+        balance=balance,
+        balance_remainder=balance_remainder,
+        direction=direction,
+        category=category,
+        amount=amount,
+        comment=comment,
+        created_at=created_at,
+        fingerprint=_make_unused_fingerprint(
+            balance, direction, amount, comment, created_at
+        ),
+    )
+    aggregates.apply_transaction(txn)
+
+    return txn
+
+
 def make_replenishment(
     balance: Balance,
     amount: int,
     category: Optional[Category] = None,
     comment: Optional[str] = None,
     created_at: Optional[datetime] = None,
+    defer_remainders: bool = False,
 ) -> Transaction:
     check.value(balance, [check.is_instance(Balance)])
     check.value(amount, [check.is_instance(int), check.gt(0)])
@@ -91,6 +230,13 @@ def make_replenishment(
     created_at = created_at or datetime.now()
 
     with db_proxy.atomic():
+        versions.bump_account_data_version(balance.account_id)
+
+        if defer_remainders:
+            return _create_transaction_with_deferred_remainder(
+                balance, FundsDirection.INCOME, amount, category, comment, created_at
+            )
+
         balance_remainder = _calculate_common_balance_remainder_for_new_transaction(
             balance, created_at
         )
@@ -104,6 +250,9 @@ def make_replenishment(
             amount=amount,
             comment=comment,
             created_at=created_at,
+            fingerprint=_make_unused_fingerprint(
+                balance, FundsDirection.INCOME, amount, comment, created_at
+            ),
         )
 
         # fmt: off
@@ -114,6 +263,10 @@ def make_replenishment(
             .execute()
         )
         # fmt: on
+        checkpoints.apply_changes(
+            balance.id, {checkpoints.month_of(created_at): (amount, 1)}
+        )
+        aggregates.apply_transaction(txn)
 
         # fmt: off
         (
@@ -150,6 +303,7 @@ def make_withdrawal(
     category: Optional[Category] = None,
     comment: Optional[str] = None,
     created_at: Optional[datetime] = None,
+    defer_remainders: bool = False,
 ) -> Transaction:
     check.value(balance, [check.is_instance(Balance)])
     check.value(amount, [check.is_instance(int), check.gt(0)])
@@ -165,6 +319,13 @@ def make_withdrawal(
     created_at = created_at or datetime.now()
 
     with db_proxy.atomic():
+        versions.bump_account_data_version(balance.account_id)
+
+        if defer_remainders:
+            return _create_transaction_with_deferred_remainder(
+                balance, FundsDirection.EXPENSE, amount, category, comment, created_at
+            )
+
         balance_remainder = _calculate_common_balance_remainder_for_new_transaction(
             balance, created_at
         )
@@ -178,6 +339,9 @@ def make_withdrawal(
             amount=amount,
             comment=comment,
             created_at=created_at,
+            fingerprint=_make_unused_fingerprint(
+                balance, FundsDirection.EXPENSE, amount, comment, created_at
+            ),
         )
 
         # fmt: off
@@ -188,6 +352,10 @@ def make_withdrawal(
             .execute()
         )
         # fmt: on
+        checkpoints.apply_changes(
+            balance.id, {checkpoints.month_of(created_at): (-amount, 1)}
+        )
+        aggregates.apply_transaction(txn)
 
         # fmt: off
         (
@@ -218,7 +386,7 @@ def make_withdrawal(
         return txn
 
 
-def remove_transaction(txn: Transaction) -> None:
+def remove_transaction(txn: Transaction, defer_remainders: bool = False) -> None:
     check.value(txn, [check.is_instance(Transaction)])
 
     signed_amount = (
@@ -226,6 +394,8 @@ def remove_transaction(txn: Transaction) -> None:
     )
 
     with db_proxy.atomic():
+        versions.bump_balance_account_data_version(txn.balance_id)
+
         # fmt: off
         (
             Balance
@@ -234,17 +404,336 @@ def remove_transaction(txn: Transaction) -> None:
             .execute()
         )
         # fmt: on
+        checkpoints.apply_changes(
+            txn.balance_id, {checkpoints.month_of(txn.created_at): (signed_amount, -1)}
+        )
+        aggregates.apply_transaction(txn, -1)
+
+        if defer_remainders:
+            _mark_balance_remainders_dirty(txn.balance_id, txn.created_at)
+        else:
+            # fmt: off
+            (
+                Transaction
+                .update(
+                    balance_remainder=(Transaction.balance_remainder + signed_amount)
+                )
+                .where(
+                    (Transaction.balance_id == txn.balance_id)
+                    & (Transaction.created_at >= txn.created_at)
+                )
+                .execute()
+            )
+            # fmt: on
+
+        txn.delete_instance()
+
+
+def update_transaction_category(
+    txn: Transaction, category: Optional[Category] = None
+) -> None:
+    check.value(txn, [check.is_instance(Transaction)])
+    if category is not None:
+        check.value(category, [check.is_instance(Category)])
+        check.value(category.direction, [check.eq(txn.direction)])
+
+    if txn.category_id == (category and category.id):
+        return
+
+    with db_proxy.atomic():
+        versions.bump_balance_account_data_version(txn.balance_id)
+        aggregates.apply_transaction(txn, -1)
+
+        Transaction.update(category=category).where(Transaction.id == txn.id).execute()
+        txn.category = category
+
+        aggregates.apply_transaction(txn)
+
+
+def normalize_comment(comment: Optional[str]) -> str:
+    return " ".join((comment or "").lower().split())
+
+
+def make_fingerprints(txns: List[NewTransaction]) -> List[str]:
+    """Makes fingerprints of the transactions, equal ones differ by occurrence."""
+    occurrences = {}
+    fingerprints = []
+    for txn in txns:
+        key = (
+            str(txn.created_at),
+            txn.direction,
+            str(txn.amount),
+            normalize_comment(txn.comment),
+        )
+        occurrence = occurrences.get(key, 0)
+        occurrences[key] = occurrence + 1
+
+        fingerprints.append(
+            _make_fingerprint(
+                txn.direction, txn.amount, txn.comment, txn.created_at, occurrence
+            )
+        )
+
+    return fingerprints
+
+
+def select_known_fingerprints(balance: Balance, fingerprints: List[str]) -> Set[str]:
+    known_fingerprints = set()
+    for batch in pw.chunked(fingerprints, 100):
+        # fmt: off
+        query = (
+            Transaction
+            .select(Transaction.fingerprint)
+            .where(
+                (Transaction.balance == balance)
+                & (Transaction.fingerprint.in_(batch))
+            )
+            .tuples()
+        )
+        # fmt: on
+        known_fingerprints.update(i[0] for i in query)
+
+    return known_fingerprints
+
+
+def make_transactions(balance: Balance, txns: List[NewTransaction]) -> int:
+    """Creates transactions for the balance in a single pass, returns their count.
+
+    Transactions imported before are skipped and not counted.
+    """
+    check.value(balance, [check.is_instance(Balance)])
+    check.value(txns, [check.is_instance(list)])
+    for txn in txns:
+        check.value(txn, [check.is_instance(NewTransaction)])
+        check.value(
+            txn.direction,
+            [check.one_of([FundsDirection.EXPENSE, FundsDirection.INCOME])],
+        )
+        check.value(txn.amount, [check.is_instance(int), check.gt(0)])
+        check.value(txn.created_at, [check.is_instance(datetime)])
+        if txn.category is not None:
+            check.value(txn.category, [check.is_instance(Category)])
+            check.value(txn.category.direction, [check.eq(txn.direction)])
+            check.value(txn.category.account_id, [check.eq(balance.account_id)])
+        if txn.comment is not None:
+            check.value(txn.comment, [check.is_instance(str)])
+
+    if len(txns) == 0:
+        return 0
+
+    # Rows of the reports and the provider responses which were already imported
+    # are skipped, so overlapping imports don't duplicate transactions.
+    fingerprints = make_fingerprints(txns)
+    known_fingerprints = select_known_fingerprints(balance, fingerprints)
+    txns = sorted(
+        (
+            (txn, fingerprint)
+            for txn, fingerprint in zip(txns, fingerprints)
+            if fingerprint not in known_fingerprints
+        ),
+        key=lambda i: i[0].created_at,
+    )
+    if len(txns) == 0:
+        return 0
+
+    # Signed sum of the new transactions for every distinct creation time and
+    # changes of the monthly checkpoints and aggregates.
+    deltas = {}
+    checkpoints_changes = {}
+    aggregates_changes = {}
+    for txn, _ in txns:
+        signed_amount = (
+            txn.amount if txn.direction == FundsDirection.INCOME else -txn.amount
+        )
+        deltas[txn.created_at] = deltas.get(txn.created_at, 0) + signed_amount
+
+        month = checkpoints.month_of(txn.created_at)
+        month_amount, month_count = checkpoints_changes.get(month, (0, 0))
+        checkpoints_changes[month] = (month_amount + signed_amount, month_count + 1)
+
+        key = aggregates.key_of(
+            txn.created_at, txn.direction, txn.category and txn.category.id
+        )
+        key_amount, key_count = aggregates_changes.get(key, (0, 0))
+        aggregates_changes[key] = (key_amount + txn.amount, key_count + 1)
+
+    times = list(deltas)
+
+    with db_proxy.atomic():
+        versions.bump_account_data_version(balance.account_id)
+
+        # fmt: off
+        last_txn = (
+            Transaction
+            .select(Transaction.balance_remainder)
+            .where(
+                (Transaction.balance == balance)
+                & (Transaction.created_at < times[0])
+            )
+            .order_by(Transaction.created_at.desc())
+            .first()
+        )
+        later_txns = list(
+            Transaction
+            .select(Transaction.created_at, Transaction.balance_remainder)
+            .where(
+                (Transaction.balance == balance)
+                & (Transaction.created_at >= times[0])
+            )
+            .order_by(Transaction.created_at)
+            .tuples()
+        )
+        # fmt: on
+        initial_remainder = last_txn.balance_remainder if last_txn else 0
+        later_txns_times = [i[0] for i in later_txns]
+
+        remainders = {}
+        shift = 0
+        for i, created_at in enumerate(times):
+            shift += deltas[created_at]
+
+            # Existing transactions created at the same time or earlier define the
+            # base remainder, the new ones are added on top of it.
+            pos = bisect_right(later_txns_times, created_at) - 1
+            base_remainder = later_txns[pos][1] if pos >= 0 else initial_remainder
+            remainders[created_at] = base_remainder + shift
+
+            # Existing transactions between this and the next new creation time are
+            # shifted by the sum of all new transactions created before them.
+            until = times[i + 1] if i + 1 < len(times) else None
+            first_pos = bisect_left(later_txns_times, created_at)
+            last_pos = (
+                bisect_left(later_txns_times, until)
+                if until is not None
+                else len(later_txns_times)
+            )
+            if shift == 0 or first_pos == last_pos:
+                continue
+
+            condition = (Transaction.balance == balance) & (
+                Transaction.created_at >= created_at
+            )
+            if until is not None:
+                condition &= Transaction.created_at < until
+
+            # fmt: off
+            (
+                Transaction
+                .update(balance_remainder=(Transaction.balance_remainder + shift))
+                .where(condition)
+                .execute()
+            )
+            # fmt: on
+
+        rows = [
+            {
+                "balance": balance,
+                "balance_remainder": remainders[txn.created_at],
+                "direction": txn.direction,
+                "category": txn.category,
+                "amount": txn.amount,
+                "comment": txn.comment,
+                "created_at": txn.created_at,
+                "fingerprint": fingerprint,
+            }
+            for txn, fingerprint in txns
+        ]
+        for batch in pw.chunked(rows, 100):
+            Transaction.insert_many(batch).execute()
 
         # fmt: off
         (
+            Balance
+            .update(amount=(Balance.amount + shift))
+            .where(Balance.id == balance.id)
+            .execute()
+        )
+        # fmt: on
+        checkpoints.apply_changes(balance.id, checkpoints_changes)
+        aggregates.apply_changes(balance.id, aggregates_changes)
+
+    return len(rows)
+
+
+def repair_balance_remainders(balance: Balance) -> bool:
+    """Recalculates remainders deferred by the usecases, returns False if clean."""
+    check.value(balance, [check.is_instance(Balance)])
+
+    with db_proxy.atomic():
+        # fmt: off
+        since = (
+            Balance
+            .select(Balance.remainders_dirty_since)
+            .where(Balance.id == balance.id)
+            .scalar()
+        )
+        # fmt: on
+        if since is None:
+            return False
+
+        # fmt: off
+        last_txn = (
+            Transaction
+            .select(Transaction.balance_remainder)
+            .where(
+                (Transaction.balance == balance)
+                & (Transaction.created_at < since)
+            )
+            .order_by(Transaction.created_at.desc())
+            .first()
+        )
+        txns = (
             Transaction
-            .update(balance_remainder=(Transaction.balance_remainder + signed_amount))
+            .select(
+                Transaction.created_at,
+                Transaction.direction,
+                Transaction.amount,
+                Transaction.balance_remainder,
+            )
             .where(
-                (Transaction.balance_id == txn.balance_id)
-                & (Transaction.created_at >= txn.created_at)
+                (Transaction.balance == balance)
+                & (Transaction.created_at >= since)
+            )
+            .order_by(Transaction.created_at)
+            .tuples()
+        )
+        # fmt: on
+
+        balance_remainder = last_txn.balance_remainder if last_txn else 0
+        outdated = []
+        for created_at, group in groupby(txns, key=lambda i: i[0]):
+            group = list(group)
+            for _, direction, amount, _ in group:
+                balance_remainder += (
+                    amount if direction == FundsDirection.INCOME else -amount
+                )
+            if any(i[3] != balance_remainder for i in group):
+                outdated.append((created_at, balance_remainder))
+
+        for created_at, balance_remainder in outdated:
+            # fmt: off
+            (
+                Transaction
+                .update(balance_remainder=balance_remainder)
+                .where(
+                    (Transaction.balance == balance)
+                    & (Transaction.created_at == created_at)
+                )
+                .execute()
+            )
+            # fmt: on
+
+        # fmt: off
+        (
+            Balance
+            .update(remainders_dirty_since=None)
+            .where(
+                (Balance.id == balance.id)
+                & (Balance.remainders_dirty_since == since)
             )
             .execute()
         )
         # fmt: on
 
-        txn.delete_instance()
+    balance.remainders_dirty_since = None
+    return True
@@ -0,0 +1,37 @@
+from myfunds.core.models import Account
+from myfunds.core.models import Balance
+from myfunds.modules import check
+
+
+def bump_account_data_version(account_id: int) -> None:
+    """Marks the account data as changed, the cached reports of it are outdated."""
+    check.value(account_id, [check.is_instance(int)])
+
+    # fmt: off
+    (
+        Account
+        .update(data_version=(Account.data_version + 1))
+        .where(Account.id == account_id)
+        .execute()
+    )
+    # fmt: on
+
+
+def bump_balance_account_data_version(balance_id: int) -> None:
+    """Same as `bump_account_data_version` for the account of the balance."""
+    check.value(balance_id, [check.is_instance(int)])
+
+    # fmt: off
+    (
+        Account
+        .update(data_version=(Account.data_version + 1))
+        .where(
+            Account.id.in_(
+                Balance
+                .select(Balance.account)
+                .where(Balance.id == balance_id)
+            )
+        )
+        .execute()
+    )
+    # fmt: on
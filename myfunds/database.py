@@ -1,12 +1,113 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator
+from typing import Optional
+
 import peewee as pw
 
 
-def init_database(database_path: str) -> pw.SqliteDatabase:
-    return pw.SqliteDatabase(
+# Seconds a query runs to be logged as a slow one with its plan.
+DEFAULT_SLOW_QUERY_THRESHOLD = 0.1
+
+# Statements which plan can be explained.
+EXPLAINABLE_STATEMENTS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+@dataclass
+class QueryStats:
+    queries: int = 0
+    total_time: float = 0.0
+
+
+# Stats of the current request, the calls run on the pool threads share them.
+_stats: ContextVar[Optional[QueryStats]] = ContextVar("stats", default=None)
+_stats_lock = threading.Lock()
+
+
+def get_logger() -> logging.Logger:
+    return logging.getLogger("myfunds.database")
+
+
+class Database(pw.SqliteDatabase):
+    """Counts the queries of the tracked contexts and logs the slow ones."""
+
+    def __init__(
+        self,
+        database: str,
+        slow_query_threshold: Optional[float] = DEFAULT_SLOW_QUERY_THRESHOLD,
+        **kwargs,
+    ):
+        super().__init__(database, **kwargs)
+        self.slow_query_threshold = slow_query_threshold
+
+    def execute_sql(self, sql, params=None, *args, **kwargs):
+        started_at = time.perf_counter()
+        try:
+            return super().execute_sql(sql, params, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started_at
+
+            stats = _stats.get()
+            if stats is not None:
+                with _stats_lock:
+                    stats.queries += 1
+                    stats.total_time += elapsed
+
+            if self.slow_query_threshold and elapsed >= self.slow_query_threshold:
+                self._log_slow_query(sql, params, elapsed)
+
+    def _log_slow_query(
+        self, sql: str, params: Optional[tuple], elapsed: float
+    ) -> None:
+        message = f"Slow query in {elapsed * 1000:.0f}ms: {sql} {params}"
+
+        if sql.lstrip().upper().startswith(EXPLAINABLE_STATEMENTS):
+            try:
+                cursor = super().execute_sql(f"EXPLAIN QUERY PLAN {sql}", params)
+                plan = "\n".join(f"  {row[-1]}" for row in cursor.fetchall())
+                message = f"{message}\n{plan}"
+            except pw.PeeweeException as e:
+                message = f"{message}\n  Plan isn't available ({repr(e)})."
+
+        get_logger().warning(message)
+
+
+def init_database(
+    database_path: str,
+    slow_query_threshold: Optional[float] = DEFAULT_SLOW_QUERY_THRESHOLD,
+) -> pw.SqliteDatabase:
+    return Database(
         database_path,
+        slow_query_threshold=slow_query_threshold,
         pragmas=[
             ("cache_size", -1024 * 64),
             ("journal_mode", "wal"),
             ("foreign_keys", 1),
         ],
     )
+
+
+def start_tracking() -> QueryStats:
+    """Starts counting the queries of the current context, like a request ones."""
+    stats = QueryStats()
+    _stats.set(stats)
+    return stats
+
+
+def stop_tracking() -> Optional[QueryStats]:
+    stats = _stats.get()
+    _stats.set(None)
+    return stats
+
+
+@contextmanager
+def tracking() -> Iterator[QueryStats]:
+    stats = start_tracking()
+    try:
+        yield stats
+    finally:
+        stop_tracking()
@@ -1,3 +1,6 @@
+import hashlib
+import threading
+from typing import Dict
 from typing import List
 from typing import Optional
 from typing import Union
@@ -5,12 +8,49 @@ from urllib.parse import urljoin
 
 import requests
 
+from myfunds.modules import httpclient
+from myfunds.modules.ratelimit import TokenBucket
+
+
+# The statement allows a single request per minute for the token and returns
+# up to 500 transactions of the period up to 31 days and 1 hour.
+STATEMENT_REQUESTS_INTERVAL = 60
+STATEMENT_LIMIT = 500
+STATEMENT_MAX_PERIOD = 31 * 24 * 60 * 60 + 60 * 60
+
+# Error description of the requests over the server side limit.
+TOO_MANY_REQUESTS = "too many requests"
+
+
+class PersonalAPIError(Exception):
+    ...
+
+
+class RateLimitExceeded(PersonalAPIError):
+    ...
+
+
+_statement_buckets: Dict[str, TokenBucket] = {}
+_statement_buckets_lock = threading.Lock()
+
+
+def get_statement_bucket(token: str) -> TokenBucket:
+    key = hashlib.sha1(token.encode()).hexdigest()
+    with _statement_buckets_lock:
+        if key not in _statement_buckets:
+            _statement_buckets[key] = TokenBucket(
+                capacity=1, rate=(1 / STATEMENT_REQUESTS_INTERVAL)
+            )
+
+        return _statement_buckets[key]
+
 
 class PersonalAPI:
     url_root = "https://api.monobank.ua"
 
-    def __init__(self, token: str):
+    def __init__(self, token: str, rate_limit_timeout: Optional[float] = 0):
         self._token = token
+        self._rate_limit_timeout = rate_limit_timeout
 
     def client_info(self) -> dict:
         url = urljoin(self.url_root, "/personal/client-info")
@@ -23,11 +63,30 @@ class PersonalAPI:
         if to_ is not None:
             path = f"{path}/{to_}"
 
+        bucket = get_statement_bucket(self._token)
+        if not bucket.acquire(timeout=self._rate_limit_timeout):
+            raise RateLimitExceeded("Statement requests limit is exceeded.")
+
         url = urljoin(self.url_root, path)
         return self._make_request("GET", url)
 
     def _make_request(self, *args, **kwargs) -> Union[dict, list]:
         headers = kwargs.pop("headers", {})
         headers["X-Token"] = self._token
-        res = requests.request(*args, headers=headers, **kwargs)
-        return res.json()
+        try:
+            res = httpclient.request(*args, headers=headers, **kwargs)
+        except requests.RequestException as e:
+            raise PersonalAPIError(f"Network error ({repr(e)}).")
+
+        # The limit is shared with the other processes using the token.
+        if res.status_code == 429:
+            raise RateLimitExceeded("Too many requests.")
+
+        data = res.json()
+        if isinstance(data, dict) and "errorDescription" in data:
+            description = data["errorDescription"]
+            if description.lower().startswith(TOO_MANY_REQUESTS):
+                raise RateLimitExceeded(description)
+            raise PersonalAPIError(description)
+
+        return data
@@ -3,9 +3,10 @@ from hashlib import sha1
 from urllib.parse import urljoin
 from xml.etree import ElementTree as ET
 
-import requests
 from defusedxml import ElementTree as DefusedET
 
+from myfunds.modules import httpclient
+
 
 class MerchantAPI:
     url_root = "https://api.privatbank.ua/p24api/"
@@ -51,8 +52,9 @@ class MerchantAPI:
         ET.SubElement(el_merchant, "signature").text = self._make_signature(el_data)
         el_request.append(el_data)
 
-        res = requests.post(
-            url=url,
+        res = httpclient.request(
+            "POST",
+            url,
             headers={"Content-Type": "application/xml"},
             data=(
                 '<?xml version="1.0" encoding="UTF-8"?>\n'
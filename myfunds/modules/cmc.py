@@ -8,6 +8,8 @@ from urllib.parse import urlparse
 import requests
 from lxml import html
 
+from myfunds.modules import httpclient
+
 
 class CMCError(Exception):
     ...
@@ -24,7 +26,7 @@ CryptoCurrency = namedtuple("CryptoCurrency", ["id", "symbol", "name", "img"])
 
 def _make_request(*args, **kwargs) -> requests.Response:
     try:
-        res = requests.request(*args, **kwargs)
+        res = httpclient.request(*args, **kwargs)
     except requests.RequestException as e:
         raise CMCRequestError(f"Network error ({str(e)}).")
 
@@ -75,7 +77,7 @@ def fetch_currency(url: str) -> CryptoCurrency:
 
     id_ = extract_currency_id_from_img_src(img_src)
 
-    res = requests.get(img_src)
+    res = _make_request("GET", img_src)
     img_body = base64.b64encode(res.content).decode()
 
     return CryptoCurrency(id_, symbol, name, img_body)
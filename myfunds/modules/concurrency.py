@@ -0,0 +1,74 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from contextvars import copy_context
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Optional
+
+from myfunds.modules import httpclient
+
+
+# Seconds all the calls share to finish.
+DEFAULT_TIMEOUT = 5
+
+MAX_WORKERS = 8
+
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="lookup")
+
+
+def get_logger() -> logging.Logger:
+    return logging.getLogger("myfunds.concurrency")
+
+
+def run_concurrently(
+    calls: Dict[str, Callable[[], Any]],
+    timeout: float = DEFAULT_TIMEOUT,
+    teardown: Optional[Callable[[], Any]] = None,
+) -> Dict[str, Any]:
+    """Runs the calls on the shared pool, returns the results by the call names.
+
+    A call which failed or didn't finish in time is missing from the results.
+    The calls run in a copy of the caller context and their HTTP requests are
+    limited by the deadline, so the late ones stop soon after it. `teardown`
+    runs on the pool thread after each call, e.g. to close its DB connection.
+    """
+    deadline_at = time.monotonic() + timeout
+    futures = {
+        name: _executor.submit(copy_context().run, _run, call, deadline_at, teardown)
+        for name, call in calls.items()
+    }
+    wait(futures.values(), timeout=timeout)
+
+    results = {}
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            get_logger().warning(f"Call '{name}' missed the {timeout}s deadline.")
+            continue
+
+        e = future.exception()
+        if e is not None:
+            get_logger().warning(f"Call '{name}' failed ({repr(e)}).")
+            continue
+
+        results[name] = future.result()
+
+    return results
+
+
+def _run(
+    call: Callable[[], Any],
+    deadline_at: float,
+    teardown: Optional[Callable[[], Any]],
+) -> Any:
+    try:
+        # The call could wait for a free worker.
+        with httpclient.deadline(deadline_at - time.monotonic()):
+            return call()
+    finally:
+        if teardown is not None:
+            teardown()
@@ -1,10 +1,12 @@
-import requests
+from myfunds.modules import httpclient
 
 
 def fetch_exchange_rates() -> dict:
     # fmt: off
     return (
-        requests.get("http://www.convertmymoney.com/rates.json", timeout=3)
+        httpclient.request(
+            "GET", "http://www.convertmymoney.com/rates.json", timeout=3
+        )
         .json()
         .get("rates", {})
     )
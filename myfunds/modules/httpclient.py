@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+from typing import Union
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Connect and read timeouts in seconds.
+DEFAULT_TIMEOUT = (3.05, 10)
+
+# Connection errors are retried for any request, server errors and read errors
+# for the idempotent ones only.
+RETRIES = 3
+RETRIES_BACKOFF_FACTOR = 0.3
+RETRIES_STATUSES = frozenset([500, 502, 503, 504])
+
+POOL_MAXSIZE = 10
+
+
+HostStats = namedtuple("HostStats", ["requests", "errors", "total_time", "max_time"])
+
+
+_sessions: Dict[Tuple[str, int], requests.Session] = {}
+_stats: Dict[str, HostStats] = {}
+_lock = threading.Lock()
+
+# Monotonic time the requests of the context must be done by.
+_deadline_at: ContextVar[Optional[float]] = ContextVar("deadline_at", default=None)
+
+
+def get_logger() -> logging.Logger:
+    return logging.getLogger("myfunds.httpclient")
+
+
+def make_session(retries: int = RETRIES) -> requests.Session:
+    retry = Retry(
+        total=retries,
+        backoff_factor=RETRIES_BACKOFF_FACTOR,
+        status_forcelist=RETRIES_STATUSES,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session(url: str, retries: int = RETRIES) -> requests.Session:
+    """Returns the session of the URL host, it keeps the host connections alive."""
+    parsed_url = urlparse(url)
+    key = (f"{parsed_url.scheme}://{parsed_url.netloc}", retries)
+
+    with _lock:
+        if key not in _sessions:
+            _sessions[key] = make_session(retries)
+
+        return _sessions[key]
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """Limits the timeouts of the requests made in the context by the deadline.
+
+    The requests aren't retried within the deadline, the ones made after it fail
+    with `requests.Timeout` without being sent.
+    """
+    token = _deadline_at.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline_at.reset(token)
+
+
+def request(
+    method: str,
+    url: str,
+    timeout: Optional[Union[float, Tuple[float, float]]] = DEFAULT_TIMEOUT,
+    **kwargs,
+) -> requests.Response:
+    """Makes the request by the pooled session of the host and logs its latency."""
+    host = urlparse(url).netloc
+    retries = RETRIES
+
+    deadline_at = _deadline_at.get()
+    if deadline_at is not None:
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise requests.Timeout(f"{method} {host} missed the deadline.")
+        timeout = _limit_timeout(timeout, remaining)
+        retries = 0
+
+    started_at = time.perf_counter()
+    try:
+        res = get_session(url, retries).request(method, url, timeout=timeout, **kwargs)
+    except requests.RequestException as e:
+        elapsed = time.perf_counter() - started_at
+        _add_stats(host, elapsed, error=True)
+        # The exception isn't logged as is, its message could contain a token
+        # from the URL.
+        get_logger().warning(
+            f"{method} {host} failed in {elapsed * 1000:.0f}ms"
+            f" ({e.__class__.__name__})."
+        )
+        raise
+
+    elapsed = time.perf_counter() - started_at
+    _add_stats(host, elapsed, error=(not res.ok))
+    get_logger().debug(f"{method} {host} {res.status_code} in {elapsed * 1000:.0f}ms")
+    return res
+
+
+def _limit_timeout(
+    timeout: Optional[Union[float, Tuple[float, float]]], limit: float
+) -> Union[float, Tuple[float, float]]:
+    if timeout is None:
+        return limit
+
+    if isinstance(timeout, tuple):
+        return tuple(min(i, limit) for i in timeout)
+
+    return min(timeout, limit)
+
+
+def _add_stats(host: str, elapsed: float, error: bool) -> None:
+    with _lock:
+        stats = _stats.get(host, HostStats(0, 0, 0.0, 0.0))
+        _stats[host] = HostStats(
+            requests=(stats.requests + 1),
+            errors=(stats.errors + int(error)),
+            total_time=(stats.total_time + elapsed),
+            max_time=max(stats.max_time, elapsed),
+        )
+
+
+def get_stats() -> Dict[str, HostStats]:
+    """Returns the requests count and latency by hosts since the process start."""
+    with _lock:
+        return dict(_stats)
@@ -0,0 +1,49 @@
+import threading
+import time
+from typing import Callable
+from typing import Optional
+
+
+class TokenBucket:
+    """Thread safe token bucket refilled by `rate` tokens per second."""
+
+    def __init__(
+        self,
+        capacity: float,
+        rate: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.capacity = capacity
+        self.rate = rate
+        self._clock = clock
+        self._tokens = capacity
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def consume(self, tokens: float = 1) -> float:
+        """Takes the tokens, returns 0 or seconds to wait if there aren't enough."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0
+
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """Waits for the tokens, returns False if they aren't available in time."""
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            delay = self.consume(tokens)
+            if delay == 0:
+                return True
+
+            if deadline is not None and self._clock() + delay > deadline:
+                return False
+
+            time.sleep(delay)
@@ -1,3 +1,4 @@
+import json
 from typing import Any
 from typing import List
 from typing import Optional
@@ -5,11 +6,19 @@ from typing import Union
 
 import requests
 
+from myfunds.modules import httpclient
+
 
 class BotClientError(Exception):
     ...
 
 
+class TooManyRequests(BotClientError):
+    def __init__(self, *args, retry_after: int = 0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retry_after = retry_after
+
+
 class BotClient:
     url_root: str = "https://api.telegram.org"
 
@@ -32,8 +41,39 @@ class BotClient:
         self._set_optional(params, "offset", offset)
         self._set_optional(params, "limit", limit)
         self._set_optional(params, "timeout", timeout)
+        if allowed_updates is not None:
+            # The query parameter is a JSON-serialized list.
+            params["allowed_updates"] = json.dumps(allowed_updates)
+
+        # The long polling request is answered after the timeout at most.
+        connect_timeout, read_timeout = httpclient.DEFAULT_TIMEOUT
+        read_timeout += timeout or 0
+
+        return self._request(
+            "GET", url, params=params, timeout=(connect_timeout, read_timeout)
+        )
+
+    def set_webhook(
+        self,
+        url: str,
+        secret_token: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        allowed_updates: Optional[list] = None,
+        drop_pending_updates: Optional[bool] = None,
+    ) -> bool:
+        url_ = self._make_url("setWebhook")
+        params = {"url": url}
+        self._set_optional(params, "secret_token", secret_token)
+        self._set_optional(params, "max_connections", max_connections)
         self._set_optional(params, "allowed_updates", allowed_updates)
-        return self._request("GET", url, params=params)
+        self._set_optional(params, "drop_pending_updates", drop_pending_updates)
+        return self._request("POST", url_, json=params)
+
+    def delete_webhook(self, drop_pending_updates: Optional[bool] = None) -> bool:
+        url = self._make_url("deleteWebhook")
+        params = {}
+        self._set_optional(params, "drop_pending_updates", drop_pending_updates)
+        return self._request("POST", url, json=params)
 
     def send_message(
         self,
@@ -111,7 +151,7 @@ class BotClient:
 
     def _request(self, *args, **kwargs) -> dict:
         try:
-            res = requests.request(*args, **kwargs)
+            res = httpclient.request(*args, **kwargs)
         except requests.RequestException as e:
             raise BotClientError(f"Network error - {repr(e)}.")
 
@@ -129,7 +169,14 @@ class BotClient:
             raise BotClientError("Unknown result status.")
 
         if not ok:
-            raise BotClientError(f"Failed request ({json_data.get('description')}).")
+            description = json_data.get("description")
+            retry_after = (json_data.get("parameters") or {}).get("retry_after")
+            if retry_after is not None:
+                raise TooManyRequests(
+                    f"Failed request ({description}).", retry_after=retry_after
+                )
+
+            raise BotClientError(f"Failed request ({description}).")
 
         result = json_data.get("result")
         if result is None:
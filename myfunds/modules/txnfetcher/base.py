@@ -52,8 +52,10 @@ class BaseTxnFetcher:
     provider_name: str = None
     require_config: bool = True
 
-    def __init__(self, config: Optional[dict] = None):
+    def __init__(self, config: Optional[dict] = None, state: Optional[dict] = None):
         self.config = config
+        # Persistent data of the fetcher between the fetches, e.g. a resume cursor.
+        self.state = {} if state is None else state
 
     def fetch_transactions(self, since: datetime) -> List[ProviderTransaction]:
         if self.require_config and self.config is None:
@@ -1,8 +1,10 @@
 from datetime import datetime
-from datetime import timedelta
 from typing import List
 
+from myfunds.modules.api.monobank import STATEMENT_LIMIT
+from myfunds.modules.api.monobank import STATEMENT_MAX_PERIOD
 from myfunds.modules.api.monobank import PersonalAPI
+from myfunds.modules.api.monobank import RateLimitExceeded
 
 from .base import BaseTxnFetcher
 from .base import ProviderTransaction
@@ -15,17 +17,44 @@ class MonobankTxnFetcher(BaseTxnFetcher):
     provider_name = "Monobank"
     require_config = True
 
-    def _fetch_transactions(self, since: datetime) -> List[ProviderTransaction]:
-        api = PersonalAPI(self.config["token"])
+    # Seconds to wait for the statement requests limit, the fetch stops and
+    # saves the resume cursor to the state if it isn't enough.
+    rate_limit_timeout: float = 0
 
+    def _fetch_transactions(self, since: datetime) -> List[ProviderTransaction]:
+        api = PersonalAPI(self.config["token"], self.rate_limit_timeout)
         account = self.config["account"]
-        from_ = int(since.timestamp())
-        to = int((since + timedelta(days=30)).timestamp())
 
-        data = api.payments(account, from_, to)
+        # The period is fetched from the newest transactions to the oldest ones,
+        # the cursor keeps the period part which isn't fetched yet.
+        cursor = self.state.get("cursor")
+        if cursor is not None:
+            from_, to = cursor["since"], cursor["until"]
+        else:
+            from_, to = int(since.timestamp()), int(datetime.now().timestamp())
+
+        items = {}
+        while to > from_:
+            try:
+                data = api.payments(account, max(from_, to - STATEMENT_MAX_PERIOD), to)
+            except RateLimitExceeded:
+                self.state["cursor"] = {"since": from_, "until": to}
+                break
+
+            for i in data:
+                items[i["id"]] = i
+
+            if len(data) < STATEMENT_LIMIT:
+                to -= STATEMENT_MAX_PERIOD
+            else:
+                # The transactions of the oldest second could be split between
+                # the pages, they are requested again and deduplicated by id.
+                to = min(to - 1, min(int(i["time"]) for i in data))
+        else:
+            self.state.pop("cursor", None)
 
         txns = []
-        for i in data:
+        for i in sorted(items.values(), key=lambda i: int(i["time"])):
             amount = i["amount"]
             created_at = datetime.fromtimestamp(float(i["time"]))
             comment = i["description"]
@@ -0,0 +1,167 @@
+import argparse
+import logging
+import random
+import time
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+
+import peewee as pw
+
+from myfunds.core.constants import FundsDirection
+from myfunds.core.models import Account
+from myfunds.core.models import Balance
+from myfunds.core.models import BalanceLimit
+from myfunds.core.models import Category
+from myfunds.core.models import Currency
+from myfunds.core.models import Transaction
+from myfunds.core.models import db_proxy
+from myfunds.core.models import get_models
+from myfunds.core.statistics import calculate_balance_stats
+from myfunds.core.usecase.transactions import NewTransaction
+from myfunds.core.usecase.transactions import make_transactions
+
+
+class QueriesCounter(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.count = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.count += 1
+
+
+def seed(transactions: int, months: int, categories: int) -> Balance:
+    account = Account.create(username="benchmark", password_hash="********")
+    currency = Currency.create(code_alpha="USD", precision=2)
+    balance = Balance.create(
+        account=account,
+        currency=currency,
+        name="benchmark",
+        amount=0,
+        created_at=datetime.now(),
+    )
+
+    expense_categories = [
+        Category.create(
+            account=account,
+            direction=FundsDirection.EXPENSE,
+            name=f"category_{i}",
+            color_sign="#000000",
+        )
+        for i in range(categories)
+    ]
+    for category in expense_categories[::2]:
+        BalanceLimit.create(balance=balance, category=category, amount=100000)
+
+    rand = random.Random(0)
+    since = datetime(date.today().year, date.today().month, 1)
+    since -= timedelta(days=months * 30)
+    seconds = months * 30 * 24 * 60 * 60
+
+    txns = []
+    for _ in range(transactions):
+        created_at = since + timedelta(seconds=rand.randrange(seconds))
+        if rand.random() < 0.1:
+            txns.append(
+                NewTransaction(
+                    FundsDirection.INCOME, rand.randint(10000, 100000), created_at
+                )
+            )
+        else:
+            txns.append(
+                NewTransaction(
+                    FundsDirection.EXPENSE,
+                    rand.randint(100, 5000),
+                    created_at,
+                    rand.choice(expense_categories + [None]),
+                )
+            )
+
+    make_transactions(balance, txns)
+    return balance
+
+
+def per_figure_queries(balance: Balance, stats_range) -> None:
+    """The statistics page queries before the shared statistics module."""
+    txns = Transaction.select().where(Transaction.balance == balance)
+    in_range = txns.where(Transaction.created_at.between(*stats_range))
+
+    txns.where(Transaction.created_at < stats_range[0]).order_by(
+        Transaction.created_at.desc()
+    ).first()
+    in_range.order_by(Transaction.created_at.desc()).first()
+
+    # Expense was queried by both the general and the categories stats.
+    for _ in range(2):
+        in_range.select(pw.fn.SUM(Transaction.amount)).where(
+            Transaction.direction == FundsDirection.EXPENSE
+        ).scalar()
+    in_range.select(pw.fn.SUM(Transaction.amount)).where(
+        Transaction.direction == FundsDirection.INCOME
+    ).scalar()
+
+    list(
+        Category.select(Category.id, pw.fn.SUM(Transaction.amount))
+        .join(Transaction)
+        .where(
+            (Category.account == balance.account_id)
+            & (Category.direction == FundsDirection.EXPENSE)
+            & (Transaction.balance == balance)
+            & (Transaction.created_at.between(*stats_range))
+        )
+        .group_by(Category.id)
+    )
+    in_range.select(pw.fn.SUM(Transaction.amount)).where(
+        (Transaction.direction == FundsDirection.EXPENSE)
+        & (Transaction.category.is_null())
+    ).scalar()
+    list(BalanceLimit.select().where(BalanceLimit.balance == balance))
+
+
+def measure(func, balance, stats_range, repeats: int):
+    counter = QueriesCounter()
+    logger = logging.getLogger("peewee")
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(counter)
+    try:
+        started_at = time.perf_counter()
+        for _ in range(repeats):
+            func(balance, stats_range)
+        elapsed = time.perf_counter() - started_at
+    finally:
+        logger.removeHandler(counter)
+
+    return counter.count / repeats, elapsed / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compares balance statistics round trips on a seeded balance."
+    )
+    parser.add_argument("--transactions", type=int, default=100000)
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--database", default=":memory:")
+    args = parser.parse_args()
+
+    db = pw.SqliteDatabase(args.database)
+    db_proxy.initialize(db)
+    db.create_tables(get_models())
+
+    balance = seed(args.transactions, args.months, args.categories)
+
+    month = date.today().replace(day=1) - timedelta(days=1)
+    stats_range = (month.replace(day=1), month + timedelta(days=1))
+
+    for name, func in [
+        ("per-figure queries", per_figure_queries),
+        ("statistics module", calculate_balance_stats),
+    ]:
+        round_trips, ms = measure(func, balance, stats_range, args.repeats)
+        print(f"{name:>20}: {round_trips:.0f} round trips, {ms:.2f} ms per render")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,7 +14,7 @@ def main():
 
     config = init_config(args.env)
 
-    db = init_database(config.DATABASE_PATH)
+    db = init_database(config.DATABASE_PATH, config.SLOW_QUERY_THRESHOLD)
     db_proxy.initialize(db)
 
     if Account.select().where(Account.username == config.SUPERUSER).exists():
@@ -0,0 +1,29 @@
+from myfunds.config import init_config
+from myfunds.config import init_env_parser
+from myfunds.core.models import Balance
+from myfunds.core.models import db_proxy
+from myfunds.core.usecase import aggregates
+from myfunds.core.usecase import checkpoints
+from myfunds.database import init_database
+
+
+def main():
+    parser = init_env_parser()
+    args = parser.parse_args()
+
+    config = init_config(args.env)
+
+    db = init_database(config.DATABASE_PATH, config.SLOW_QUERY_THRESHOLD)
+    db_proxy.initialize(db)
+
+    rebuilt = 0
+    for balance in Balance.select():
+        checkpoints.rebuild(balance)
+        aggregates.rebuild(balance)
+        rebuilt += 1
+
+    print(f"Balance aggregates rebuilt: {rebuilt}.")
+
+
+if __name__ == "__main__":
+    main()
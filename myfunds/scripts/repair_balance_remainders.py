@@ -0,0 +1,29 @@
+from myfunds.config import init_config
+from myfunds.config import init_env_parser
+from myfunds.core.models import Balance
+from myfunds.core.models import db_proxy
+from myfunds.core.usecase.transactions import repair_balance_remainders
+from myfunds.database import init_database
+
+
+def main():
+    parser = init_env_parser()
+    args = parser.parse_args()
+
+    config = init_config(args.env)
+
+    db = init_database(config.DATABASE_PATH, config.SLOW_QUERY_THRESHOLD)
+    db_proxy.initialize(db)
+
+    balances = Balance.select().where(Balance.remainders_dirty_since.is_null(False))
+
+    repaired = 0
+    for balance in balances:
+        if repair_balance_remainders(balance):
+            repaired += 1
+
+    print(f"Balance remainders repaired: {repaired}.")
+
+
+if __name__ == "__main__":
+    main()
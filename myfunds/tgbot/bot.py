@@ -1,18 +1,36 @@
+import threading
 import time
 from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
 
+from myfunds import database
 from myfunds.config import Config
 from myfunds.core.models import Account
 from myfunds.core.models import TelegramBotAccount
+from myfunds.core.usecase import refdata
 from myfunds.modules.tg import BotClient
 from myfunds.modules.tg import BotClientError
 from myfunds.tgbot import utils
+from myfunds.tgbot.outbox import Outbox
+from myfunds.tgbot.reports import ReportCache
+from myfunds.tgbot.webhook import WebhookServer
+from myfunds.tgbot.workers import WorkerPool
+from myfunds.tgbot.workers import WorkerPoolClosed
+
+
+# Seconds to wait for the pending updates on the stop.
+SHUTDOWN_TIMEOUT = 30
+
+# Update types the bot handles, the others aren't delivered.
+ALLOWED_UPDATES = ["message", "callback_query"]
 
 
 @dataclass
 class HandlerContext:
-    client: BotClient
+    client: Outbox
     config: Config
+    reports: ReportCache
     account: Account
     chat_id: int
     command_args: tuple
@@ -23,7 +41,17 @@ class Bot:
     def __init__(self, config: Config):
         self._config = config
         self._client = BotClient(config.TGBOT_TOKEN)
+        self._outbox = Outbox(self._client)
+        self._reports = ReportCache()
         self._logger = utils.get_logger()
+        self._workers = WorkerPool(
+            workers=config.TGBOT_WORKERS,
+            max_pending=config.TGBOT_QUEUE_SIZE,
+            max_key_pending=config.TGBOT_CHAT_QUEUE_SIZE,
+        )
+
+        self._webhook_server: Optional[WebhookServer] = None
+        self._stopped = threading.Event()
 
         self._handlers = {}
 
@@ -38,13 +66,17 @@ class Bot:
     def run(self) -> None:
         self._logger.info("Starts listening for updates ...")
 
-        offset = 0
-        while True:
+        # The updates aren't returned while a webhook is set.
+        self._client.delete_webhook()
+
+        offset = None
+        while not self._stopped.is_set():
             try:
                 updates = self._client.get_updates(
                     offset=offset,
                     limit=self._config.TGBOT_UPDATES_LIMIT,
                     timeout=self._config.TGBOT_UPDATES_TIMEOUT,
+                    allowed_updates=ALLOWED_UPDATES,
                 )
             except BotClientError as e:
                 self._logger.warning(repr(e))
@@ -53,20 +85,84 @@ class Bot:
                 continue
 
             if len(updates) == 0:
-                offset = 0
                 continue
 
             for update in updates:
-                self._process_update(update)
+                self.dispatch_update(update)
 
             offset = updates[-1]["update_id"] + 1
 
-    @utils.daemonize
+    @utils.log_error_and_restart(5)
+    def run_webhook(self) -> None:
+        """Sets the webhook and receives the updates on the local HTTP server."""
+        url = self._config.TGBOT_WEBHOOK_URL
+        secret_token = self._config.TGBOT_WEBHOOK_SECRET or None
+        address = (self._config.TGBOT_WEBHOOK_HOST, self._config.TGBOT_WEBHOOK_PORT)
+
+        server = WebhookServer(
+            address, urlparse(url).path or "/", secret_token, self.dispatch_update
+        )
+        try:
+            self._client.set_webhook(
+                url, secret_token=secret_token, allowed_updates=ALLOWED_UPDATES
+            )
+
+            self._logger.info(f"Starts receiving updates on {address} ...")
+            self._webhook_server = server
+            server.serve_forever()
+        finally:
+            self._webhook_server = None
+            server.server_close()
+
+    def stop(self, timeout: Optional[float] = SHUTDOWN_TIMEOUT) -> None:
+        """Stops receiving updates, waits for the dispatched ones to be processed."""
+        self._stopped.set()
+
+        server = self._webhook_server
+        if server is not None:
+            server.shutdown()
+
+        self._logger.info("Processing the pending updates ...")
+        self._workers.shutdown(timeout)
+        self._outbox.close(timeout)
+
+    def dispatch_update(self, update: dict) -> bool:
+        """Queues the update to the chat queue, it waits if all the queues are full.
+
+        The updates of a chat are processed one by one in the order of arrival.
+        Returns False if the update isn't queued and should be delivered again.
+        """
+        try:
+            chat_id = utils.extract_chat_id(update)
+        except (KeyError, TypeError):
+            # The update types subscribed before may still be delivered.
+            self._logger.warning(
+                f"Update {update.get('update_id')} has no chat, skipped."
+            )
+            return True
+
+        try:
+            queued = self._workers.submit(chat_id, self._process_update, update)
+        except WorkerPoolClosed:
+            self._logger.warning(
+                f"Bot is stopping, update {update['update_id']} isn't queued."
+            )
+            return False
+
+        if not queued:
+            self._logger.warning(
+                f"Chat {chat_id} queue is full, update {update['update_id']} skipped."
+            )
+
+        return queued
+
     def _process_update(self, update: dict) -> None:
+        refdata.sync()
+
         chat_id = utils.extract_chat_id(update)
         tg_account = TelegramBotAccount.get_or_none(chat_id=chat_id)
         if tg_account is None:
-            self._client.send_message(
+            self._outbox.send_message(
                 chat_id=chat_id,
                 text="\n".join(
                     [
@@ -90,18 +186,25 @@ class Bot:
             return
 
         ctx = HandlerContext(
-            client=self._client,
+            client=self._outbox,
             config=self._config,
+            reports=self._reports,
             account=account,
             chat_id=chat_id,
             command_args=command_args,
             update=update,
         )
 
-        try:
-            return handler(ctx)
-        except Exception:
-            self._logger.exception("Unexpected error:")
+        with database.tracking() as stats:
+            try:
+                handler(ctx)
+            except Exception:
+                self._logger.exception("Unexpected error:")
+
+        self._logger.info(
+            f"{account.username}: {command} done,"
+            f" {stats.queries} queries in {stats.total_time * 1000:.1f}ms."
+        )
 
     def _get_handler(self, command: str):
         command_name = utils.extract_command_name(command)
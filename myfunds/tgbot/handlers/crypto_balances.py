@@ -1,11 +1,15 @@
+from functools import partial
+
 import peewee as pw
 
+from myfunds.config import Config
 from myfunds.core.constants import CryptoDirection
 from myfunds.core.models import Account
 from myfunds.core.models import CryptoBalance
 from myfunds.core.models import CryptoCurrency
 from myfunds.core.models import CryptoTransaction
-from myfunds.modules import cmc
+from myfunds.core.usecase import refdata
+from myfunds.core.usecase.prices import get_crypto_prices
 from myfunds.tgbot.bot import HandlerContext
 from myfunds.tgbot.utils import InlineKeyboard
 from myfunds.web import utils as web_utils
@@ -18,7 +22,14 @@ def handler(ctx: HandlerContext) -> None:
         ctx.client.delete_message(ctx.chat_id, message_id)
         return
 
-    report = build_report(ctx.account)
+    report = ctx.reports.get_or_build(
+        "crypto_balances",
+        (),
+        ctx.account,
+        partial(build_report, ctx.account, ctx.config),
+        # The prices are refreshed meanwhile.
+        ttl=ctx.config.CRYPTO_PRICES_TTL,
+    )
 
     keyboard = InlineKeyboard(1)
     keyboard.add_button(0, "Remove", "/crypto_balances remove")
@@ -32,7 +43,7 @@ def handler(ctx: HandlerContext) -> None:
     )
 
 
-def build_report(account: Account) -> str:
+def build_report(account: Account, config: Config) -> str:
     # fmt: off
     investments = (
         (
@@ -60,7 +71,7 @@ def build_report(account: Account) -> str:
     )
     # fmt: on
 
-    balances = (
+    balances = refdata.attach_currencies(
         CryptoBalance.select()
         .join(CryptoCurrency)
         .where(CryptoBalance.account == account)
@@ -69,18 +80,25 @@ def build_report(account: Account) -> str:
 
     currencies_ids = [i.currency.cmc_id for i in balances]
 
-    prices = cmc.fetch_prices(currencies_ids, "USD")
+    prices = get_crypto_prices(
+        currencies_ids,
+        "USD",
+        ttl=config.CRYPTO_PRICES_TTL,
+        max_stale=config.CRYPTO_PRICES_MAX_STALE,
+    )
 
     balances_values = {}
     for b in balances:
-        price = prices[b.currency.cmc_id]
-        # fmt: off
-        amount = (
-            float(web_utils.make_hrf_amount(b.quantity, 8))
-            * price
-        )
-        amount = round(amount, 2)
-        # fmt: on
+        # The price of a new currency is missing while CMC isn't available.
+        price, amount = prices.get(b.currency.cmc_id), None
+        if price is not None:
+            # fmt: off
+            amount = (
+                float(web_utils.make_hrf_amount(b.quantity, 8))
+                * price
+            )
+            amount = round(amount, 2)
+            # fmt: on
 
         balances_values[b.id] = {"price": price, "amount": amount}
 
@@ -93,7 +111,12 @@ def build_report(account: Account) -> str:
     total_profit_value_pct = 0.0
 
     if balances_values:
-        current_value = round(sum(i["amount"] for i in balances_values.values()), 2)
+        current_value = round(
+            sum(
+                i["amount"] for i in balances_values.values() if i["amount"] is not None
+            ),
+            2,
+        )
 
     if investments_value > 0:
         current_profit_value = round(current_value - investments_value, 2)
@@ -111,7 +134,10 @@ def build_report(account: Account) -> str:
     )
     currencies_prices_table = []
     for c in unique_currencies:
-        currencies_prices_table.append(f"{c.symbol}: {prices[c.cmc_id]}$")
+        price = prices.get(c.cmc_id)
+        currencies_prices_table.append(
+            f"{c.symbol}: {price}$" if price is not None else f"{c.symbol}: n/a"
+        )
     currencies_prices_table = "\n".join(currencies_prices_table)
 
     # fmt: off
@@ -127,10 +153,9 @@ def build_report(account: Account) -> str:
     balances_table = []
     for i in balances:
         quantity = round(i.quantity / (10 ** 8), 8)
-        balances_table.append(
-            f"{i.name}: {quantity} {i.currency.symbol}"
-            f" ({balances_values[i.id]['amount']}$)",
-        )
+        amount = balances_values[i.id]["amount"]
+        amount = f"{amount}$" if amount is not None else "n/a"
+        balances_table.append(f"{i.name}: {quantity} {i.currency.symbol} ({amount})")
     balances_table = "\n".join(balances_table)
 
     report = []
@@ -1,19 +1,9 @@
 import calendar
-from datetime import datetime
-from typing import List
-from typing import Tuple
 
-import peewee as pw
 from prettytable import PLAIN_COLUMNS
 from prettytable import PrettyTable
 
-from myfunds.core.constants import FundsDirection
-from myfunds.core.models import Account
-from myfunds.core.models import Balance
-from myfunds.core.models import Category
-from myfunds.core.models import JointLimit
-from myfunds.core.models import JointLimitParticipant
-from myfunds.core.models import Transaction
+from myfunds.core.statistics import calculate_joint_limits_stats
 from myfunds.tgbot.bot import HandlerContext
 from myfunds.tgbot.utils import InlineKeyboard
 from myfunds.tgbot.utils import calculate_available_years
@@ -83,7 +73,7 @@ def handler(ctx: HandlerContext) -> None:
     elif ctx.command_args[0] == "build_report":
         year, month = int(ctx.command_args[1]), int(ctx.command_args[2])
         stats_range = make_date_range_by_year_and_month(year, month)
-        joint_limits_data = prepare_joint_limits_data(ctx.account, stats_range)
+        joint_limits_data = calculate_joint_limits_stats(ctx.account, stats_range)
 
         keyboard = InlineKeyboard(1)
         keyboard.add_button(0, "Remove", "/joint_limits remove")
@@ -107,23 +97,23 @@ def handler(ctx: HandlerContext) -> None:
 
         limits_tables = []
         for i in joint_limits_data:
-            ccy_precision = i["currency"].precision
-            total_expense = web_utils.make_hrf_amount(i["total_expense"], ccy_precision)
-            limit_amount = web_utils.make_hrf_amount(i["limit"].amount, ccy_precision)
+            ccy_precision = i.currency.precision
+            total_expense = web_utils.make_hrf_amount(i.total_expense, ccy_precision)
+            limit_amount = web_utils.make_hrf_amount(i.limit.amount, ccy_precision)
 
             table = PrettyTable()
             table.set_style(PLAIN_COLUMNS)
-            table.add_row(["Name:", i["limit"].name])
-            table.add_row(["Currency:", i["currency"].code_alpha])
-            for p in i["participants"]:
+            table.add_row(["Name:", i.limit.name])
+            table.add_row(["Currency:", i.currency.code_alpha])
+            for p in i.participants:
                 table.add_row(
                     [
-                        f'User {p["account"].username}:',
-                        web_utils.make_hrf_amount(p["total_expense"], ccy_precision),
+                        f"User {p.account.username}:",
+                        web_utils.make_hrf_amount(p.total_expense, ccy_precision),
                     ]
                 )
             table.add_row(["Total expense:", total_expense])
-            table.add_row(["Limit:", f"{limit_amount} ({i['total_expense_pct']}%)"])
+            table.add_row(["Limit:", f"{limit_amount} ({i.total_expense_pct}%)"])
             table.align = "l"
 
             limits_tables.append(table)
@@ -143,89 +133,3 @@ def handler(ctx: HandlerContext) -> None:
     elif ctx.command_args[0] == "remove":
         ctx.client.delete_message(ctx.chat_id, message_id)
         return
-
-
-def prepare_joint_limits_data(
-    account: Account, stats_range: Tuple[datetime, datetime]
-) -> List[dict]:
-    # fmt: off
-    categories_ids_query = (
-        Category
-        .select(Category.id)
-        .where(
-            (Category.account == account)
-            & (Category.direction == FundsDirection.EXPENSE)
-        )
-    )
-    # fmt: on
-    categories_ids = [i.id for i in categories_ids_query]
-
-    limits = (
-        JointLimit.select()
-        .join(JointLimitParticipant)
-        .where(JointLimitParticipant.category_id.in_(categories_ids))
-        .group_by(JointLimit.id)
-    )
-
-    result = []
-
-    for limit in limits:
-        # fmt: off
-        participants_query = (
-            JointLimitParticipant
-            .select()
-            .where(JointLimitParticipant.limit == limit)
-        )
-        # fmt: on
-
-        currency = limit.currency
-
-        participants = []
-        for p in participants_query:
-            category = p.category
-            account = category.account
-
-            # fmt: off
-            balances = (
-                Balance
-                .select(
-                    Balance,
-                    pw.fn.SUM(Transaction.amount).alias("expense_amount"),
-                )
-                .join(Transaction, pw.JOIN.LEFT_OUTER)
-                .where(
-                    (Balance.account == account)
-                    & (Balance.currency == currency)
-                    & (Transaction.category == category)
-                    & (Transaction.created_at.between(*stats_range))
-                )
-                .group_by(Balance.id)
-            )
-            # fmt: on
-
-            if not balances:
-                continue
-
-            total_expense = sum([i.expense_amount for i in balances] + [0])
-
-            participants.append({"account": account, "total_expense": total_expense})
-
-        if len(participants) == 0:
-            continue
-
-        total_expense = sum([p["total_expense"] for p in participants])
-        total_expense_pct = round((total_expense / limit.amount) * 100, 2)
-        if total_expense_pct > 100:
-            total_expense_pct = round(100 - total_expense_pct, 2)
-
-        result.append(
-            {
-                "limit": limit,
-                "currency": currency,
-                "participants": participants,
-                "total_expense": total_expense,
-                "total_expense_pct": total_expense_pct,
-            }
-        )
-
-    return result
@@ -1,16 +1,22 @@
+from functools import partial
 from typing import Optional
 
+from myfunds.config import Config
 from myfunds.core.models import Account
 from myfunds.core.models import Balance
 from myfunds.core.models import CryptoBalance
 from myfunds.core.models import CryptoCurrency
 from myfunds.core.models import Currency
-from myfunds.modules import cmc
-from myfunds.modules import convertmymoney
+from myfunds.core.models import db_proxy
+from myfunds.core.usecase import refdata
+from myfunds.core.usecase.prices import ExchangeRates
+from myfunds.core.usecase.prices import get_crypto_prices
+from myfunds.core.usecase.prices import get_exchange_rates
+from myfunds.modules.concurrency import run_concurrently
 from myfunds.tgbot.bot import HandlerContext
 from myfunds.tgbot.utils import InlineKeyboard
-from myfunds.tgbot.utils import get_logger
 from myfunds.web import utils as web_utils
+from myfunds.web.constants import DATETIME_FORMAT
 
 
 def handler(ctx: HandlerContext) -> None:
@@ -20,7 +26,14 @@ def handler(ctx: HandlerContext) -> None:
         ctx.client.delete_message(ctx.chat_id, message_id)
         return
 
-    report = build_report(ctx.account)
+    report = ctx.reports.get_or_build(
+        "total_budget",
+        (),
+        ctx.account,
+        partial(build_report, ctx.account, ctx.config),
+        # The rates and the prices are refreshed meanwhile.
+        ttl=min(ctx.config.CRYPTO_PRICES_TTL, ctx.config.EXCHANGE_RATES_TTL),
+    )
     if report is None:
         report = "*Total Budget*\n\nNo data\\."
 
@@ -36,17 +49,17 @@ def handler(ctx: HandlerContext) -> None:
     )
 
 
-def build_report(account: Account) -> Optional[str]:
+def build_report(account: Account, config: Config) -> Optional[str]:
     common_balances = []
 
-    balances = (
+    balances = refdata.attach_currencies(
         Balance.select()
         .join(Currency)
         .where(Balance.account == account)
         .order_by(Balance.name)
     )
 
-    crypto_balances = (
+    crypto_balances = refdata.attach_currencies(
         CryptoBalance.select()
         .join(CryptoCurrency)
         .where(CryptoBalance.account == account)
@@ -56,12 +69,27 @@ def build_report(account: Account) -> Optional[str]:
     if not balances and not common_balances:
         return
 
-    try:
-        exchange_rates = convertmymoney.fetch_exchange_rates()
-    except Exception as e:
-        logger = get_logger()
-        logger.warning(f"Fethcing exchange rates occures error ({repr(e)}).")
-        exchange_rates = {}
+    currencies_ids = [b.currency.cmc_id for b in crypto_balances]
+
+    results = run_concurrently(
+        {
+            "exchange_rates": partial(
+                get_exchange_rates,
+                ttl=config.EXCHANGE_RATES_TTL,
+                max_stale=config.EXCHANGE_RATES_MAX_STALE,
+            ),
+            "prices": partial(
+                get_crypto_prices,
+                currencies_ids,
+                ttl=config.CRYPTO_PRICES_TTL,
+                max_stale=config.CRYPTO_PRICES_MAX_STALE,
+            ),
+        },
+        timeout=config.LOOKUPS_TIMEOUT,
+        teardown=db_proxy.close,
+    )
+    exchange_rates = results.get("exchange_rates", ExchangeRates({}, None))
+    prices = results.get("prices", {})
 
     for b in balances:
         item = {}
@@ -71,7 +99,7 @@ def build_report(account: Account) -> Optional[str]:
             web_utils.make_hrf_amount(b.amount, b.currency.precision)
         )
 
-        rate = exchange_rates.get(b.currency.code_alpha)
+        rate = exchange_rates.rates.get(b.currency.code_alpha)
         if rate is not None:
             item["converted_amount"] = round(item["amount"] / rate, 2)
         else:
@@ -79,15 +107,6 @@ def build_report(account: Account) -> Optional[str]:
 
         common_balances.append(item)
 
-    currencies_ids = [b.currency.cmc_id for b in crypto_balances]
-
-    try:
-        prices = cmc.fetch_prices(currencies_ids)
-    except Exception as e:
-        logger = get_logger()
-        logger.warning(f"Fethcing prices occures error ({repr(e)}).")
-        prices = {}
-
     for b in crypto_balances:
         item = {}
         item["balance_name"] = b.name
@@ -136,8 +155,15 @@ def build_report(account: Account) -> Optional[str]:
         )
 
     balances_rows = "\n".join(balances_rows)
+
+    exchange_rates_row = ""
+    if exchange_rates.fetched_at is not None:
+        exchange_rates_time = exchange_rates.fetched_at.strftime(DATETIME_FORMAT)
+        exchange_rates_row = f"\nExchange rates: {exchange_rates_time}"
+
     report = (
-        f"*Total Budget*\n\n```\n{balances_rows}\n\nTotal amount: {total_amount}```"
+        f"*Total Budget*\n\n```\n{balances_rows}\n\nTotal amount: {total_amount}"
+        f"{exchange_rates_row}```"
     )
 
     return report
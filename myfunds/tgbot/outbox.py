@@ -0,0 +1,191 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import Union
+
+from myfunds.modules.ratelimit import TokenBucket
+from myfunds.modules.tg import BotClient
+from myfunds.modules.tg import BotClientError
+from myfunds.modules.tg import TooManyRequests
+from myfunds.tgbot.utils import get_logger
+
+
+# Telegram allows about 30 messages per second overall and a message per second
+# in a chat, short bursts are tolerated.
+RATE = 30
+CHAT_RATE = 1
+CHAT_BURST = 3
+
+
+@dataclass
+class OutgoingCall:
+    method: str
+    chat_id: Union[str, int]
+    kwargs: dict
+    message_id: Optional[int] = None
+
+
+class Outbox:
+    """Sends the bot messages in the background within the Telegram rate limits.
+
+    The calls of a chat are sent in order, a pending text edit of a message is
+    replaced by the next edit of it and a 429 response delays the chat calls for
+    the given `retry_after` seconds.
+    """
+
+    def __init__(self, client: BotClient, clock: Callable[[], float] = time.monotonic):
+        self._client = client
+        self._clock = clock
+        self._logger = get_logger()
+
+        self._bucket = TokenBucket(capacity=RATE, rate=RATE, clock=clock)
+        self._chat_buckets: Dict[Union[str, int], TokenBucket] = {}
+        self._retry_at: Dict[Union[str, int], float] = {}
+
+        self._calls: List[OutgoingCall] = []
+        self._edits: Dict[Tuple[Union[str, int], int], OutgoingCall] = {}
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self._thread = threading.Thread(target=self._run, name="outbox", daemon=True)
+        self._thread.start()
+
+    def send_message(self, chat_id: Union[str, int], text: str, **kwargs) -> None:
+        self._put(OutgoingCall("send_message", chat_id, {"text": text, **kwargs}))
+
+    def edit_message_text(
+        self, text: str, chat_id: Union[str, int], message_id: int, **kwargs
+    ) -> None:
+        call = OutgoingCall(
+            "edit_message_text", chat_id, {"text": text, **kwargs}, message_id
+        )
+        with self._cond:
+            pending_call = self._edits.get((chat_id, message_id))
+            if pending_call is not None:
+                pending_call.kwargs = call.kwargs
+                return
+
+        self._put(call)
+
+    def delete_message(self, chat_id: Union[str, int], message_id: int) -> None:
+        with self._cond:
+            # The message edits don't matter any more.
+            pending_call = self._edits.pop((chat_id, message_id), None)
+            if pending_call is not None:
+                self._calls.remove(pending_call)
+
+        self._put(OutgoingCall("delete_message", chat_id, {}, message_id))
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Stops accepting calls, returns False if the pending ones weren't sent."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            with self._cond:
+                self._logger.warning(f"{len(self._calls)} outgoing calls are dropped.")
+            return False
+
+        return True
+
+    def _put(self, call: OutgoingCall) -> None:
+        with self._cond:
+            if self._closed:
+                self._logger.warning(f"Outbox is closed, {call.method} is dropped.")
+                return
+
+            self._calls.append(call)
+            if call.method == "edit_message_text":
+                self._edits[(call.chat_id, call.message_id)] = call
+
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                call, delay = self._pop_call()
+                if call is None:
+                    if self._closed and not self._calls:
+                        return
+
+                    self._cond.wait(delay)
+                    continue
+
+            # The calls of other chats wait for the overall limit as well.
+            self._bucket.acquire()
+            self._send(call)
+
+    def _pop_call(self) -> Tuple[Optional[OutgoingCall], Optional[float]]:
+        """Takes the first call allowed to be sent, or returns the delay to it."""
+        now = self._clock()
+        delay = None
+        skipped_chats: Set[Union[str, int]] = set()
+
+        for call in self._calls:
+            if call.chat_id in skipped_chats:
+                continue
+
+            chat_delay = self._retry_at.get(call.chat_id, now) - now
+            if chat_delay <= 0:
+                chat_delay = self._get_chat_bucket(call.chat_id).consume()
+
+            if chat_delay > 0:
+                skipped_chats.add(call.chat_id)
+                delay = chat_delay if delay is None else min(delay, chat_delay)
+                continue
+
+            self._retry_at.pop(call.chat_id, None)
+            self._calls.remove(call)
+            if call.method == "edit_message_text":
+                del self._edits[(call.chat_id, call.message_id)]
+
+            return call, None
+
+        return None, delay
+
+    def _get_chat_bucket(self, chat_id: Union[str, int]) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(
+                capacity=CHAT_BURST, rate=CHAT_RATE, clock=self._clock
+            )
+        return bucket
+
+    def _send(self, call: OutgoingCall) -> None:
+        kwargs = dict(call.kwargs, chat_id=call.chat_id)
+        if call.message_id is not None:
+            kwargs["message_id"] = call.message_id
+
+        try:
+            getattr(self._client, call.method)(**kwargs)
+        except TooManyRequests as e:
+            self._logger.warning(
+                f"Chat {call.chat_id} {call.method} is retried after"
+                f" {e.retry_after}s."
+            )
+            with self._cond:
+                self._retry_at[call.chat_id] = self._clock() + e.retry_after
+                self._requeue(call)
+        except BotClientError as e:
+            self._logger.warning(f"Chat {call.chat_id} {call.method} failed ({e}).")
+        except Exception:
+            self._logger.exception("Unexpected error:")
+
+    def _requeue(self, call: OutgoingCall) -> None:
+        # A newer edit of the message was queued while the call was sent.
+        if call.method == "edit_message_text":
+            key = (call.chat_id, call.message_id)
+            if key in self._edits:
+                return
+            self._edits[key] = call
+
+        self._calls.insert(0, call)
+        self._cond.notify_all()
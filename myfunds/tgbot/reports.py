@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Optional
+from typing import Tuple
+
+from myfunds.core.models import Account
+
+
+# Reports kept in total, the least recently used ones are dropped first.
+MAX_SIZE = 256
+
+
+class ReportCache:
+    """Keeps the built reports of the accounts until the account data changes.
+
+    The reports are keyed by the handler, its arguments and the account data
+    version, the writes of the account data bump the version so an outdated
+    report isn't found. Reports showing the market prices also expire in `ttl`
+    seconds.
+    """
+
+    def __init__(
+        self, max_size: int = MAX_SIZE, clock: Callable[[], float] = time.monotonic
+    ):
+        self._max_size = max_size
+        self._clock = clock
+
+        # Reports and their expiration times by the keys, in the usage order.
+        self._reports: Dict[Hashable, Tuple[Optional[str], Optional[float]]]
+        self._reports = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(
+        self,
+        handler: str,
+        args: tuple,
+        account: Account,
+        build: Callable[[], Optional[str]],
+        ttl: Optional[float] = None,
+    ) -> Optional[str]:
+        """Returns the cached report, builds and caches it if there isn't one."""
+        key = (handler, args, account.id, account.data_version)
+        now = self._clock()
+
+        with self._lock:
+            cached = self._reports.get(key)
+            if cached is not None:
+                report, expires_at = cached
+                if expires_at is None or expires_at > now:
+                    self._reports.move_to_end(key)
+                    return report
+
+                del self._reports[key]
+
+        # The reports are built outside of the lock, the same report may be built
+        # twice by concurrent chats of the account.
+        report = build()
+        expires_at = None if ttl is None else now + ttl
+
+        with self._lock:
+            self._reports[key] = (report, expires_at)
+            self._reports.move_to_end(key)
+            while len(self._reports) > self._max_size:
+                self._reports.popitem(last=False)
+
+        return report
@@ -1,6 +1,5 @@
 import json
 import logging
-import threading
 import time
 from datetime import date as dt_date
 from typing import List
@@ -25,14 +24,6 @@ def get_logger() -> logging.Logger:
     return logging.getLogger("myfunds.tgbot")
 
 
-def daemonize(f):
-    def wrapper(*args, **kwargs):
-        t = threading.Thread(target=f, args=args, kwargs=kwargs, daemon=True)
-        t.start()
-
-    return wrapper
-
-
 def log_error_and_restart(delay: int = 0):
     def outer(f):
         def inner(*args, **kwargs):
@@ -40,7 +31,7 @@ def log_error_and_restart(delay: int = 0):
 
             while True:
                 try:
-                    f(*args, **kwargs)
+                    return f(*args, **kwargs)
                 except Exception:
                     logger.exception("Unexpected error:")
 
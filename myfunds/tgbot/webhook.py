@@ -0,0 +1,82 @@
+import hmac
+import json
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Callable
+from typing import Optional
+from typing import Tuple
+
+from myfunds.tgbot.utils import get_logger
+
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+# Telegram updates are much smaller, the bigger requests aren't read.
+MAX_CONTENT_LENGTH = 1024 * 1024
+
+
+class WebhookRequestHandler(BaseHTTPRequestHandler):
+    server: "WebhookServer"
+
+    # Seconds to wait for the request data.
+    timeout = 10
+
+    def do_POST(self) -> None:
+        if self.path != self.server.path:
+            self._respond(404)
+            return
+
+        secret_token = self.server.secret_token
+        if secret_token is not None and not hmac.compare_digest(
+            self.headers.get(SECRET_TOKEN_HEADER, ""), secret_token
+        ):
+            self._respond(403)
+            return
+
+        content_length = int(self.headers.get("Content-Length") or 0)
+        if content_length > MAX_CONTENT_LENGTH:
+            self._respond(413)
+            return
+
+        try:
+            update = json.loads(self.rfile.read(content_length))
+        except ValueError:
+            update = None
+
+        if not isinstance(update, dict) or "update_id" not in update:
+            self._respond(400)
+            return
+
+        # The response waits for the update to be queued, so full queues hold
+        # Telegram back, and it redelivers the update which isn't queued.
+        if not self.server.dispatch(update):
+            self._respond(503)
+            return
+
+        self._respond(200)
+
+    def log_message(self, format: str, *args) -> None:
+        get_logger().debug(f"Webhook {self.address_string()}: {format % args}")
+
+    def _respond(self, status: int) -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """Receives the Telegram updates on the path and dispatches them."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        path: str,
+        secret_token: Optional[str],
+        dispatch: Callable[[dict], bool],
+    ):
+        super().__init__(address, WebhookRequestHandler)
+        self.path = path
+        self.secret_token = secret_token
+        self.dispatch = dispatch
@@ -0,0 +1,137 @@
+import threading
+from collections import deque
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import Hashable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from myfunds.tgbot.utils import get_logger
+
+
+class WorkerPoolClosed(Exception):
+    ...
+
+
+class WorkerPool:
+    """Fixed number of threads running the tasks one by one for each key.
+
+    The tasks of a key (a chat) run in the submission order, the tasks of
+    different keys run concurrently. Submitting blocks while the pool has
+    `max_pending` tasks, a key with `max_key_pending` tasks rejects new ones.
+    """
+
+    def __init__(self, workers: int, max_pending: int, max_key_pending: int):
+        self._max_pending = max_pending
+        self._max_key_pending = max_key_pending
+        self._logger = get_logger()
+
+        # Pending tasks by keys, a key is in the ready queue or it's being run
+        # while it has pending tasks.
+        self._tasks: Dict[Hashable, Deque[Tuple[Callable, tuple]]] = {}
+        self._ready: Deque[Hashable] = deque()
+        self._pending = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self._threads: List[threading.Thread] = []
+        for i in range(workers):
+            t = threading.Thread(target=self._work, name=f"worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(
+        self, key: Hashable, f: Callable, *args, timeout: Optional[float] = None
+    ) -> bool:
+        """Queues the task, returns False if the key queue is full or on timeout."""
+        with self._cond:
+            if self._closed:
+                raise WorkerPoolClosed("Worker pool is closed.")
+
+            if not self._cond.wait_for(
+                lambda: (
+                    self._closed
+                    or self._is_key_full(key)
+                    or self._pending < self._max_pending
+                ),
+                timeout,
+            ):
+                return False
+
+            if self._closed:
+                raise WorkerPoolClosed("Worker pool is closed.")
+
+            if self._is_key_full(key):
+                return False
+
+            tasks = self._tasks.get(key)
+            if tasks is None:
+                tasks = self._tasks[key] = deque()
+                self._ready.append(key)
+
+            tasks.append((f, args))
+            self._pending += 1
+            self._cond.notify_all()
+
+        return True
+
+    def shutdown(self, timeout: Optional[float] = None) -> bool:
+        """Stops accepting tasks and waits for the pending ones to be done.
+
+        Returns False if some tasks weren't done in time, they're dropped.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            drained = self._cond.wait_for(lambda: self._pending == 0, timeout)
+
+            if not drained:
+                self._logger.warning(f"{self._pending} pending tasks are dropped.")
+                self._tasks.clear()
+                self._ready.clear()
+                self._pending = 0
+                self._cond.notify_all()
+
+        for t in self._threads:
+            t.join(timeout)
+
+        return drained
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                # The workers exit after the pending tasks are done, a task
+                # requeues its key while there are more tasks of the key.
+                self._cond.wait_for(
+                    lambda: self._ready or (self._closed and self._pending == 0)
+                )
+                if not self._ready:
+                    return
+
+                key = self._ready.popleft()
+                f, args = self._tasks[key][0]
+
+            try:
+                f(*args)
+            except Exception:
+                self._logger.exception("Unexpected error:")
+
+            with self._cond:
+                tasks = self._tasks.get(key)
+                if tasks is None:
+                    continue
+
+                tasks.popleft()
+                self._pending -= 1
+                if tasks:
+                    self._ready.append(key)
+                else:
+                    del self._tasks[key]
+
+                self._cond.notify_all()
+
+    def _is_key_full(self, key: Hashable) -> bool:
+        tasks = self._tasks.get(key)
+        return tasks is not None and len(tasks) >= self._max_key_pending
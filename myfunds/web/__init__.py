@@ -11,7 +11,9 @@ def create_app(config: Config) -> flask.Flask:
     app = flask.Flask(__name__)
 
     app.config["SECRET_KEY"] = config.WEB_SECRET_KEY
-    app.config["DATABASE"] = init_database(config.DATABASE_PATH)
+    app.config["DATABASE"] = init_database(
+        config.DATABASE_PATH, config.SLOW_QUERY_THRESHOLD
+    )
     app.config.from_object(config)
 
     views.init_app(app)
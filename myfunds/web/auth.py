@@ -5,6 +5,7 @@ from flask import g
 from flask import session
 
 from myfunds.core.models import Account
+from myfunds.core.usecase import refdata
 
 
 class AuthorizationError(Exception):
@@ -42,7 +43,7 @@ def login_required(f):
         if account_id is None:
             raise NotAuthorized()
 
-        account = Account.get_or_none(id=account_id)
+        account = refdata.get_account(account_id)
         if account is None:
             raise SessionCorrupted()
 
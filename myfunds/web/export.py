@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+import zlib
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Sequence
+
+from flask import Response
+from flask import stream_with_context
+
+
+CSV = "csv"
+NDJSON = "ndjson"
+
+FORMATS = [CSV, NDJSON]
+
+MIMETYPES = {
+    CSV: "text/csv",
+    NDJSON: "application/x-ndjson",
+}
+
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_csv(columns: List[str], rows: Iterable[Sequence]) -> Iterator[str]:
+    buffer = io.StringIO()
+    csvwriter = csv.writer(buffer, delimiter=";", quoting=csv.QUOTE_ALL)
+    csvwriter.writerow(columns)
+
+    for row in rows:
+        csvwriter.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def iter_ndjson(columns: List[str], rows: Iterable[Sequence]) -> Iterator[str]:
+    keys = [i.lower() for i in columns]
+
+    chunk = []
+    chunk_size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(keys, row)), ensure_ascii=False) + "\n"
+        chunk.append(line)
+        chunk_size += len(line)
+        if chunk_size >= CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk, chunk_size = [], 0
+
+    yield "".join(chunk)
+
+
+def iter_gzip(chunks: Iterable[str]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=(zlib.MAX_WBITS | 16))
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+
+    yield compressor.flush()
+
+
+def make_response(
+    name: str,
+    columns: List[str],
+    rows: Iterable[Sequence],
+    fmt: str = CSV,
+    compress: bool = False,
+) -> Response:
+    """Streams the rows as an attachment, rows are consumed lazily."""
+    chunks = (iter_csv if fmt == CSV else iter_ndjson)(columns, rows)
+    filename = f"{name}.{fmt}"
+    mimetype = MIMETYPES[fmt]
+
+    if compress:
+        chunks = iter_gzip(chunks)
+        filename = f"{filename}.gz"
+        mimetype = "application/gzip"
+
+    res = Response(stream_with_context(chunks), mimetype=mimetype)
+    res.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return res
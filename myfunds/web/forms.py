@@ -1,4 +1,6 @@
+from wtforms import BooleanField
 from wtforms import DateTimeField
+from wtforms import Field
 from wtforms import Form
 from wtforms import IntegerField
 from wtforms import PasswordField
@@ -6,6 +8,18 @@ from wtforms import StringField
 from wtforms import validators as vals
 
 from myfunds.web import constants
+from myfunds.web import export
+
+
+class IntegerListField(Field):
+    """Integers of the inputs sharing the field name, e.g. checkboxes."""
+
+    def process_formdata(self, valuelist):
+        try:
+            self.data = [int(i) for i in valuelist]
+        except ValueError:
+            self.data = []
+            raise ValueError("Not a valid integer list.")
 
 
 username_field = lambda: StringField(  # noqa: E731
@@ -122,6 +136,11 @@ class ImportTransactionsForm(Form):
     parser_id = StringField(validators=[vals.InputRequired()])
 
 
+class ImportStagedTransactionsForm(Form):
+    token = StringField(validators=[vals.InputRequired(), vals.Length(max=32)])
+    txn_ids = IntegerListField()
+
+
 class AddJointLimitForm(Form):
     currency_id = id_field()
     name = StringField(validators=[vals.InputRequired()])
@@ -192,3 +211,8 @@ class Privat24FetcherConfigForm(Form):
     merchant_id = StringField(validators=[vals.InputRequired()])
     merchant_password = StringField(validators=[vals.InputRequired()])
     card = StringField(validators=[vals.InputRequired()])
+
+
+class ExportForm(Form):
+    format = StringField(validators=[vals.Optional(), vals.AnyOf(export.FORMATS)])
+    gzip = BooleanField()
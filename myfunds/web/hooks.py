@@ -1,4 +1,5 @@
 import logging
+from typing import Optional
 
 from flask import Flask
 from flask import Response
@@ -10,6 +11,8 @@ from flask import url_for
 from werkzeug.exceptions import HTTPException
 from werkzeug.exceptions import NotFound
 
+from myfunds import database
+from myfunds.core.usecase import refdata
 from myfunds.web import auth
 from myfunds.web import constants
 from myfunds.web.exceptions import FormValidationError
@@ -24,6 +27,13 @@ def setup_logger():
     g.logger = logging.getLogger(f"myfunds.web.views.{request.endpoint}")
 
 
+def sync_reference_data():
+    if request.endpoint == "static":
+        return
+
+    refdata.sync()
+
+
 def errorhandler(exc: Exception) -> Response:
     if isinstance(exc, auth.NotAuthorized):
         return redirect(url_for("access.login"))
@@ -57,20 +67,56 @@ def errorhandler(exc: Exception) -> Response:
     )
 
 
-def log_request():
+def start_query_tracking():
+    g.query_stats = database.start_tracking()
+
+
+def log_request(response: Response) -> Response:
     r = request
     if r.endpoint == "static":
-        return
+        return response
 
     logger = logging.getLogger("myfunds.web.requests")
 
     query_string = r.query_string.decode()
     url = f"{r.path}?{query_string}" if query_string != "" else r.path
-    logger.info(f"{r.remote_addr} {r.method} {url}")
+
+    message = f"{r.remote_addr} {r.method} {url} {response.status_code}"
+
+    stats = g.get("query_stats")
+    if stats is None:
+        logger.info(message)
+        return response
+
+    if response.is_streamed:
+        # The streamed body runs its queries after the hook, so the headers are
+        # left off and the totals are logged when the response is closed.
+        response.call_on_close(
+            lambda: logger.info(f"{message}, {format_query_stats(stats)}")
+        )
+        return response
+
+    logger.info(f"{message}, {format_query_stats(stats)}")
+
+    response.headers["X-SQL-Queries"] = str(stats.queries)
+    response.headers.add("Server-Timing", f"sql;dur={stats.total_time * 1000:.1f}")
+
+    return response
+
+
+def format_query_stats(stats: database.QueryStats) -> str:
+    return f"{stats.queries} queries in {stats.total_time * 1000:.1f}ms"
+
+
+def stop_query_tracking(exc: Optional[BaseException]) -> None:
+    database.stop_tracking()
 
 
 def init_app(app: Flask) -> None:
+    app.before_request(start_query_tracking)
     app.before_request(add_constants_to_globals)
     app.before_request(setup_logger)
-    app.before_request(log_request)
+    app.before_request(sync_reference_data)
+    app.after_request(log_request)
+    app.teardown_request(stop_query_tracking)
     app.errorhandler(Exception)(errorhandler)
@@ -0,0 +1,71 @@
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import datetime
+from typing import Optional
+
+import peewee as pw
+
+
+CURSOR_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+NEXT = "next"
+PREV = "prev"
+
+
+Cursor = namedtuple("Cursor", ["direction", "created_at", "id"])
+Page = namedtuple("Page", ["items", "prev_cursor", "next_cursor"])
+
+
+def encode_cursor(direction: str, item: pw.Model) -> str:
+    data = [direction, item.created_at.strftime(CURSOR_DATETIME_FORMAT), item.id]
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+
+def decode_cursor(value: str) -> Cursor:
+    """Decodes the cursor made by `encode_cursor`, raises ValueError if invalid."""
+    try:
+        data = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        direction, created_at, id_ = json.loads(data)
+        created_at = datetime.strptime(created_at, CURSOR_DATETIME_FORMAT)
+    except (binascii.Error, TypeError, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {value}.")
+
+    if direction not in (NEXT, PREV) or not isinstance(id_, int):
+        raise ValueError(f"Invalid cursor: {value}.")
+
+    return Cursor(direction, created_at, id_)
+
+
+def paginate(query: pw.SelectQuery, cursor: Optional[Cursor], limit: int) -> Page:
+    """Returns the page of the newest first query keyed on (created_at, id)."""
+    model = query.model
+    key = pw.Tuple(model.created_at, model.id)
+
+    if cursor is None:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    elif cursor.direction == NEXT:
+        query = query.where(key < pw.Tuple(cursor.created_at, cursor.id))
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.where(key > pw.Tuple(cursor.created_at, cursor.id))
+        query = query.order_by(model.created_at, model.id)
+
+    items = list(query.limit(limit + 1))
+    has_more = len(items) > limit
+    items = items[:limit]
+
+    if cursor is not None and cursor.direction == PREV:
+        items.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = cursor is not None, has_more
+
+    if len(items) == 0:
+        return Page(items, None, None)
+
+    prev_cursor = encode_cursor(PREV, items[0]) if has_prev else None
+    next_cursor = encode_cursor(NEXT, items[-1]) if has_next else None
+
+    return Page(items, prev_cursor, next_cursor)
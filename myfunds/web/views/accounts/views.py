@@ -6,6 +6,8 @@ from flask import request
 from flask import url_for
 
 from myfunds.core.models import Account
+from myfunds.core.models import db_proxy
+from myfunds.core.usecase import refdata
 from myfunds.web import auth
 from myfunds.web import notify
 from myfunds.web import utils
@@ -81,7 +83,10 @@ def delete():
         notify.error("Can't remove superuser.")
         return redirect(redirect_url)
 
-    account.delete_instance(recursive=True)
+    with db_proxy.atomic():
+        account.delete_instance(recursive=True)
+        refdata.invalidate(refdata.ACCOUNTS)
+        refdata.invalidate(refdata.CATEGORIES)
     notify.info(f"Account {account.username} was deleted.")
 
     return redirect(redirect_url)
@@ -112,7 +117,10 @@ def update_password():
         return redirect(redirect_url)
 
     account.password_hash = password_hasher.make_hash(new_password)
-    account.save()
+    with db_proxy.atomic():
+        # The data version is bumped concurrently, so it isn't overwritten.
+        account.save(only=[Account.password_hash])
+        refdata.invalidate(refdata.ACCOUNTS)
     notify.info("Password was updated.")
 
     return redirect(redirect_url)
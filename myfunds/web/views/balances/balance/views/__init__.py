@@ -5,7 +5,7 @@ from flask import abort
 from flask import g
 
 from myfunds.core.models import Balance
-from myfunds.core.models import Category
+from myfunds.core.usecase import refdata
 from myfunds.web import utils
 from myfunds.web.constants import FundsDirection
 
@@ -25,29 +25,16 @@ def verify_balance(f):
         if balance is None:
             abort(404)
 
-        # fmt: off
-        expense_categories = (
-            Category
-            .select()
-            .where(
-                (Category.account == g.authorized_account)
-                & (Category.direction == FundsDirection.EXPENSE.value)
-            )
-            .order_by(Category.name)
+        account_id = g.authorized_account.id
+        expense_categories = refdata.get_categories(
+            account_id, FundsDirection.EXPENSE.value
         )
-        income_categories = (
-            Category
-            .select()
-            .where(
-                (Category.account == g.authorized_account)
-                & (Category.direction == FundsDirection.INCOME.value)
-            )
-            .order_by(Category.name)
+        income_categories = refdata.get_categories(
+            account_id, FundsDirection.INCOME.value
         )
-        # fmt: on
 
         g.balance = balance
-        g.currency = balance.currency
+        g.currency = refdata.get_currency(balance.currency_id)
         g.amount_placeholder = utils.make_amount_placeholder(g.currency.precision)
         g.amount_pattern = utils.make_amount_pattern(g.currency.precision)
         g.expense_categories = expense_categories
@@ -7,6 +7,7 @@ from wtforms import validators as vals
 
 from myfunds.core.models import Category
 from myfunds.core.models import BalanceLimit
+from myfunds.core.usecase import refdata
 from myfunds.web import auth
 from myfunds.web import notify
 from myfunds.web import utils
@@ -33,20 +34,14 @@ def balance_limits():
             .order_by(BalanceLimit.category.name)
         )
         # fmt: on
+        balance_limits = refdata.attach_categories(
+            g.authorized_account.id, balance_limits
+        )
         used_categories_ids = [i.category_id for i in balance_limits]
 
-        # fmt: off
-        expense_categories = (
-            Category
-            .select()
-            .where(
-                (Category.account == g.authorized_account)
-                & (Category.direction == FundsDirection.EXPENSE.value)
-                & (Category.id.not_in(used_categories_ids))
-            )
-            .order_by(Category.name)
-        )
-        # fmt: on
+        expense_categories = [
+            i for i in g.expense_categories if i.id not in used_categories_ids
+        ]
 
         return render_template(
             "balance/balance-limits.html",
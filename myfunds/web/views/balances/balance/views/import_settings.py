@@ -9,6 +9,7 @@ from flask import url_for
 from myfunds.core.models import TransactionImportSettings
 from myfunds.modules import txnfetcher
 from myfunds.modules.api.monobank import PersonalAPI as MonobankPersonalAPI
+from myfunds.modules.api.monobank import PersonalAPIError as MonobankPersonalAPIError
 from myfunds.modules.api.privat24 import MerchantAPI as Privat24MerchantAPI
 from myfunds.web import auth
 from myfunds.web import notify
@@ -162,7 +163,15 @@ def setup_import_settings__monobank():
         return redirect(url_for("balances.i.import_settings", balance_id=g.balance.id))
 
     api = MonobankPersonalAPI(token)
-    data = api.client_info()
+    try:
+        data = api.client_info()
+    except MonobankPersonalAPIError as e:
+        notify.error(f"Monobank request failed ({e}).")
+        return redirect(
+            url_for(
+                "balances.i.setup_import_settings__monobank", balance_id=g.balance.id
+            )
+        )
 
     eligable_accounts: List[tuple] = []
     for account in data["accounts"]:
@@ -7,7 +7,6 @@ from typing import Optional
 from typing import Set
 from typing import Tuple
 
-import peewee as pw
 from flask import current_app
 from flask import g
 from flask import render_template
@@ -19,9 +18,8 @@ from wtforms import ValidationError
 from wtforms import validators as vals
 from wtforms.fields.core import StringField
 
-from myfunds.core.models import BalanceLimit
-from myfunds.core.models import Category
-from myfunds.core.models import Transaction
+from myfunds.core.statistics import BalanceStats
+from myfunds.core.statistics import calculate_balance_stats
 from myfunds.web import auth
 from myfunds.web import utils
 from myfunds.web.constants import DATETIME_FORMAT
@@ -44,236 +42,51 @@ def make_date_range_by_year_and_month(year: int, month: int) -> Tuple[date, date
     return (date(year, month, 1), date(until_year, until_month, 1))
 
 
-def calculate_start_balance(stats_range: Tuple[datetime, datetime]) -> int:
-    # fmt: off
-    last_txn_of_previous_month = (
-        Transaction
-        .select()
-        .where(
-            (Transaction.balance == g.balance)
-            & (Transaction.created_at < stats_range[0])
-        )
-        .order_by(Transaction.created_at.desc())
-        .first()
-    )
-    # fmt: on
-
-    result = None
-    if last_txn_of_previous_month is not None:
-        result = last_txn_of_previous_month.balance_remainder
-
-    return result
-
-
-def calculate_end_balance(stats_range: Tuple[datetime, datetime]) -> int:
-    # fmt: off
-    last_txn_of_current_month = (
-        Transaction
-        .select()
-        .where(
-            (Transaction.balance == g.balance)
-            & (Transaction.created_at.between(*stats_range))
-        )
-        .order_by(Transaction.created_at.desc())
-        .first()
-    )
-    # fmt: on
-
-    result = None
-    if last_txn_of_current_month is not None:
-        result = last_txn_of_current_month.balance_remainder
-
-    return result
-
-
-def calculate_expense(
-    stats_range: Tuple[datetime, datetime], excluded_categories: Set[int]
-) -> int:
-    excluded_categories = excluded_categories.copy()
-    exclude_no_category = NO_CATEGORY_ID in excluded_categories
-    excluded_categories.discard(NO_CATEGORY_ID)
-
-    # fmt: off
-    excluded_categories_condition = (
-        (Transaction.category.not_in(excluded_categories))
-        | (Transaction.category.is_null(True))
-    )
-    if exclude_no_category:
-        excluded_categories_condition = (
-            (Transaction.category.not_in(excluded_categories))
-            & (Transaction.category.is_null(False))
-        )
-    # fmt: on
-
-    # fmt: off
-    return (
-        Transaction
-        .select(pw.fn.SUM(Transaction.amount))
-        .where(
-            (Transaction.balance == g.balance)
-            & (Transaction.direction == FundsDirection.EXPENSE.value)
-            & (Transaction.created_at.between(*stats_range))
-            & excluded_categories_condition
-        )
-        .scalar()
-    )
-    # fmt: on
-
-
-def calculate_income(stats_range: Tuple[datetime, datetime]) -> int:
-    # fmt: off
-    return (
-        Transaction
-        .select(pw.fn.SUM(Transaction.amount))
-        .where(
-            (Transaction.balance == g.balance)
-            & (Transaction.direction == FundsDirection.INCOME.value)
-            & (Transaction.created_at.between(*stats_range))
-        )
-        .scalar()
-    )
-    # fmt: on
-
-
-def calculate_general_stats(
-    stats_range: Tuple[datetime, datetime], excluded_categories: Set[int]
-) -> dict:
-    year, month = stats_range[0].year, stats_range[0].month
-
-    start_balance = calculate_start_balance(stats_range)
-    expense = calculate_expense(stats_range, excluded_categories)
-    income = calculate_income(stats_range)
-
-    end_balance = None
-    if year != utils.current_year() or month != utils.current_month():
-        end_balance = calculate_end_balance(stats_range)
-
-    expense_pct, savings, savings_pct = None, None, None
-    if start_balance is not None and expense is not None:
-        expense_pct = round((expense / start_balance) * 100, 2)
-        savings = start_balance - expense
-        savings_pct = round((savings / start_balance) * 100, 2)
-
-    return {
-        "start_balance": start_balance,
-        "expense": expense,
-        "expense_pct": expense_pct,
-        "income": income,
-        "end_balance": end_balance,
-        "savings": savings,
-        "savings_pct": savings_pct,
+def calculate_stats(
+    stats_range: Tuple[date, date], excluded_categories: Set[int]
+) -> BalanceStats:
+    excluded_categories = {
+        (None if i == NO_CATEGORY_ID else i) for i in excluded_categories
     }
+    return calculate_balance_stats(g.balance, stats_range, excluded_categories)
 
 
 def calculate_expense_categories_stats(
-    stats_range: Tuple[datetime, datetime], excluded_categories: Set[int]
+    stats: BalanceStats,
+    stats_range: Tuple[date, date],
+    excluded_categories: Set[int],
 ) -> List[dict]:
-    # fmt: off
-    query = (
-        Category
-        .select(
-            Category.id,
-            Category.name,
-            Category.color_sign,
-            pw.fn.SUM(Transaction.amount).alias("amount"),
+    categories = [
+        i._replace(
+            id=(NO_CATEGORY_ID if i.id is None else i.id),
+            name=("No category" if i.id is None else i.name),
+            color_sign=(NO_CATEGORY_TXN_COLOR if i.id is None else i.color_sign),
         )
-        .join(Transaction)
-        .where(
-            (Category.account == g.authorized_account)
-            & (Category.direction == FundsDirection.EXPENSE.value)
-            & (Transaction.balance_id == g.balance.id)
-            & (Transaction.created_at.between(*stats_range))
-        )
-        .group_by(Category.id)
-    )
-    # fmt: on
-
-    # fmt: off
-    no_category_txns_amount = (
-        Transaction
-        .select(pw.fn.SUM(Transaction.amount))
-        .where(
-            (Transaction.balance == g.balance)
-            & (Transaction.direction == FundsDirection.EXPENSE.value)
-            & (Transaction.category.is_null())
-            & (Transaction.created_at.between(*stats_range))
-        )
-        .scalar()
-    )
-    # fmt: on
-
-    # fmt: off
-    balance_limits = (
-        BalanceLimit
-        .select()
-        .where(
-            (BalanceLimit.balance == g.balance)
-        )
-    )
-    # fmt: on
-
-    expense = calculate_expense(stats_range, excluded_categories)
-
-    exclude_no_category = NO_CATEGORY_ID in excluded_categories
-
-    categories_limit_amounts = {i.category_id: i.amount for i in balance_limits}
+        for i in stats.expense_categories
+    ]
 
     top_expense = max(
-        [i.amount for i in query if i.id not in excluded_categories]
-        + [(no_category_txns_amount if not exclude_no_category else 0) or 0]
+        [i.amount for i in categories if i.id not in excluded_categories] + [0]
     )
 
     result = []
-    for i in query:
+    for i in categories:
         result.append(
             {
                 "name": i.name,
                 "color_sign": i.color_sign,
                 "transactions_link": make_transactions_link(i.id, stats_range),
                 "amount": i.amount,
-                "amount_pct": (
-                    round((i.amount / expense) * 100, 2) if expense else None
-                ),
+                "amount_pct": stats.category_expense_pct(i),
                 "amount_ratio": (
                     round((i.amount / top_expense) * 100, 2) if top_expense else None
                 ),
-                "expense_limit": init_expense_limit_params(
-                    i.amount, categories_limit_amounts.get(i.id)
-                ),
+                "expense_limit": init_expense_limit_params(i.amount, i.limit_amount),
                 "is_excluded": i.id in excluded_categories,
                 "exclusion_link": make_exclusion_link(excluded_categories, i.id),
             }
         )
 
-    if no_category_txns_amount is not None and no_category_txns_amount > 0:
-        result.append(
-            {
-                "name": "No category",
-                "color_sign": NO_CATEGORY_TXN_COLOR,
-                "transactions_link": make_transactions_link(
-                    NO_CATEGORY_ID, stats_range
-                ),
-                "amount": no_category_txns_amount,
-                "amount_pct": (
-                    round((no_category_txns_amount / expense) * 100, 2)
-                    if expense
-                    else None
-                ),
-                "amount_ratio": (
-                    round((no_category_txns_amount / top_expense) * 100, 2)
-                    if top_expense
-                    else None
-                ),
-                "expense_limit": init_expense_limit_params(
-                    no_category_txns_amount, None
-                ),
-                "is_excluded": exclude_no_category,
-                "exclusion_link": make_exclusion_link(
-                    excluded_categories, NO_CATEGORY_ID
-                ),
-            }
-        )
-
     result = sorted(
         result, key=lambda i: 0 if i["is_excluded"] else i["amount"], reverse=True
     )
@@ -391,15 +204,15 @@ def statistics():
         current_day = f"{today.day} ({today.strftime('%A')}, {month_completed_by}%)"
 
     stats_range = make_date_range_by_year_and_month(year, month)
-    general_stats = calculate_general_stats(stats_range, excluded_categories)
+    stats = calculate_stats(stats_range, excluded_categories)
     expense_categories_stats = calculate_expense_categories_stats(
-        stats_range, excluded_categories
+        stats, stats_range, excluded_categories
     )
 
     return render_template(
         "balance/statistics.html",
         filters=filters,
         current_day=current_day,
-        general_stats=general_stats,
+        general_stats=stats,
         expense_categories_stats=expense_categories_stats,
     )
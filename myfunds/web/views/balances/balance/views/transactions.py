@@ -1,45 +1,46 @@
-import base64
-import csv
-import io
-import json
 import os
 import tempfile
 import uuid
 from collections import namedtuple
 from datetime import datetime
-from datetime import timedelta
-from typing import List
-from typing import Tuple
 
 import peewee as pw
+from flask import current_app
 from flask import g
 from flask import redirect
 from flask import render_template
 from flask import request
 from flask import url_for
-from flask.helpers import make_response
 from wtforms import Form
 from wtforms import IntegerField
 from wtforms import StringField
+from wtforms import ValidationError
 from wtforms import validators as vals
 
 from myfunds.core.models import Category
 from myfunds.core.models import Transaction
 from myfunds.core.models import TransactionImportSettings
+from myfunds.core.models import TransactionSearch
+from myfunds.core.usecase import fetching
+from myfunds.core.usecase import refdata
+from myfunds.core.usecase import staging
 from myfunds.core.usecase import transactions as txn_usecase
-from myfunds.core.usecase.transactions import make_replenishment
-from myfunds.core.usecase.transactions import make_withdrawal
+from myfunds.core.usecase.transactions import NewTransaction
 from myfunds.core.usecase.transactions import remove_transaction
 from myfunds.modules import reparser
 from myfunds.modules import txnfetcher
 from myfunds.web import auth
+from myfunds.web import export
 from myfunds.web import notify
+from myfunds.web import pagination
 from myfunds.web import utils
 from myfunds.web.constants import DATETIME_FORMAT
 from myfunds.web.constants import DATETIME_PATTERN
 from myfunds.web.constants import NO_CATEGORY_ID
 from myfunds.web.constants import FundsDirection
 from myfunds.web.forms import DeleteTransactionForm
+from myfunds.web.forms import ExportForm
+from myfunds.web.forms import ImportStagedTransactionsForm
 from myfunds.web.forms import ImportTransactionsForm
 from myfunds.web.forms import UpdateTransactionCategoryForm
 from myfunds.web.forms import UpdateTransactionCommentForm
@@ -58,8 +59,19 @@ class TransactionFilterForm(Form):
             vals.Regexp(f"{DATETIME_PATTERN} - {DATETIME_PATTERN}"),
         ]
     )
+    comment = StringField(validators=[vals.Optional(), vals.Length(max=200)])
     limit = IntegerField(validators=[vals.Optional()])
-    offset = IntegerField(validators=[vals.Optional()])
+    cursor = StringField(validators=[vals.Optional()])
+
+    def validate_cursor(form, field) -> None:
+        try:
+            pagination.decode_cursor(field.data)
+        except ValueError:
+            raise ValidationError("Invalid cursor.")
+
+
+class TransactionExportForm(TransactionFilterForm, ExportForm):
+    ...
 
 
 TransactionFilters = namedtuple(
@@ -70,8 +82,9 @@ TransactionFilters = namedtuple(
         "categories",
         "created_at_range",
         "created_at_range_hrf",
+        "comment",
         "limit",
-        "offset",
+        "cursor",
     ],
 )
 
@@ -80,19 +93,17 @@ def init_filters(filter_form: Form) -> TransactionFilters:
     direction = filter_form.direction.data
     category_id = filter_form.category_id.data
     created_at_range_hrf = filter_form.created_at_range_hrf.data
+    comment = (filter_form.comment.data or "").strip()
     limit = filter_form.limit.data or 10
-    offset = filter_form.offset.data or 0
+    cursor = (
+        pagination.decode_cursor(filter_form.cursor.data)
+        if filter_form.cursor.data
+        else None
+    )
 
     categories = []
     if direction != "":
-        categories = (
-            Category.select()
-            .where(
-                (Category.account == g.authorized_account)
-                & (Category.direction == direction)
-            )
-            .order_by(Category.name)
-        )
+        categories = refdata.get_categories(g.authorized_account.id, direction)
 
     created_at_range = utils.datetime_range_from_first_month_day_to_now()
     if created_at_range_hrf != "":
@@ -111,8 +122,9 @@ def init_filters(filter_form: Form) -> TransactionFilters:
         categories=categories,
         created_at_range=created_at_range,
         created_at_range_hrf=created_at_range_hrf,
+        comment=comment,
         limit=limit,
-        offset=offset,
+        cursor=cursor,
     )
 
 
@@ -137,27 +149,35 @@ def filtered_transactions(filters: TransactionFilters) -> pw.SelectQuery:
         if filters.category_id == NO_CATEGORY_ID:
             query = query.where(Transaction.category.is_null())
         else:
-            category = Category.get_or_none(
-                id=filters.category_id, account=g.authorized_account
+            category = refdata.get_category(
+                g.authorized_account.id, filters.category_id
             )
             if category is not None and category.direction == filters.direction:
                 query = query.where(Transaction.category == category)
 
-    return query
+    if filters.comment != "":
+        # fmt: off
+        matched_ids = (
+            TransactionSearch
+            .select(TransactionSearch.rowid)
+            .where(TransactionSearch.match(make_search_query(filters.comment)))
+        )
+        # fmt: on
+        query = query.where(Transaction.id.in_(matched_ids))
 
+    return query
 
-def paginated_transactions(
-    filters: TransactionFilters, filtered_txns: pw.SelectQuery
-) -> Tuple[List[Transaction], bool, bool]:
-    limit_plus_one = filters.limit + 1
-    query = filtered_txns.offset(filters.offset).limit(limit_plus_one)
 
-    has_prev = filters.offset > 0
-    has_next = len(query) == limit_plus_one
+def make_search_query(text: str) -> str:
+    """Makes the FTS5 query matching every word of the text as a prefix."""
+    terms = ['"{}"*'.format(i.replace('"', '""')) for i in text.split()]
+    return " ".join(terms)
 
-    result = list(query)[: filters.limit]
 
-    return result, has_prev, has_next
+def paginated_transactions(
+    filters: TransactionFilters, filtered_txns: pw.SelectQuery
+) -> pagination.Page:
+    return pagination.paginate(filtered_txns, filters.cursor, filters.limit)
 
 
 @bp.route("/transactions")
@@ -173,9 +193,13 @@ def transactions():
 
     report_parsers = reparser.get_parsers_by_currency(g.currency.code_alpha)
 
+    # The loaded balance tells if there are deferred remainders to repair.
+    if g.balance.remainders_dirty_since is not None:
+        txn_usecase.repair_balance_remainders(g.balance)
+
     filters = init_filters(filter_form)
     filtered_txns = filtered_transactions(filters)
-    txns, has_prev, has_next = paginated_transactions(filters, filtered_txns)
+    page = paginated_transactions(filters, filtered_txns)
 
     import_settings = TransactionImportSettings.get_or_none(balance=g.balance)
 
@@ -183,10 +207,10 @@ def transactions():
         "balance/transactions.html",
         import_settings=import_settings,
         report_parsers=report_parsers,
-        txns=txns,
+        txns=page.items,
         filters=filters,
-        has_prev=has_prev,
-        has_next=has_next,
+        prev_cursor=page.prev_cursor,
+        next_cursor=page.next_cursor,
     )
 
 
@@ -194,7 +218,7 @@ def transactions():
 @auth.login_required
 @verify_balance
 def export_transactions():
-    filter_form = TransactionFilterForm(request.args)
+    filter_form = TransactionExportForm(request.args)
     utils.validate_form(
         filter_form, url_for("balances.i.transactions", balance_id=g.balance.id)
     )
@@ -202,28 +226,43 @@ def export_transactions():
     filters = init_filters(filter_form)
     filtered_txns = filtered_transactions(filters)
 
-    buffer = io.StringIO()
-    csvwriter = csv.writer(buffer, delimiter=";", quoting=csv.QUOTE_ALL)
-    csvwriter.writerow(
-        ["Time", "Direction", "Category", "Amount", "Currency", "Comment"]
+    precision = g.currency.precision
+    code_alpha = g.currency.code_alpha
+
+    # fmt: off
+    txns = (
+        filtered_txns
+        .select(
+            Transaction.created_at,
+            Transaction.direction,
+            Category.name,
+            Transaction.amount,
+            Transaction.comment,
+        )
+        .tuples()
+        .iterator()
     )
+    # fmt: on
 
-    for i in filtered_txns.iterator():
-        csvwriter.writerow(
-            [
-                i.created_at.strftime(DATETIME_FORMAT),
-                FundsDirection.get(i.direction).meta["name"],
-                i.category.name if i.category else "",
-                utils.make_hrf_amount(i.amount, g.currency.precision),
-                g.currency.code_alpha,
-                i.comment,
-            ]
+    rows = (
+        (
+            created_at.strftime(DATETIME_FORMAT),
+            FundsDirection.get(direction).meta["name"],
+            category_name,
+            utils.make_hrf_amount(amount, precision),
+            code_alpha,
+            comment,
         )
+        for created_at, direction, category_name, amount, comment in txns
+    )
 
-    res = make_response(buffer.getvalue())
-    res.headers["Content-Disposition"] = "attachment; filename=transactions.csv"
-    res.headers["Content-type"] = "text/csv"
-    return res
+    return export.make_response(
+        "transactions",
+        ["Time", "Direction", "Category", "Amount", "Currency", "Comment"],
+        rows,
+        fmt=(filter_form.format.data or export.CSV),
+        compress=filter_form.gzip.data,
+    )
 
 
 @bp.route("/transactions/import", methods=["POST"])
@@ -258,23 +297,31 @@ def import_transactions():
         filepath = os.path.join(tmpdir, filename)
         report_file.save(filepath)
 
+        new_txns = []
         for txn in report_parser(filepath).parse():
             if reparser.is_replenishment(txn):
-                func = "make_replenishment"
+                direction = FundsDirection.INCOME.value
             elif reparser.is_withdrawal(txn):
-                func = "make_withdrawal"
+                direction = FundsDirection.EXPENSE.value
             else:
                 continue
 
-            getattr(txn_usecase, func)(
-                balance=g.balance,
-                amount=txn.amount,
-                category=None,
-                comment=txn.comment,
-                created_at=txn.created_at,
+            new_txns.append(
+                NewTransaction(
+                    direction=direction,
+                    amount=txn.amount,
+                    created_at=txn.created_at,
+                    comment=txn.comment,
+                )
             )
 
-    notify.info("Transaction imported successfully")
+    imported_count = txn_usecase.make_transactions(g.balance, new_txns)
+    skipped_count = len(new_txns) - imported_count
+
+    message = f"{imported_count} transactions imported successfully."
+    if skipped_count > 0:
+        message += f" {skipped_count} already imported transactions were skipped."
+    notify.info(message)
     return redirect(redirect_url)
 
 
@@ -299,7 +346,7 @@ def update_transaction_category():
 
     category = None
     if category_id is not None:
-        category = Category.get_or_none(id=category_id, account=g.authorized_account)
+        category = refdata.get_category(g.authorized_account.id, category_id)
         if category is None:
             notify.error("Category not found.")
             return redirect(redirect_url)
@@ -308,7 +355,7 @@ def update_transaction_category():
             notify.error("Wrong category direction.")
             return redirect(redirect_url)
 
-    Transaction.update(category=category).where(Transaction.id == txn.id).execute()
+    txn_usecase.update_transaction_category(txn, category)
     notify.info(f"Transaction {txn.id} updated successfully.")
 
     return redirect(redirect_url)
@@ -357,7 +404,9 @@ def delete_transaction():
         notify.error("Transaction not found.")
         return redirect(redirect_url)
 
-    remove_transaction(txn)
+    remove_transaction(
+        txn, defer_remainders=current_app.config["DEFER_BALANCE_REMAINDERS"]
+    )
     notify.info(f"Transaction {txn.id} was deleted.")
 
     return redirect(redirect_url)
@@ -375,84 +424,55 @@ def import_by_api():
             notify.error("Settings not found.")
             return redirect(redirect_url)
 
-        min_interval = settings.internal_data.get("min_interval", 0)
-        last_fetch_at = settings.internal_data.get("last_fetch_at")
-        if min_interval > 0 and last_fetch_at is not None:
-            last_fetch_at = datetime.strptime(last_fetch_at, DATETIME_FORMAT)
-            now = datetime.now()
-            if last_fetch_at > (now - timedelta(seconds=min_interval)):
-                delta = min_interval - (now - last_fetch_at).seconds
-                notify.warning(
-                    f"Provider has interval of {min_interval}s between requests."
-                    f" Try to import transactions after {delta}s."
-                )
-                return redirect(redirect_url)
+        delay = fetching.seconds_to_next_fetch(settings)
+        if delay > 0:
+            min_interval = settings.internal_data["min_interval"]
+            notify.warning(
+                f"Provider has interval of {min_interval}s between requests."
+                f" Try to import transactions after {delay}s."
+            )
+            return redirect(redirect_url)
 
-        fetcher_class = txnfetcher.get_fetcher(settings.provider)
-        if fetcher_class is None:
+        if txnfetcher.get_fetcher(settings.provider) is None:
             notify.error("Provider not found.")
             return redirect(redirect_url)
 
-        since = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        last_txn = (
-            Transaction.select()
-            .where(Transaction.balance == g.balance)
-            .order_by(Transaction.created_at.desc())
-            .first()
-        )
-        if last_txn is not None:
-            since = last_txn.created_at
-
-        since_offset = settings.internal_data.get("since_offset", 0)
-        since += timedelta(seconds=since_offset)
-
-        settings.internal_data["last_fetch_at"] = datetime.now().strftime(
-            DATETIME_FORMAT
-        )
-        settings.save()
-
-        fetcher = fetcher_class(settings.config)
-        txns = fetcher.fetch_transactions(since)
+        since = fetching.fetch_since(settings)
+        new_txns = fetching.fetch_new_transactions(settings, since)
+        if fetching.is_resumable(settings):
+            notify.info(
+                "Not all transactions were fetched due to the provider limits,"
+                " the rest will be fetched by the next import."
+            )
 
-        if len(txns) == 0:
+        if len(new_txns) == 0:
             notify.info("You don't have any new transactions.")
             return redirect(redirect_url)
 
+        token = staging.stage_transactions(g.balance, new_txns)
         split_by_days = settings.internal_data.get("split_by_days", False)
 
         return render_template(
             "balance/import-by-api.html",
             split_by_days=split_by_days,
             since=since,
-            txns=txns,
+            token=token,
+            txns=staging.get_staged_transactions(g.balance, token),
         )
 
-    redirect_url = url_for("balances.i.import_by_api", balance_id=g.balance.id)
+    redirect_url = url_for("balances.i.transactions", balance_id=g.balance.id)
 
-    data = request.form.get("data")
-    if data is None:
-        notify.error("Data not found.")
-        return redirect(redirect_url)
+    form = ImportStagedTransactionsForm(request.form)
+    utils.validate_form(form, redirect_url)
 
-    txns = json.loads(base64.b64decode(data).decode())
-    for txn in txns:
-        if txn["direction"] == FundsDirection.INCOME.value:
-            make_replenishment(
-                balance=g.balance,
-                amount=txn["amount"],
-                category=None,
-                comment=txn["comment"],
-                created_at=datetime.strptime(txn["created_at"], DATETIME_FORMAT),
-            )
-        else:
-            make_withdrawal(
-                balance=g.balance,
-                amount=txn["amount"],
-                category=None,
-                comment=txn["comment"],
-                created_at=datetime.strptime(txn["created_at"], DATETIME_FORMAT),
-            )
+    token = form.token.data
+    if not staging.has_staged_transactions(g.balance, token):
+        notify.error("Fetched transactions not found, try to import them again.")
+        return redirect(redirect_url)
 
-    notify.info("Successfully import new transactions.")
+    imported_count = staging.import_staged_transactions(
+        g.balance, token, form.txn_ids.data
+    )
+    notify.info(f"Successfully import {imported_count} new transactions.")
 
-    return redirect(url_for("balances.i.transactions", balance_id=g.balance.id))
+    return redirect(redirect_url)
@@ -1,3 +1,4 @@
+from flask import current_app
 from flask import g
 from flask import redirect
 from flask import request
@@ -49,6 +50,7 @@ def withdrawal():
         category=category,
         comment=comment,
         created_at=created_at,
+        defer_remainders=current_app.config["DEFER_BALANCE_REMAINDERS"],
     )
     notify.info("New withdrawal was created.")
 
@@ -9,6 +9,9 @@ from flask import url_for
 
 from myfunds.core.models import Balance
 from myfunds.core.models import Currency
+from myfunds.core.models import db_proxy
+from myfunds.core.usecase import refdata
+from myfunds.core.usecase.versions import bump_account_data_version
 from myfunds.web import auth
 from myfunds.web import notify
 from myfunds.web import utils
@@ -30,7 +33,8 @@ def index():
         .order_by(Balance.name)
     )
     # fmt: on
-    currencies = Currency.select().order_by(Currency.code_alpha)
+    balances = refdata.attach_currencies(balances)
+    currencies = refdata.get_currencies()
 
     return render_template(
         "balances/view.html", balances=balances, currencies=currencies
@@ -68,13 +72,15 @@ def new():
         notify.error("Balance exists already.")
         return redirect(redirect_url)
 
-    balance = Balance.create(
-        account=g.authorized_account,
-        name=name,
-        currency=currency,
-        amount=0,
-        created_at=datetime.now(),
-    )
+    with db_proxy.atomic():
+        balance = Balance.create(
+            account=g.authorized_account,
+            name=name,
+            currency=currency,
+            amount=0,
+            created_at=datetime.now(),
+        )
+        bump_account_data_version(g.authorized_account.id)
     notify.info(f"New balance {balance.name} was created.")
 
     return redirect(redirect_url)
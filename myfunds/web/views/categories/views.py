@@ -6,6 +6,10 @@ from flask import request
 from flask import url_for
 
 from myfunds.core.models import Category
+from myfunds.core.models import db_proxy
+from myfunds.core.usecase import aggregates
+from myfunds.core.usecase import refdata
+from myfunds.core.usecase.versions import bump_account_data_version
 from myfunds.web import auth
 from myfunds.web import notify
 from myfunds.web import utils
@@ -61,12 +65,15 @@ def new():
     name = form.name.data
     color_sign = form.color_sign.data
 
-    category = Category.create(
-        account=g.authorized_account,
-        direction=direction,
-        name=name,
-        color_sign=color_sign,
-    )
+    with db_proxy.atomic():
+        category = Category.create(
+            account=g.authorized_account,
+            direction=direction,
+            name=name,
+            color_sign=color_sign,
+        )
+        bump_account_data_version(g.authorized_account.id)
+        refdata.invalidate(refdata.CATEGORIES)
     notify.info(f"New category {category.name} was created.")
 
     return redirect(redirect_url)
@@ -95,7 +102,10 @@ def edit():
     if color_sign is not None and color_sign != category.color_sign:
         category.color_sign = color_sign
 
-    category.save()
+    with db_proxy.atomic():
+        category.save()
+        bump_account_data_version(g.authorized_account.id)
+        refdata.invalidate(refdata.CATEGORIES)
     notify.info(f"Category {category.name} was updated.")
 
     return redirect(redirect_url)
@@ -116,7 +126,11 @@ def delete():
         notify.error("Category not found.")
         return redirect(redirect_url)
 
-    category.delete_instance()
+    with db_proxy.atomic():
+        aggregates.detach_category(category)
+        category.delete_instance()
+        bump_account_data_version(g.authorized_account.id)
+        refdata.invalidate(refdata.CATEGORIES)
     notify.info(f"Category {category.name} was deleted.")
 
     return redirect(redirect_url)
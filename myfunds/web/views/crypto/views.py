@@ -1,17 +1,17 @@
-import csv
-import io
 from datetime import datetime
 
 import peewee as pw
 from flask import Blueprint
+from flask import current_app
 from flask import g
-from flask import make_response
 from flask import redirect
 from flask import render_template
 from flask import request
 from flask import url_for
 from wtforms import Form
 from wtforms import IntegerField
+from wtforms import StringField
+from wtforms import ValidationError
 from wtforms import validators as vals
 
 from myfunds.core.constants import CryptoDirection
@@ -20,15 +20,20 @@ from myfunds.core.models import CryptoBalance
 from myfunds.core.models import CryptoCurrency
 from myfunds.core.models import CryptoTransaction
 from myfunds.core.models import db_proxy
-from myfunds.modules import cmc
+from myfunds.core.usecase import refdata
+from myfunds.core.usecase.prices import get_crypto_prices
+from myfunds.core.usecase.versions import bump_account_data_version
 from myfunds.web import ajax
 from myfunds.web import auth
+from myfunds.web import export
 from myfunds.web import notify
+from myfunds.web import pagination
 from myfunds.web import utils
 from myfunds.web.constants import DATETIME_FORMAT
 from myfunds.web.forms import AddCryptoBalanceForm
 from myfunds.web.forms import AddCyptoTransactionForm
 from myfunds.web.forms import DeleteCryptoBalanceForm
+from myfunds.web.forms import ExportForm
 from myfunds.web.forms import UpdateCryptoBalanceQuantityForm
 
 
@@ -43,9 +48,9 @@ bp = Blueprint("crypto", __name__, template_folder="templates")
 @bp.route("/crypto")
 @auth.login_required
 def index():
-    currencies = CryptoCurrency.select().order_by(CryptoCurrency.symbol)
+    currencies = refdata.get_crypto_currencies()
 
-    balances = (
+    balances = refdata.attach_currencies(
         CryptoBalance.select()
         .join(CryptoCurrency)
         .where(CryptoBalance.account == g.authorized_account)
@@ -103,17 +108,19 @@ def new_balance():
     name = form.name.data
     currency_id = form.currency_id.data
 
-    currency = CryptoCurrency.get_or_none(id=currency_id)
+    currency = refdata.get_crypto_currency(currency_id)
     if currency is None:
         notify.error("Currency not found.")
         return redirect(redirect_url)
 
-    balance = CryptoBalance.create(
-        account=g.authorized_account,
-        currency=currency,
-        name=name,
-        quantity=0,
-    )
+    with db_proxy.atomic():
+        balance = CryptoBalance.create(
+            account=g.authorized_account,
+            currency=currency,
+            name=name,
+            quantity=0,
+        )
+        bump_account_data_version(g.authorized_account.id)
     notify.info(f"New balance '{balance.name}' was created.")
 
     return redirect(redirect_url)
@@ -134,7 +141,9 @@ def delete_balance():
         notify.error("Balance not found.")
         return redirect(redirect_url)
 
-    balance.delete_instance()
+    with db_proxy.atomic():
+        balance.delete_instance()
+        bump_account_data_version(g.authorized_account.id)
     notify.info(f"Balance '{balance.name}' was deleted.")
 
     return redirect(redirect_url)
@@ -187,6 +196,7 @@ def update_quantity():
             created_at=datetime.now(),
         )
         balance.save()
+        bump_account_data_version(g.authorized_account.id)
 
     notify.info("Balance quantity was updated.")
 
@@ -212,7 +222,7 @@ def invest():
 
     amount = round(float(quantity) * float(price), USD_PRECISION)
 
-    currency = CryptoCurrency.get_or_none(id=currency_id)
+    currency = refdata.get_crypto_currency(currency_id)
     if currency is None:
         notify.error("Currency not found.")
         return redirect(redirect_url)
@@ -237,6 +247,7 @@ def invest():
             ),
             created_at=creation_time,
         )
+        bump_account_data_version(g.authorized_account.id)
 
     notify.info("New investment was added.")
 
@@ -262,7 +273,7 @@ def fix_profit():
 
     amount = round(float(quantity) * float(price), USD_PRECISION)
 
-    currency = CryptoCurrency.get_or_none(id=currency_id)
+    currency = refdata.get_crypto_currency(currency_id)
     if currency is None:
         notify.error("Currency not found.")
         return redirect(redirect_url)
@@ -287,6 +298,7 @@ def fix_profit():
             ),
             created_at=creation_time,
         )
+        bump_account_data_version(g.authorized_account.id)
 
     notify.info("New profit fix was added.")
 
@@ -297,14 +309,17 @@ def fix_profit():
 @ajax.ajax_endpoint
 @auth.login_required
 def ajax_balances_values():
-    balances = (
-        CryptoBalance.select()
-        .join(CryptoCurrency)
-        .where(CryptoBalance.account == g.authorized_account)
+    balances = refdata.attach_currencies(
+        CryptoBalance.select().where(CryptoBalance.account == g.authorized_account)
     )
     currencies_ids = [i.currency.cmc_id for i in balances]
 
-    prices = cmc.fetch_prices(currencies_ids, USD_CODE)
+    prices = get_crypto_prices(
+        currencies_ids,
+        USD_CODE,
+        ttl=current_app.config["CRYPTO_PRICES_TTL"],
+        max_stale=current_app.config["CRYPTO_PRICES_MAX_STALE"],
+    )
 
     data = {}
     for b in balances:
@@ -321,9 +336,15 @@ def ajax_balances_values():
 
 
 class ActionsFilterForm(Form):
-    offset = IntegerField(validators=[vals.Optional()])
+    cursor = StringField(validators=[vals.Optional()])
     limit = IntegerField(validators=[vals.Optional()])
 
+    def validate_cursor(form, field) -> None:
+        try:
+            pagination.decode_cursor(field.data)
+        except ValueError:
+            raise ValidationError("Invalid cursor.")
+
 
 @bp.route("/crypto/actions")
 @auth.login_required
@@ -331,51 +352,55 @@ def actions():
     filter_form = ActionsFilterForm(request.args)
     utils.validate_form(filter_form, url_for("crypto.actions"), error_notify=None)
 
-    offset = filter_form.offset.data or 0
+    cursor = (
+        pagination.decode_cursor(filter_form.cursor.data)
+        if filter_form.cursor.data
+        else None
+    )
     limit = filter_form.limit.data or 10
 
-    filters = {"offset": offset, "limit": limit}
+    filters = {"limit": limit}
 
-    limit_plus_one = limit + 1
-    query = (
-        CryptoActionLog.select()
-        .where(CryptoActionLog.account == g.authorized_account)
-        .order_by(CryptoActionLog.created_at.desc())
-        .offset(offset)
-        .limit(limit_plus_one)
+    query = CryptoActionLog.select().where(
+        CryptoActionLog.account == g.authorized_account
     )
-
-    actions = list(query)[:limit]
-
-    has_prev = offset > 0
-    has_next = len(query) == limit_plus_one
+    page = pagination.paginate(query, cursor, limit)
 
     return render_template(
         "crypto/actions.html",
         filters=filters,
-        actions=actions,
-        has_prev=has_prev,
-        has_next=has_next,
+        actions=page.items,
+        prev_cursor=page.prev_cursor,
+        next_cursor=page.next_cursor,
     )
 
 
 @bp.route("/crypto/actions/export")
 @auth.login_required
 def export_actions():
+    export_form = ExportForm(request.args)
+    utils.validate_form(export_form, url_for("crypto.actions"))
+
+    # fmt: off
     actions = (
-        CryptoActionLog.select()
+        CryptoActionLog
+        .select(CryptoActionLog.created_at, CryptoActionLog.message)
         .where(CryptoActionLog.account == g.authorized_account)
         .order_by(CryptoActionLog.created_at.desc())
+        .tuples()
+        .iterator()
     )
+    # fmt: on
 
-    buffer = io.StringIO()
-    csvwriter = csv.writer(buffer, delimiter=";", quoting=csv.QUOTE_ALL)
-    csvwriter.writerow(["Time", "Message"])
-
-    for i in actions.iterator():
-        csvwriter.writerow([i.created_at.strftime(DATETIME_FORMAT), i.message])
+    rows = (
+        (created_at.strftime(DATETIME_FORMAT), message)
+        for created_at, message in actions
+    )
 
-    res = make_response(buffer.getvalue())
-    res.headers["Content-Disposition"] = "attachment; filename=actions.csv"
-    res.headers["Content-type"] = "text/csv"
-    return res
+    return export.make_response(
+        "actions",
+        ["Time", "Message"],
+        rows,
+        fmt=(export_form.format.data or export.CSV),
+        compress=export_form.gzip.data,
+    )
@@ -6,6 +6,8 @@ from flask import request
 from flask import url_for
 
 from myfunds.core.models import CryptoCurrency
+from myfunds.core.models import db_proxy
+from myfunds.core.usecase import refdata
 from myfunds.modules import cmc
 from myfunds.web import auth
 from myfunds.web import notify
@@ -21,7 +23,7 @@ bp = Blueprint("crypto_currencies", __name__, template_folder="templates")
 @auth.login_required
 @auth.superuser_required
 def index():
-    currencies = CryptoCurrency.select().order_by(CryptoCurrency.name)
+    currencies = sorted(refdata.get_crypto_currencies(), key=lambda i: i.name)
     return render_template("crypto_currencies/view.html", currencies=currencies)
 
 
@@ -52,12 +54,14 @@ def new():
         notify.error("Currency exists already.")
         return redirect(redirect_url)
 
-    currency = CryptoCurrency.create(
-        symbol=crypto_currency.symbol,
-        name=crypto_currency.name,
-        cmc_id=crypto_currency.id,
-        icon=crypto_currency.img,
-    )
+    with db_proxy.atomic():
+        currency = CryptoCurrency.create(
+            symbol=crypto_currency.symbol,
+            name=crypto_currency.name,
+            cmc_id=crypto_currency.id,
+            icon=crypto_currency.img,
+        )
+        refdata.invalidate(refdata.CRYPTO_CURRENCIES)
     notify.info(f"New crypto currency {currency.symbol} was created.")
 
     return redirect(redirect_url)
@@ -79,7 +83,9 @@ def delete():
         notify.error("Currency not found.")
         return redirect(redirect_url)
 
-    currency.delete_instance()
+    with db_proxy.atomic():
+        currency.delete_instance()
+        refdata.invalidate(refdata.CRYPTO_CURRENCIES)
     notify.info(f"Currency {currency.symbol} was deleted.")
 
     return redirect(redirect_url)
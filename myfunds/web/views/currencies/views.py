@@ -6,6 +6,8 @@ from flask import url_for
 
 from myfunds.core.models import Balance
 from myfunds.core.models import Currency
+from myfunds.core.models import db_proxy
+from myfunds.core.usecase import refdata
 from myfunds.web import auth
 from myfunds.web import notify
 from myfunds.web import utils
@@ -20,7 +22,7 @@ bp = Blueprint("currencies", __name__, template_folder="templates")
 @auth.login_required
 @auth.superuser_required
 def index():
-    currencies = Currency.select().order_by(Currency.code_alpha)
+    currencies = refdata.get_currencies()
     return render_template("currencies/view.html", currencies=currencies)
 
 
@@ -36,7 +38,9 @@ def new():
     code_alpha = form.code_alpha.data.upper()
     precision = form.precision.data
 
-    currency = Currency.create(code_alpha=code_alpha, precision=precision)
+    with db_proxy.atomic():
+        currency = Currency.create(code_alpha=code_alpha, precision=precision)
+        refdata.invalidate(refdata.CURRENCIES)
     notify.info(f"New currency {currency.code_alpha} was created.")
 
     return redirect(redirect_url)
@@ -68,7 +72,9 @@ def delete():
         )
         return redirect(redirect_url)
 
-    currency.delete_instance()
+    with db_proxy.atomic():
+        currency.delete_instance()
+        refdata.invalidate(refdata.CURRENCIES)
     notify.info(f"Currency {currency.code_alpha} was deleted.")
 
     return redirect(redirect_url)
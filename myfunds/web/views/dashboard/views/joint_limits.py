@@ -1,10 +1,8 @@
 from calendar import monthrange
 from datetime import date
-from datetime import datetime
 from typing import List
 from typing import Tuple
 
-import peewee as pw
 from flask import current_app
 from flask import g
 from flask import render_template
@@ -15,14 +13,9 @@ from wtforms import IntegerField
 from wtforms import ValidationError
 from wtforms import validators as vals
 
-from myfunds.core.models import Balance
-from myfunds.core.models import Category
-from myfunds.core.models import JointLimit
-from myfunds.core.models import JointLimitParticipant
-from myfunds.core.models import Transaction
+from myfunds.core.statistics import calculate_joint_limits_stats
 from myfunds.web import auth
 from myfunds.web import utils
-from myfunds.web.constants import FundsDirection
 from myfunds.web.views.dashboard.views import bp
 
 
@@ -38,97 +31,14 @@ def make_date_range_by_year_and_month(year: int, month: int) -> Tuple[date, date
     return (date(year, month, 1), date(until_year, until_month, 1))
 
 
-def build_joint_limits_info(stats_range: Tuple[datetime, datetime]) -> List[dict]:
-    categories_ids_query = Category.select(Category.id).where(
-        (Category.account == g.authorized_account)
-        & (Category.direction == FundsDirection.EXPENSE.value)
-    )
-    categories_ids = [i.id for i in categories_ids_query]
-
-    limits = (
-        JointLimit.select()
-        .join(JointLimitParticipant)
-        .where(JointLimitParticipant.category_id.in_(categories_ids))
-        .group_by(JointLimit.id)
-    )
-
-    result = []
-
-    for limit in limits:
-        data = {}
-        data["limit"] = limit
-
-        currency = limit.currency
-        data["currency"] = currency
-
-        participants = JointLimitParticipant.select().where(
-            JointLimitParticipant.limit == limit
-        )
-
-        data["participants"] = []
-
-        for p in participants:
-            participant_data = {}
-
-            category = p.category
-            account = category.account
-
-            participant_data["account"] = account
-            participant_data["category"] = category
-
-            # fmt: off
-            expense_by_balances = (
-                Balance
-                .select(
-                    Balance,
-                    pw.fn.SUM(Transaction.amount).alias("expense_amount"),
-                )
-                .join(Transaction, pw.JOIN.LEFT_OUTER)
-                .where(
-                    (Balance.account == account)
-                    & (Balance.currency == currency)
-                    & (Transaction.category == category)
-                    & (Transaction.created_at.between(*stats_range))
-                )
-                .group_by(Balance.id)
-            )
-            # fmt: on
-
-            if not expense_by_balances:
-                continue
-
-            participant_data["balances"] = list(expense_by_balances)
-            participant_data["balances_count"] = len(participant_data["balances"])
-            participant_data["total_expense"] = sum(
-                [i.expense_amount for i in participant_data["balances"]] + [0]
-            )
-
-            data["participants"].append(participant_data)
-
-        if not data["participants"]:
-            continue
-
-        data["total_expense"] = sum([i["total_expense"] for i in data["participants"]])
-
-        total_expense_pct = round((data["total_expense"] / limit.amount) * 100, 2)
-        if total_expense_pct > 100:
-            total_expense_pct = round(100 - total_expense_pct, 2)
-
-        if 0 <= total_expense_pct < 60:
-            css_text_color = "text-success"
-        elif 60 <= total_expense_pct < 80:
-            css_text_color = "text-warning"
-        elif 80 <= total_expense_pct or total_expense_pct < 0:
-            css_text_color = "text-danger"
-        else:
-            css_text_color = ""
-
-        data["total_expense_pct"] = total_expense_pct
-        data["total_expense_pct_color"] = css_text_color
-
-        result.append(data)
-
-    return result
+def make_expense_pct_color(total_expense_pct: float) -> str:
+    if 0 <= total_expense_pct < 60:
+        return "text-success"
+    elif 60 <= total_expense_pct < 80:
+        return "text-warning"
+    elif 80 <= total_expense_pct or total_expense_pct < 0:
+        return "text-danger"
+    return ""
 
 
 class JointLimitsFilterForm(Form):
@@ -179,7 +89,11 @@ def joint_limits():
         current_day = f"{today.day} ({today.strftime('%A')}, {month_completed_by}%)"
 
     stats_range = make_date_range_by_year_and_month(year, month)
-    joint_limits_info = build_joint_limits_info(stats_range)
+    joint_limits_info = []
+    for i in calculate_joint_limits_stats(g.authorized_account, stats_range):
+        info = i._asdict()
+        info["total_expense_pct_color"] = make_expense_pct_color(i.total_expense_pct)
+        joint_limits_info.append(info)
 
     return render_template(
         "joint-limits.html",
@@ -1,5 +1,7 @@
 from datetime import datetime
+from functools import partial
 
+from flask import current_app
 from flask import g
 from flask import render_template
 
@@ -7,8 +9,12 @@ from myfunds.core.models import Balance
 from myfunds.core.models import CryptoBalance
 from myfunds.core.models import CryptoCurrency
 from myfunds.core.models import Currency
-from myfunds.modules import cmc
-from myfunds.modules import convertmymoney
+from myfunds.core.models import db_proxy
+from myfunds.core.usecase import refdata
+from myfunds.core.usecase.prices import ExchangeRates
+from myfunds.core.usecase.prices import get_crypto_prices
+from myfunds.core.usecase.prices import get_exchange_rates
+from myfunds.modules.concurrency import run_concurrently
 from myfunds.web import auth
 from myfunds.web import utils
 from myfunds.web.constants import DATETIME_FORMAT
@@ -20,14 +26,14 @@ from myfunds.web.views.dashboard.views import bp
 def total_budget():
     common_balances = []
 
-    balances = (
+    balances = refdata.attach_currencies(
         Balance.select()
         .join(Currency)
         .where(Balance.account == g.authorized_account)
         .order_by(Balance.name)
     )
 
-    crypto_balances = (
+    crypto_balances = refdata.attach_currencies(
         CryptoBalance.select()
         .join(CryptoCurrency)
         .where(CryptoBalance.account == g.authorized_account)
@@ -38,11 +44,30 @@ def total_budget():
         data = {"common_balances": common_balances, "total_amount": None}
         return render_template("total-budget.html", data=data)
 
-    try:
-        exchange_rates = convertmymoney.fetch_exchange_rates()
-    except Exception as e:
-        g.logger.warning(f"Unexpected error while fetching exchange rates ({repr(e)}).")
-        exchange_rates = {}
+    currencies_ids = [b.currency.cmc_id for b in crypto_balances]
+
+    # The lookups are independent, a failed or late one leaves its amounts
+    # unconverted.
+    results = run_concurrently(
+        {
+            "exchange_rates": partial(
+                get_exchange_rates,
+                ttl=current_app.config["EXCHANGE_RATES_TTL"],
+                max_stale=current_app.config["EXCHANGE_RATES_MAX_STALE"],
+            ),
+            "prices": partial(
+                get_crypto_prices,
+                currencies_ids,
+                ttl=current_app.config["CRYPTO_PRICES_TTL"],
+                max_stale=current_app.config["CRYPTO_PRICES_MAX_STALE"],
+            ),
+        },
+        timeout=current_app.config["LOOKUPS_TIMEOUT"],
+        # The pool threads keep their connections otherwise.
+        teardown=db_proxy.close,
+    )
+    exchange_rates = results.get("exchange_rates", ExchangeRates({}, None))
+    prices = results.get("prices", {})
 
     for b in balances:
         item = {}
@@ -50,7 +75,7 @@ def total_budget():
         item["currency_code"] = b.currency.code_alpha
         item["amount"] = float(utils.make_hrf_amount(b.amount, b.currency.precision))
 
-        rate = exchange_rates.get(b.currency.code_alpha)
+        rate = exchange_rates.rates.get(b.currency.code_alpha)
         if rate is not None:
             item["converted_amount"] = round(item["amount"] / rate, 2)
         else:
@@ -58,14 +83,6 @@ def total_budget():
 
         common_balances.append(item)
 
-    currencies_ids = [b.currency.cmc_id for b in crypto_balances]
-
-    try:
-        prices = cmc.fetch_prices(currencies_ids)
-    except cmc.CMCError as e:
-        g.logger.warning(repr(e))
-        prices = {}
-
     for b in crypto_balances:
         item = {}
         item["balance_name"] = b.name
@@ -104,6 +121,16 @@ def total_budget():
     total_amount = "\n+ ".join(total_amount)
 
     current_time = datetime.now().strftime(DATETIME_FORMAT)
+    exchange_rates_time = (
+        exchange_rates.fetched_at.strftime(DATETIME_FORMAT)
+        if exchange_rates.fetched_at is not None
+        else None
+    )
     data = {"common_balances": common_balances, "total_amount": total_amount}
 
-    return render_template("total-budget.html", current_time=current_time, data=data)
+    return render_template(
+        "total-budget.html",
+        current_time=current_time,
+        exchange_rates_time=exchange_rates_time,
+        data=data,
+    )
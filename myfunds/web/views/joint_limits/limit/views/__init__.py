@@ -5,6 +5,7 @@ from flask import abort
 from flask import g
 
 from myfunds.core.models import JointLimit
+from myfunds.core.usecase import refdata
 from myfunds.web import utils
 
 
@@ -24,7 +25,7 @@ def verify_limit(f):
             abort(404)
 
         g.limit = limit
-        g.currency = limit.currency
+        g.currency = refdata.get_currency(limit.currency_id)
         g.amount_placeholder = utils.make_amount_placeholder(g.currency.precision)
         g.amount_pattern = utils.make_amount_pattern(g.currency.precision)
 
@@ -10,6 +10,7 @@ from myfunds.core.models import Category
 from myfunds.core.models import Currency
 from myfunds.core.models import JointLimit
 from myfunds.core.models import JointLimitParticipant
+from myfunds.core.usecase import refdata
 from myfunds.web import auth
 from myfunds.web import notify
 from myfunds.web import utils
@@ -25,7 +26,7 @@ bp = Blueprint("joint_limits", __name__, template_folder="templates")
 @auth.superuser_required
 def index():
     # fmt: off
-    currencies = Currency.select().order_by(Currency.code_alpha)
+    currencies = refdata.get_currencies()
 
     participants = (
         JointLimit
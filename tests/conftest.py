@@ -1,11 +1,17 @@
+import importlib.util
 import secrets
 from contextlib import contextmanager
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from types import ModuleType
 from typing import Optional
 
 import peewee as pw
 import pytest
 
+from myfunds import database
+from myfunds.config import Config
 from myfunds.core.constants import FundsDirection
 from myfunds.core.models import Account
 from myfunds.core.models import Balance
@@ -14,6 +20,60 @@ from myfunds.core.models import Currency
 from myfunds.core.models import Transaction
 from myfunds.core.models import db_proxy
 from myfunds.core.models import get_models
+from myfunds.core.usecase import refdata
+from myfunds.web import create_app
+
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / "migrations"
+
+
+@lru_cache()
+def load_migration(name: str) -> ModuleType:
+    spec = importlib.util.spec_from_file_location(name, MIGRATIONS_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def create_tables(db: pw.Database) -> None:
+    """Creates the models tables with the search triggers of the migration."""
+    db.create_tables(get_models())
+    for name, trigger in load_migration("014_auto").TRIGGERS:
+        db.execute_sql(f'CREATE TRIGGER "{name}" {trigger}')
+
+
+@pytest.fixture
+def config():
+    return Config(
+        SUPERUSER="superuser",
+        DATABASE_PATH=":memory:",
+        PBKDF2_PWD_HASHER_HASH_FUNC="sha256",
+        PBKDF2_PWD_HASHER_ITERATIONS=1,
+        PBKDF2_PWD_HASHER_SALT_LENGTH=8,
+        MAX_YEARS_OF_STATISTICS=5,
+        DEFER_BALANCE_REMAINDERS=False,
+        LOGGING_CONFIG={},
+        SLOW_QUERY_THRESHOLD=0.1,
+        WEB_SECRET_KEY="secret_key",
+        WEB_RUN_ON_HOST="localhost",
+        WEB_RUN_ON_PORT=8080,
+        TGBOT_TOKEN=None,
+        TGBOT_UPDATES_LIMIT=10,
+        TGBOT_UPDATES_TIMEOUT=20,
+        TGBOT_WORKERS=2,
+        TGBOT_QUEUE_SIZE=10,
+        TGBOT_CHAT_QUEUE_SIZE=5,
+        TGBOT_WEBHOOK_URL=None,
+        TGBOT_WEBHOOK_SECRET=None,
+        TGBOT_WEBHOOK_HOST="localhost",
+        TGBOT_WEBHOOK_PORT=8081,
+        AUTOFETCH_INTERVAL=600,
+        CRYPTO_PRICES_TTL=60,
+        CRYPTO_PRICES_MAX_STALE=3600,
+        EXCHANGE_RATES_TTL=3600,
+        EXCHANGE_RATES_MAX_STALE=86400,
+        LOOKUPS_TIMEOUT=5,
+    )
 
 
 @pytest.fixture
@@ -137,17 +197,32 @@ def models_db_init_context():
     def _models_db_init_context(db: pw.Database):
         origin_db = db_proxy.obj
         db_proxy.initialize(db)
+        refdata.clear()
         try:
             yield
         finally:
             db_proxy.initialize(origin_db)
+            refdata.clear()
 
     return _models_db_init_context
 
 
 @pytest.fixture
 def with_memory_database(models_db_init_context):
-    db = pw.SqliteDatabase(":memory:")
+    db = database.Database(":memory:", slow_query_threshold=None)
     with models_db_init_context(db):
-        db.create_tables(get_models())
+        create_tables(db)
         yield
+
+
+@pytest.fixture
+def web_client(config):
+    app = create_app(config)
+
+    def _web_client(account):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["aid"] = account.id
+        return client
+
+    return _web_client
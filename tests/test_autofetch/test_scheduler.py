@@ -0,0 +1,52 @@
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+
+from myfunds.autofetch import scheduler
+from myfunds.core.models import Transaction
+from myfunds.core.models import TransactionImportSettings
+from myfunds.modules import txnfetcher
+from myfunds.modules.txnfetcher.base import BaseTxnFetcher
+from myfunds.modules.txnfetcher.base import Withdrawal
+
+
+class FakeTxnFetcher(BaseTxnFetcher):
+    provider_id = "fake"
+    require_config = False
+
+    def _fetch_transactions(self, since):
+        if self.config.get("fail"):
+            raise RuntimeError("Provider is unavailable.")
+
+        now = datetime.now().replace(microsecond=0)
+        return [Withdrawal(100, now - timedelta(minutes=i)) for i in range(3)]
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_run_pending(config, make_balance, monkeypatch):
+    monkeypatch.setattr(txnfetcher, "get_fetcher", lambda i: FakeTxnFetcher)
+    monkeypatch.setattr(scheduler, "MAX_SLEEP", 3600)
+    balance = make_balance()
+    failing_balance = make_balance()
+    TransactionImportSettings.create(
+        balance=balance, provider="fake", config={}, internal_data={}
+    )
+    TransactionImportSettings.create(
+        balance=failing_balance,
+        provider="fake",
+        config={"fail": True},
+        internal_data={"min_interval": 60},
+    )
+
+    s = scheduler.Scheduler(config)
+
+    assert s.run_pending() == 600
+    assert Transaction.select().where(Transaction.balance == balance).count() == 3
+    assert (
+        Transaction.select().where(Transaction.balance == failing_balance).count() == 0
+    )
+
+    # Both balances were fetched just now and aren't due yet.
+    assert 590 < s.run_pending() <= 600
+    assert Transaction.select().count() == 3
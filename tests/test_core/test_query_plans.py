@@ -0,0 +1,180 @@
+import logging
+from datetime import date
+from datetime import datetime
+
+import pytest
+
+from myfunds.core.constants import FundsDirection
+from myfunds.core.models import db_proxy
+from myfunds.core.statistics import calculate_balance_stats
+from myfunds.core.usecase import refdata
+from myfunds.core.usecase import transactions as txn_usecase
+from myfunds.tgbot.handlers.crypto_balances import build_report
+from myfunds.web import pagination
+from myfunds.web.constants import DATETIME_FORMAT
+
+
+STATS_RANGE = (date(2021, 3, 1), date(2021, 4, 1))
+
+
+@pytest.fixture
+def query_plans(caplog):
+    def _query_plans(func, *args, **kwargs):
+        caplog.clear()
+        with caplog.at_level(logging.DEBUG, logger="peewee"):
+            func(*args, **kwargs)
+
+        plans = []
+        for record in caplog.records:
+            if record.name != "peewee":
+                continue
+            sql, params = record.msg
+            if not sql.startswith(("SELECT", "UPDATE", "DELETE")):
+                continue
+            cursor = db_proxy.execute_sql(f"EXPLAIN QUERY PLAN {sql}", params)
+            plans.append((sql, [i[-1] for i in cursor.fetchall()]))
+
+        return plans
+
+    return _query_plans
+
+
+def assert_index_used(plans, table, *indexes):
+    plans = [
+        plan
+        for sql, plan in plans
+        if f'"{table}"' in sql and not all("PRIMARY KEY" in i for i in plan)
+    ]
+    assert plans
+    for plan in plans:
+        assert not any(i.startswith("SCAN") and "INDEX" not in i for i in plan), plan
+        assert any(index in i for i in plan for index in indexes), plan
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_transaction_usecases(query_plans, make_balance):
+    balance = make_balance()
+    txn_usecase.make_replenishment(
+        balance=balance, amount=100, created_at=datetime(2021, 3, 10)
+    )
+
+    plans = query_plans(
+        txn_usecase.make_withdrawal,
+        balance=balance,
+        amount=50,
+        created_at=datetime(2021, 3, 5),
+    )
+    assert_index_used(
+        plans,
+        "transactions",
+        "transaction_balance_id_created_at",
+        "transaction_balance_id_fingerprint",
+    )
+
+    txn = txn_usecase.make_withdrawal(
+        balance=balance, amount=10, created_at=datetime(2021, 3, 7)
+    )
+    plans = query_plans(txn_usecase.remove_transaction, txn)
+    assert_index_used(plans, "transactions", "transaction_balance_id_created_at")
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_balance_stats(query_plans, make_balance, make_expense_category):
+    balance = make_balance()
+    make_expense_category(account=balance.account)
+
+    plans = query_plans(calculate_balance_stats, balance, STATS_RANGE)
+    assert_index_used(
+        plans,
+        "balance_aggregates",
+        "balanceaggregate_balance_id_month_direction_category_id",
+    )
+    assert_index_used(
+        plans, "balance_checkpoints", "balancecheckpoint_balance_id_month"
+    )
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_transactions_page(query_plans, web_client, make_balance):
+    balance = make_balance()
+    txn = txn_usecase.make_replenishment(
+        balance=balance, amount=100, created_at=datetime(2021, 3, 10)
+    )
+    client = web_client(balance.account)
+
+    created_at_range_hrf = " - ".join(i.strftime(DATETIME_FORMAT) for i in STATS_RANGE)
+    for direction in [pagination.NEXT, pagination.PREV]:
+        plans = query_plans(
+            client.get,
+            f"/balances/{balance.id}/transactions",
+            query_string={
+                "created_at_range_hrf": created_at_range_hrf,
+                "cursor": pagination.encode_cursor(direction, txn),
+            },
+        )
+        assert_index_used(plans, "transactions", "transaction_balance_id_created_at")
+        assert not any(
+            "TEMP B-TREE" in i
+            for sql, plan in plans
+            if '"transactions"' in sql
+            for i in plan
+        )
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_statistics_page(query_plans, web_client, make_balance, make_expense_category):
+    balance = make_balance()
+    make_expense_category(account=balance.account)
+    client = web_client(balance.account)
+
+    plans = query_plans(
+        client.get,
+        f"/balances/{balance.id}/statistics",
+        query_string={"year": STATS_RANGE[0].year, "month": STATS_RANGE[0].month},
+    )
+    assert_index_used(
+        plans,
+        "balance_aggregates",
+        "balanceaggregate_balance_id_month_direction_category_id",
+    )
+    assert_index_used(
+        plans, "balance_checkpoints", "balancecheckpoint_balance_id_month"
+    )
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_categories_list(query_plans, make_account):
+    account = make_account()
+
+    plans = query_plans(refdata.get_categories, account.id, FundsDirection.EXPENSE)
+    assert_index_used(plans, "categories", "category_account_id_direction")
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_crypto_totals(query_plans, web_client, config, make_account):
+    account = make_account()
+    client = web_client(account)
+
+    for func, args in [(client.get, ["/crypto"]), (build_report, [account, config])]:
+        plans = query_plans(func, *args)
+        assert any("SUM" in sql for sql, plan in plans if "crypto_transactions" in sql)
+        assert_index_used(
+            plans, "crypto_transactions", "cryptotransaction_account_id_direction"
+        )
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_crypto_actions_page(query_plans, web_client, make_account):
+    account = make_account()
+    client = web_client(account)
+
+    plans = query_plans(client.get, "/crypto/actions")
+    assert_index_used(
+        plans, "crypto_action_logs", "cryptoactionlog_account_id_created_at"
+    )
+    assert not any(
+        "TEMP B-TREE" in i
+        for sql, plan in plans
+        if '"crypto_action_logs"' in sql
+        for i in plan
+    )
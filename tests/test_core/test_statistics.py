@@ -0,0 +1,183 @@
+import logging
+from datetime import date
+from datetime import datetime
+
+import pytest
+
+from myfunds.core import models
+from myfunds.core.constants import FundsDirection
+from myfunds.core.statistics import CategoryStats
+from myfunds.core.statistics import JointLimitBalanceStats
+from myfunds.core.statistics import calculate_balance_stats
+from myfunds.core.statistics import calculate_joint_limits_stats
+from myfunds.core.usecase import transactions as txn_usecase
+from myfunds.core.usecase.transactions import NewTransaction
+
+
+STATS_RANGE = (date(2021, 2, 1), date(2021, 3, 1))
+
+
+def make_history(balance, food, rent):
+    txn_usecase.make_transactions(
+        balance,
+        [
+            NewTransaction(FundsDirection.INCOME, 10000, datetime(2021, 1, 5)),
+            NewTransaction(FundsDirection.EXPENSE, 100, datetime(2021, 1, 7), food),
+            NewTransaction(FundsDirection.INCOME, 700, datetime(2021, 2, 1)),
+            NewTransaction(FundsDirection.INCOME, 300, datetime(2021, 2, 15)),
+            NewTransaction(FundsDirection.EXPENSE, 2000, datetime(2021, 2, 2), rent),
+            NewTransaction(FundsDirection.EXPENSE, 40, datetime(2021, 2, 3), food),
+            NewTransaction(FundsDirection.EXPENSE, 60, datetime(2021, 2, 28), food),
+            NewTransaction(FundsDirection.EXPENSE, 25, datetime(2021, 2, 10)),
+            NewTransaction(FundsDirection.EXPENSE, 500, datetime(2021, 3, 1), rent),
+        ],
+    )
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_balance_stats(make_balance, make_expense_category):
+    balance = make_balance()
+    other_balance = make_balance(account=balance.account)
+    food = make_expense_category(account=balance.account, name="food")
+    rent = make_expense_category(account=balance.account, name="rent")
+    models.BalanceLimit.create(balance=balance, category=food, amount=200)
+
+    make_history(balance, food, rent)
+    make_history(other_balance, food, rent)
+
+    stats = calculate_balance_stats(balance, STATS_RANGE)
+    assert stats.start_balance == 9900
+    assert stats.end_balance == 8775
+    assert stats.income == 1000
+    assert stats.expense == 2125
+    assert stats.expense_categories == [
+        CategoryStats(rent.id, "rent", rent.color_sign, 2000, None),
+        CategoryStats(food.id, "food", food.color_sign, 100, 200),
+        CategoryStats(None, None, None, 25, None),
+    ]
+    assert stats.expense_pct == 21.46
+    assert stats.savings == 7775
+    assert stats.savings_pct == 78.54
+    assert stats.category_expense_pct(stats.expense_categories[0]) == 94.12
+
+    stats = calculate_balance_stats(balance, STATS_RANGE, {rent.id, None})
+    assert stats.expense == 100
+    assert len(stats.expense_categories) == 3
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_empty_balance_stats(make_balance):
+    stats = calculate_balance_stats(make_balance(), STATS_RANGE)
+    assert stats.start_balance is None
+    assert stats.end_balance is None
+    assert stats.income is None
+    assert stats.expense is None
+    assert stats.expense_categories == []
+    assert stats.expense_pct is None
+    assert stats.savings is None
+    assert stats.savings_pct is None
+
+
+@pytest.mark.freeze_time("2021-02-20 12:00:00")
+@pytest.mark.usefixtures("with_memory_database")
+def test_balance_stats_of_current_month(make_balance, make_expense_category):
+    balance = make_balance()
+    food = make_expense_category(account=balance.account, name="food")
+    rent = make_expense_category(account=balance.account, name="rent")
+    make_history(balance, food, rent)
+
+    stats = calculate_balance_stats(balance, STATS_RANGE)
+    assert stats.start_balance == 9900
+    assert stats.end_balance is None
+    assert stats.savings == 7775
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_balance_stats_round_trips(caplog, make_balance, make_expense_category):
+    balance = make_balance()
+    food = make_expense_category(account=balance.account, name="food")
+    rent = make_expense_category(account=balance.account, name="rent")
+    make_history(balance, food, rent)
+
+    with caplog.at_level(logging.DEBUG, logger="peewee"):
+        calculate_balance_stats(balance, STATS_RANGE)
+
+    assert len(caplog.records) == 2
+
+
+@pytest.fixture
+def make_joint_limit(make_currency):
+    def _make_joint_limit(categories, amount=1000, currency=None):
+        limit = models.JointLimit.create(
+            currency=(currency or models.Currency.get(code_alpha="USD")),
+            name="joint",
+            amount=amount,
+        )
+        for category in categories:
+            models.JointLimitParticipant.create(limit=limit, category=category)
+        return limit
+
+    return _make_joint_limit
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_joint_limits_stats(
+    make_balance, make_currency, make_expense_category, make_joint_limit
+):
+    balance = make_balance()
+    other_balance = make_balance(account=balance.account)
+    eur_balance = make_balance(account=balance.account, currency=make_currency("EUR"))
+    partner_balance = make_balance()
+    food = make_expense_category(account=balance.account, name="food")
+    rent = make_expense_category(account=balance.account, name="rent")
+    partner_food = make_expense_category(account=partner_balance.account, name="food")
+    idle = make_expense_category(name="idle")
+
+    make_history(balance, food, rent)
+    make_history(other_balance, food, rent)
+    make_history(eur_balance, food, rent)
+    make_history(partner_balance, partner_food, None)
+    limit = make_joint_limit([food, partner_food, idle], amount=300)
+    make_joint_limit([idle])
+
+    stats = calculate_joint_limits_stats(balance.account, STATS_RANGE)
+
+    assert len(stats) == 1
+    assert stats[0].limit == limit
+    assert stats[0].currency.code_alpha == "USD"
+    assert [(p.account, p.category) for p in stats[0].participants] == [
+        (balance.account, food),
+        (partner_balance.account, partner_food),
+    ]
+    assert stats[0].participants[0].balances == [
+        JointLimitBalanceStats(balance.id, balance.name, 100),
+        JointLimitBalanceStats(other_balance.id, other_balance.name, 100),
+    ]
+    assert stats[0].participants[0].balances_count == 2
+    assert stats[0].participants[0].total_expense == 200
+    assert stats[0].participants[1].total_expense == 100
+    assert stats[0].total_expense == 300
+    assert stats[0].total_expense_pct == 100
+
+    # Limits without expense are skipped, the idle participant sees the others.
+    assert calculate_joint_limits_stats(idle.account, STATS_RANGE) == stats
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_joint_limits_stats_round_trips(
+    caplog, make_balance, make_expense_category, make_joint_limit
+):
+    balances = [make_balance() for _ in range(3)]
+    categories = [make_expense_category(account=b.account) for b in balances]
+    for b, c in zip(balances, categories):
+        make_history(b, c, None)
+        make_joint_limit(categories)
+
+    with caplog.at_level(logging.DEBUG, logger="peewee"):
+        stats = calculate_joint_limits_stats(balances[0].account, STATS_RANGE)
+        for i in stats:
+            for p in i.participants:
+                p.account.username, p.category.name, i.currency.code_alpha
+
+    assert len(stats) == 3
+    assert len(caplog.records) == 1
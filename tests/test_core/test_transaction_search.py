@@ -0,0 +1,73 @@
+from datetime import datetime
+
+import pytest
+
+from myfunds.core.constants import FundsDirection
+from myfunds.core.models import Transaction
+from myfunds.core.models import TransactionSearch
+from myfunds.core.usecase.transactions import NewTransaction
+from myfunds.core.usecase.transactions import make_transactions
+from myfunds.core.usecase.transactions import remove_transaction
+
+
+def search(query):
+    return {
+        i.rowid
+        for i in TransactionSearch.select(TransactionSearch.rowid).where(
+            TransactionSearch.match(query)
+        )
+    }
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_search_is_synced_by_triggers(make_balance, make_withdrawal):
+    balance = make_balance()
+    coffee = make_withdrawal(balance=balance, comment="Coffee shop")
+    groceries = make_withdrawal(balance=balance, comment="Groceries and coffee")
+    make_withdrawal(balance=balance, comment=None)
+
+    assert search("coffee") == {coffee.id, groceries.id}
+    assert search("shop") == {coffee.id}
+
+    Transaction.update(comment="Tea").where(Transaction.id == coffee.id).execute()
+    assert search("coffee") == {groceries.id}
+    assert search("tea") == {coffee.id}
+
+    Transaction.update(comment=None).where(Transaction.id == coffee.id).execute()
+    assert search("tea") == set()
+
+    Transaction.delete().where(Transaction.id == groceries.id).execute()
+    assert search("coffee") == set()
+
+    TransactionSearch.raw(
+        "INSERT INTO transactions_search (transactions_search) VALUES (?)",
+        "integrity-check",
+    ).execute()
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_search_is_synced_by_usecases(make_balance):
+    balance = make_balance()
+    make_transactions(
+        balance,
+        [
+            NewTransaction(
+                FundsDirection.EXPENSE,
+                100,
+                datetime(2021, 3, 1),
+                comment="Taxi to the airport",
+            ),
+            NewTransaction(
+                FundsDirection.EXPENSE,
+                200,
+                datetime(2021, 3, 2),
+                comment="Airport lounge",
+            ),
+        ],
+    )
+    txns = list(Transaction.select().order_by(Transaction.id))
+
+    assert search("airport") == {i.id for i in txns}
+
+    remove_transaction(txns[0])
+    assert search("airport") == {txns[1].id}
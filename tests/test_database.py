@@ -0,0 +1,91 @@
+import logging
+import threading
+
+import pytest
+
+from myfunds import database
+from myfunds.modules.concurrency import run_concurrently
+
+
+@pytest.fixture
+def db():
+    db = database.Database(":memory:", slow_query_threshold=None)
+    db.execute_sql("CREATE TABLE t (id INTEGER PRIMARY KEY, value INTEGER)")
+    yield db
+    db.close()
+
+
+def test_tracking_counts_queries(db):
+    with database.tracking() as stats:
+        db.execute_sql("INSERT INTO t (value) VALUES (?)", (1,))
+        db.execute_sql("SELECT * FROM t").fetchall()
+
+    assert stats.queries == 2
+    assert stats.total_time > 0
+
+    db.execute_sql("SELECT * FROM t").fetchall()
+    assert stats.queries == 2
+    assert database.stop_tracking() is None
+
+
+def test_tracking_is_per_thread(tmp_path):
+    db = database.Database(str(tmp_path / "test.db"), slow_query_threshold=None)
+    db.execute_sql("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+
+    def run_queries():
+        db.execute_sql("SELECT * FROM t").fetchall()
+        db.close()
+
+    with database.tracking() as stats:
+        thread = threading.Thread(target=run_queries)
+        thread.start()
+        thread.join()
+
+    assert stats.queries == 0
+    db.close()
+
+
+def test_slow_query_is_logged_with_plan(db, caplog):
+    db.slow_query_threshold = 1e-9
+
+    with caplog.at_level(logging.WARNING, logger="myfunds.database"):
+        db.execute_sql("SELECT * FROM t WHERE value = ?", (1,)).fetchall()
+
+    (record,) = caplog.records
+    assert record.getMessage().startswith("Slow query in")
+    assert "SELECT * FROM t WHERE value = ? (1,)" in record.getMessage()
+    assert "SCAN t" in record.getMessage()
+
+
+def test_slow_query_without_plan(db, caplog):
+    db.slow_query_threshold = 1e-9
+
+    with caplog.at_level(logging.WARNING, logger="myfunds.database"):
+        db.execute_sql("CREATE INDEX t_value ON t (value)")
+
+    (record,) = caplog.records
+    assert record.getMessage().startswith("Slow query in")
+    assert "\n" not in record.getMessage()
+
+
+def test_fast_query_is_not_logged(db, caplog):
+    db.slow_query_threshold = 60
+
+    with caplog.at_level(logging.WARNING, logger="myfunds.database"):
+        db.execute_sql("SELECT * FROM t").fetchall()
+
+    assert caplog.records == []
+
+
+def test_tracking_counts_concurrent_calls(tmp_path):
+    db = database.Database(str(tmp_path / "test.db"), slow_query_threshold=None)
+    db.execute_sql("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+
+    def call():
+        return db.execute_sql("SELECT * FROM t").fetchall()
+
+    with database.tracking() as stats:
+        run_concurrently({"a": call, "b": call}, teardown=db.close)
+
+    assert stats.queries == 2
+    db.close()
@@ -0,0 +1,80 @@
+import threading
+import time
+
+import requests
+
+from myfunds.modules import httpclient
+from myfunds.modules.concurrency import run_concurrently
+
+
+def test_calls_run_concurrently():
+    barrier = threading.Barrier(2, timeout=1)
+
+    def call(value):
+        barrier.wait()
+        return value
+
+    result = run_concurrently({"a": lambda: call(1), "b": lambda: call(2)})
+
+    assert result == {"a": 1, "b": 2}
+
+
+def test_failed_call_is_skipped(caplog):
+    def fail():
+        raise ValueError("Unexpected value.")
+
+    result = run_concurrently({"a": lambda: 1, "b": fail})
+
+    assert result == {"a": 1}
+    assert "Call 'b' failed" in caplog.text
+
+
+def test_late_call_is_skipped(caplog):
+    release = threading.Event()
+
+    def wait():
+        release.wait(5)
+        return 2
+
+    started_at = time.monotonic()
+    try:
+        result = run_concurrently({"a": lambda: 1, "b": wait}, timeout=0.1)
+    finally:
+        release.set()
+
+    assert result == {"a": 1}
+    assert time.monotonic() - started_at < 1
+    assert "Call 'b' missed the 0.1s deadline" in caplog.text
+
+
+def test_late_call_requests_stop(monkeypatch):
+    errors = []
+    done = threading.Event()
+
+    def request(*args, **kwargs):
+        # A slow provider answering after the deadline.
+        time.sleep(0.2)
+        return httpclient.request("GET", "http://127.0.0.1:1/")
+
+    def call():
+        try:
+            request()
+        except requests.RequestException as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    assert run_concurrently({"a": call}, timeout=0.1) == {}
+    assert done.wait(1)
+    assert isinstance(errors[0], requests.Timeout)
+
+
+def test_teardown_runs_on_pool_thread():
+    threads = []
+
+    result = run_concurrently(
+        {"a": lambda: threading.get_ident()},
+        teardown=lambda: threads.append(threading.get_ident()),
+    )
+
+    assert threads == [result["a"]]
@@ -0,0 +1,128 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+import requests
+
+from myfunds.modules import httpclient
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.client_address[1]))
+
+        status = 200
+        if self.path == "/unavailable" and len(self.server.requests) < 3:
+            status = 503
+        elif self.path == "/slow":
+            time.sleep(1)
+
+        body = b"ok"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        ...
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(httpclient, "_sessions", {})
+    monkeypatch.setattr(httpclient, "_stats", {})
+    monkeypatch.setattr(httpclient, "RETRIES_BACKOFF_FACTOR", 0)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def make_url(server, path):
+    host, port = server.server_address
+    return f"http://{host}:{port}{path}"
+
+
+def test_connections_are_reused(server):
+    for _ in range(3):
+        res = httpclient.request("GET", make_url(server, "/"))
+        assert res.text == "ok"
+
+    client_ports = {i[1] for i in server.requests}
+    assert len(server.requests) == 3
+    assert len(client_ports) == 1
+
+
+def test_sessions_by_hosts(server):
+    session = httpclient.get_session(make_url(server, "/a"))
+
+    assert httpclient.get_session(make_url(server, "/b?c=d")) is session
+    assert httpclient.get_session("https://example.com/") is not session
+
+
+def test_server_errors_are_retried(server):
+    res = httpclient.request("GET", make_url(server, "/unavailable"))
+
+    assert res.status_code == 200
+    assert [i[0] for i in server.requests] == ["/unavailable"] * 3
+
+
+def test_stats(server):
+    host = "{}:{}".format(*server.server_address)
+
+    httpclient.request("GET", make_url(server, "/"))
+    httpclient.request("GET", make_url(server, "/"))
+
+    stats = httpclient.get_stats()[host]
+    assert stats.requests == 2
+    assert stats.errors == 0
+    assert 0 < stats.max_time <= stats.total_time
+
+
+def test_network_error(server, monkeypatch):
+    monkeypatch.setattr(httpclient, "RETRIES", 0)
+    url = make_url(server, "/")
+    server.shutdown()
+    server.server_close()
+
+    with pytest.raises(requests.ConnectionError):
+        httpclient.request("GET", url, timeout=1)
+
+    host = "{}:{}".format(*server.server_address)
+    assert httpclient.get_stats()[host].errors == 1
+
+
+def test_deadline_limits_timeout(server):
+    started_at = time.monotonic()
+    with httpclient.deadline(0.2):
+        with pytest.raises(requests.RequestException):
+            httpclient.request("GET", make_url(server, "/slow"))
+
+    assert time.monotonic() - started_at < 0.9
+    assert len(server.requests) == 1
+
+
+def test_deadline_disables_retries(server):
+    with httpclient.deadline(5):
+        res = httpclient.request("GET", make_url(server, "/unavailable"))
+
+    assert res.status_code == 503
+    assert len(server.requests) == 1
+
+
+def test_request_after_deadline(server):
+    with httpclient.deadline(0):
+        with pytest.raises(requests.Timeout):
+            httpclient.request("GET", make_url(server, "/"))
+
+    assert server.requests == []
@@ -0,0 +1,45 @@
+from myfunds.modules.ratelimit import TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_consume():
+    clock = Clock()
+    bucket = TokenBucket(capacity=2, rate=0.5, clock=clock)
+
+    assert bucket.consume() == 0
+    assert bucket.consume() == 0
+    assert bucket.consume() == 2
+
+    clock.now += 1
+    assert bucket.consume() == 1
+
+    clock.now += 1
+    assert bucket.consume() == 0
+
+    # Tokens are not accumulated above the capacity.
+    clock.now += 100
+    assert bucket.consume(2) == 0
+    assert bucket.consume() == 2
+
+
+def test_acquire_timeout():
+    clock = Clock()
+    bucket = TokenBucket(capacity=1, rate=(1 / 60), clock=clock)
+
+    assert bucket.acquire(timeout=0)
+    assert not bucket.acquire(timeout=0)
+    assert not bucket.acquire(timeout=59)
+
+
+def test_acquire_waits():
+    bucket = TokenBucket(capacity=1, rate=100)
+
+    assert bucket.acquire()
+    assert bucket.acquire(timeout=1)
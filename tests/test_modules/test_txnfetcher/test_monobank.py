@@ -0,0 +1,163 @@
+import json
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+import requests
+
+from myfunds.modules import httpclient
+from myfunds.modules.api import monobank as monobank_api
+from myfunds.modules.api.monobank import STATEMENT_LIMIT
+from myfunds.modules.api.monobank import STATEMENT_MAX_PERIOD
+from myfunds.modules.api.monobank import RateLimitExceeded
+from myfunds.modules.ratelimit import TokenBucket
+from myfunds.modules.txnfetcher import monobank
+
+
+NOW = datetime.now().replace(microsecond=0)
+
+
+class FakePersonalAPI:
+    items = []
+    requests = []
+    requests_limit = None
+
+    def __init__(self, token, rate_limit_timeout=0):
+        ...
+
+    def payments(self, account, from_, to_=None):
+        assert to_ - from_ <= STATEMENT_MAX_PERIOD
+
+        if self.requests_limit is not None and len(self.requests) >= (
+            self.requests_limit
+        ):
+            raise RateLimitExceeded("Statement requests limit is exceeded.")
+
+        self.requests.append((from_, to_))
+        items = [i for i in self.items if from_ <= i["time"] <= to_]
+        items.sort(key=lambda i: i["time"], reverse=True)
+        return items[:STATEMENT_LIMIT]
+
+
+@pytest.fixture
+def api(monkeypatch):
+    FakePersonalAPI.items = []
+    FakePersonalAPI.requests = []
+    FakePersonalAPI.requests_limit = None
+    monkeypatch.setattr(monobank, "PersonalAPI", FakePersonalAPI)
+    return FakePersonalAPI
+
+
+def make_items(since, count, step):
+    return [
+        {
+            "id": f"id{i}",
+            "time": int((since + timedelta(seconds=(step * i))).timestamp()),
+            "amount": (-100 - i) if i % 2 else (100 + i),
+            "description": f"txn {i}",
+        }
+        for i in range(count)
+    ]
+
+
+def make_fetcher(state=None):
+    return monobank.MonobankTxnFetcher({"token": "token", "account": "0"}, state)
+
+
+def test_fetch_windows_and_pages(api):
+    since = NOW - timedelta(days=90)
+    # Many transactions a day to overflow the statement limit.
+    api.items = make_items(since, 3000, 60 * 40)
+
+    txns = make_fetcher().fetch_transactions(since)
+
+    assert len(txns) == 3000
+    assert [i.comment for i in txns] == [f"txn {i}" for i in range(3000)]
+    assert txns[1].direction == "EXPENSE" and txns[1].amount == 101
+    assert txns[2].direction == "INCOME" and txns[2].amount == 102
+    assert len(api.requests) > 6
+
+
+def test_fetch_duplicates_on_page_boundary(api):
+    since = NOW - timedelta(days=1)
+    api.items = make_items(since, STATEMENT_LIMIT + 10, 0)
+
+    txns = make_fetcher().fetch_transactions(since)
+
+    assert len(txns) == STATEMENT_LIMIT
+
+
+def test_fetch_is_resumed_by_cursor(api):
+    since = NOW - timedelta(days=120)
+    api.items = make_items(since, 100, 60 * 60 * 24)
+    api.requests_limit = 2
+
+    state = {}
+    first_txns = make_fetcher(state).fetch_transactions(since)
+
+    assert 0 < len(first_txns) < 100
+    assert state["cursor"]["since"] == int(since.timestamp())
+    assert state["cursor"]["until"] <= first_txns[0].created_at.timestamp()
+
+    api.requests = []
+    second_txns = make_fetcher(state).fetch_transactions(NOW - timedelta(days=1))
+
+    assert "cursor" not in state
+    assert len(first_txns) + len(second_txns) == 100
+    assert [i.comment for i in second_txns + first_txns] == [
+        f"txn {i}" for i in range(100)
+    ]
+
+
+def test_failed_fetch_keeps_cursor(api, monkeypatch):
+    cursor = {"since": 1, "until": 2}
+    state = {"cursor": cursor}
+
+    def payments(*args, **kwargs):
+        raise ConnectionError()
+
+    monkeypatch.setattr(api, "payments", payments)
+    with pytest.raises(ConnectionError):
+        make_fetcher(state).fetch_transactions(NOW)
+
+    assert state == {"cursor": cursor}
+
+
+def make_response(status_code, data):
+    res = requests.Response()
+    res.status_code = status_code
+    res._content = json.dumps(data).encode()
+    return res
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        make_response(429, {}),
+        make_response(429, {"errorDescription": "Too many requests"}),
+        make_response(200, {"errorDescription": "Too many requests"}),
+    ],
+)
+def test_server_rate_limit_keeps_cursor(monkeypatch, response):
+    since = NOW - timedelta(days=60)
+    responses = [make_response(200, []), response]
+
+    def request(*args, **kwargs):
+        return responses.pop(0)
+
+    # The server limit is hit with the local bucket still having tokens.
+    monkeypatch.setattr(httpclient, "request", request)
+    monkeypatch.setattr(
+        monobank_api, "get_statement_bucket", lambda token: TokenBucket(10, 1)
+    )
+
+    state = {}
+    started_at = int(datetime.now().timestamp())
+    txns = make_fetcher(state).fetch_transactions(since)
+
+    assert txns == []
+    assert responses == []
+    assert state["cursor"]["since"] == int(since.timestamp())
+    assert state["cursor"]["until"] - started_at in range(
+        -STATEMENT_MAX_PERIOD, -STATEMENT_MAX_PERIOD + 2
+    )
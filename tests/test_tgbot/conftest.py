@@ -0,0 +1,107 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qsl
+from urllib.parse import urlparse
+
+import pytest
+import requests
+
+from myfunds.modules import httpclient
+from myfunds.modules.tg import BotClient
+from myfunds.tgbot.webhook import SECRET_TOKEN_HEADER
+
+
+class FakeTelegramHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def _handle(self):
+        url = urlparse(self.path)
+        method = url.path.split("/")[-1]
+        params = dict(parse_qsl(url.query))
+        content_length = int(self.headers.get("Content-Length") or 0)
+        if content_length > 0:
+            params.update(json.loads(self.rfile.read(content_length)))
+
+        status, data = self.server.answer(method, params)
+
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        ...
+
+
+class FakeTelegram(ThreadingHTTPServer):
+    """Bot API server recording the calls, it delivers updates to the webhook."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeTelegramHandler)
+        self.calls = []
+        self.webhook = None
+        self.responses = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url_root(self) -> str:
+        host, port = self.server_address
+        return f"http://{host}:{port}"
+
+    def answer(self, method, params):
+        with self._lock:
+            self.calls.append((method, params))
+            if method == "setWebhook":
+                self.webhook = params
+            elif method == "deleteWebhook":
+                self.webhook = None
+
+            responses = self.responses.get(method)
+            if responses:
+                return responses.pop(0)
+
+        if method == "getUpdates":
+            time.sleep(0.01)
+            return 200, {"ok": True, "result": []}
+
+        return 200, {"ok": True, "result": True}
+
+    def get_calls(self, method):
+        with self._lock:
+            return [params for name, params in self.calls if name == method]
+
+    def deliver(self, update, secret_token=None):
+        headers = {}
+        secret_token = secret_token or self.webhook.get("secret_token")
+        if secret_token is not None:
+            headers[SECRET_TOKEN_HEADER] = secret_token
+
+        return requests.post(self.webhook["url"], json=update, headers=headers)
+
+
+@pytest.fixture
+def fake_telegram(monkeypatch):
+    monkeypatch.setattr(httpclient, "_sessions", {})
+
+    server = FakeTelegram()
+    monkeypatch.setattr(BotClient, "url_root", server.url_root)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,59 @@
+import threading
+
+from myfunds.tgbot.bot import Bot
+
+
+def make_update(update_id, chat_id, text="/start"):
+    return {
+        "update_id": update_id,
+        "message": {"chat": {"id": chat_id}, "text": text},
+    }
+
+
+def test_dispatch_update(config, monkeypatch, caplog):
+    bot = Bot(config)
+    release = threading.Event()
+    processed = []
+
+    def process_update(update):
+        release.wait(5)
+        processed.append(update["update_id"])
+
+    monkeypatch.setattr(bot, "_process_update", process_update)
+
+    for i in range(config.TGBOT_CHAT_QUEUE_SIZE):
+        assert bot.dispatch_update(make_update(i, chat_id=1))
+    assert not bot.dispatch_update(make_update(99, chat_id=1))
+    assert bot.dispatch_update(make_update(100, chat_id=2))
+
+    release.set()
+    bot.stop()
+
+    assert [i for i in processed if i < 100] == list(
+        range(config.TGBOT_CHAT_QUEUE_SIZE)
+    )
+    assert 100 in processed
+    assert "Chat 1 queue is full" in caplog.text
+
+
+def test_dispatch_update_without_chat(config, monkeypatch, caplog):
+    bot = Bot(config)
+    processed = []
+    monkeypatch.setattr(bot, "_process_update", processed.append)
+
+    bot.dispatch_update(
+        {"update_id": 1, "edited_message": {"chat": {"id": 1}, "text": "/start"}}
+    )
+    bot.dispatch_update(make_update(2, chat_id=1))
+    bot.stop()
+
+    assert processed == [make_update(2, chat_id=1)]
+    assert "Update 1 has no chat, skipped." in caplog.text
+
+
+def test_dispatch_update_after_stop(config, caplog):
+    bot = Bot(config)
+    bot.stop()
+
+    assert not bot.dispatch_update(make_update(1, chat_id=1))
+    assert "Bot is stopping, update 1 isn't queued." in caplog.text
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+import pytest
+
+from myfunds.core.models import CryptoBalance
+from myfunds.core.models import CryptoCurrency
+from myfunds.core.models import CryptoPrice
+from myfunds.core.usecase import prices
+from myfunds.modules import cmc
+from myfunds.tgbot.handlers.crypto_balances import build_report
+
+
+@pytest.fixture
+def failing_cmc(monkeypatch):
+    monkeypatch.setattr(prices, "_prices", {})
+
+    def fetch_prices(currencies_ids, convert="USD"):
+        raise cmc.CMCRequestError("Network error.")
+
+    monkeypatch.setattr(cmc, "fetch_prices", fetch_prices)
+
+
+@pytest.mark.usefixtures("with_memory_database", "failing_cmc")
+def test_report_without_price_of_new_currency(config, make_account):
+    account = make_account()
+    btc = CryptoCurrency.create(symbol="BTC", name="Bitcoin", cmc_id=1, icon="")
+    eth = CryptoCurrency.create(symbol="ETH", name="Ethereum", cmc_id=2, icon="")
+    CryptoBalance.create(account=account, currency=btc, name="b1", quantity=10 ** 8)
+    CryptoBalance.create(account=account, currency=eth, name="b2", quantity=10 ** 8)
+    CryptoPrice.create(cmc_id=1, convert="USD", price=100.0, fetched_at=datetime.now())
+
+    report = build_report(account, config)
+
+    assert "BTC: 100.0$\nETH: n/a" in report
+    assert "Current value: 100.0$" in report
+    assert "b1: 1.0 BTC (100.0$)\nb2: 1.0 ETH (n/a)" in report
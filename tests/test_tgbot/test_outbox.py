@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+from myfunds.modules.tg import BotClient
+from myfunds.tgbot import outbox as outbox_module
+from myfunds.tgbot.outbox import Outbox
+
+
+@pytest.fixture
+def outbox(fake_telegram, monkeypatch):
+    monkeypatch.setattr(outbox_module, "CHAT_RATE", 5)
+    monkeypatch.setattr(outbox_module, "CHAT_BURST", 1)
+
+    outbox = Outbox(BotClient("token"))
+    yield outbox
+    outbox.close(5)
+
+
+def test_chat_calls_are_sent_in_order(outbox, fake_telegram):
+    outbox.send_message(chat_id=1, text="a")
+    outbox.send_message(chat_id=2, text="b")
+    outbox.edit_message_text(text="c", chat_id=1, message_id=10)
+    outbox.delete_message(1, 11)
+
+    assert outbox.close(5)
+    assert fake_telegram.calls == [
+        ("sendMessage", {"chat_id": "1", "text": "a"}),
+        ("sendMessage", {"chat_id": "2", "text": "b"}),
+        ("editMessageText", {"chat_id": "1", "message_id": "10", "text": "c"}),
+        ("deleteMessage", {"chat_id": "1", "message_id": "11"}),
+    ]
+
+
+def test_chat_rate_limit(outbox, fake_telegram):
+    started_at = time.monotonic()
+    for i in range(3):
+        outbox.send_message(chat_id=1, text=str(i))
+
+    assert outbox.close(5)
+    assert len(fake_telegram.calls) == 3
+    assert time.monotonic() - started_at >= 0.4
+
+
+def test_edits_are_coalesced(outbox, fake_telegram):
+    outbox.send_message(chat_id=1, text="a")
+    for i in range(5):
+        outbox.edit_message_text(text=str(i), chat_id=1, message_id=10)
+    outbox.edit_message_text(text="x", chat_id=1, message_id=11)
+    outbox.edit_message_text(text="y", chat_id=1, message_id=12)
+    outbox.delete_message(1, 12)
+
+    assert outbox.close(5)
+    assert fake_telegram.calls == [
+        ("sendMessage", {"chat_id": "1", "text": "a"}),
+        ("editMessageText", {"chat_id": "1", "message_id": "10", "text": "4"}),
+        ("editMessageText", {"chat_id": "1", "message_id": "11", "text": "x"}),
+        ("deleteMessage", {"chat_id": "1", "message_id": "12"}),
+    ]
+
+
+def test_retry_after_is_honoured(outbox, fake_telegram):
+    fake_telegram.responses["sendMessage"] = [
+        (
+            429,
+            {
+                "ok": False,
+                "error_code": 429,
+                "description": "Too Many Requests: retry after 1",
+                "parameters": {"retry_after": 1},
+            },
+        )
+    ]
+
+    started_at = time.monotonic()
+    outbox.send_message(chat_id=1, text="a")
+    outbox.send_message(chat_id=2, text="b")
+
+    assert outbox.close(5)
+    assert [params["text"] for _, params in fake_telegram.calls] == ["a", "b", "a"]
+    assert time.monotonic() - started_at >= 1
+
+
+def test_failed_call_is_dropped(outbox, fake_telegram, caplog):
+    fake_telegram.responses["sendMessage"] = [
+        (400, {"ok": False, "description": "Bad Request: chat not found"})
+    ]
+
+    outbox.send_message(chat_id=1, text="a")
+    outbox.send_message(chat_id=1, text="b")
+
+    assert outbox.close(5)
+    assert [params["text"] for _, params in fake_telegram.calls] == ["a", "b"]
+    assert "chat not found" in caplog.text
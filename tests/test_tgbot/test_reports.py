@@ -0,0 +1,93 @@
+import pytest
+
+from myfunds.core.models import Account
+from myfunds.core.usecase.versions import bump_account_data_version
+from myfunds.tgbot.reports import ReportCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ReportBuilder:
+    def __init__(self):
+        self.builds = 0
+
+    def __call__(self) -> str:
+        self.builds += 1
+        return f"report {self.builds}"
+
+
+def test_report_is_cached():
+    cache = ReportCache()
+    account = Account(id=1, data_version=0)
+    build = ReportBuilder()
+
+    assert cache.get_or_build("stats", (1,), account, build) == "report 1"
+    assert cache.get_or_build("stats", (1,), account, build) == "report 1"
+    assert build.builds == 1
+
+    assert cache.get_or_build("stats", (2,), account, build) == "report 2"
+    assert cache.get_or_build("budget", (1,), account, build) == "report 3"
+    assert cache.get_or_build("stats", (1,), Account(id=2), build) == "report 4"
+
+
+def test_missing_report_is_cached():
+    cache = ReportCache()
+    account = Account(id=1, data_version=0)
+    builds = []
+
+    def build():
+        builds.append(1)
+
+    assert cache.get_or_build("budget", (), account, build) is None
+    assert cache.get_or_build("budget", (), account, build) is None
+    assert len(builds) == 1
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_report_is_rebuilt_on_data_version_bump(make_account):
+    cache = ReportCache()
+    account = make_account()
+    build = ReportBuilder()
+
+    assert cache.get_or_build("stats", (), account, build) == "report 1"
+
+    bump_account_data_version(account.id)
+    account = Account.get_by_id(account.id)
+
+    assert cache.get_or_build("stats", (), account, build) == "report 2"
+    assert cache.get_or_build("stats", (), account, build) == "report 2"
+
+
+def test_report_expiration():
+    clock = FakeClock()
+    cache = ReportCache(clock=clock)
+    account = Account(id=1, data_version=0)
+    build = ReportBuilder()
+
+    assert cache.get_or_build("budget", (), account, build, ttl=60) == "report 1"
+
+    clock.now = 59
+    assert cache.get_or_build("budget", (), account, build, ttl=60) == "report 1"
+
+    clock.now = 60
+    assert cache.get_or_build("budget", (), account, build, ttl=60) == "report 2"
+
+
+def test_least_recently_used_reports_are_dropped():
+    cache = ReportCache(max_size=2)
+    account = Account(id=1, data_version=0)
+    build = ReportBuilder()
+
+    cache.get_or_build("stats", (1,), account, build)
+    cache.get_or_build("stats", (2,), account, build)
+    cache.get_or_build("stats", (1,), account, build)
+    cache.get_or_build("stats", (3,), account, build)
+
+    assert cache.get_or_build("stats", (1,), account, build) == "report 1"
+    assert cache.get_or_build("stats", (2,), account, build) == "report 4"
@@ -0,0 +1,154 @@
+import socket
+import threading
+import time
+
+import pytest
+import requests
+
+from myfunds.tgbot.bot import Bot
+from myfunds.tgbot.webhook import SECRET_TOKEN_HEADER
+from myfunds.tgbot.webhook import WebhookServer
+
+
+def make_update(update_id, chat_id=1):
+    return {"update_id": update_id, "message": {"chat": {"id": chat_id}, "text": "/"}}
+
+
+def get_free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def webhook_server():
+    dispatched = []
+
+    def dispatch(update):
+        dispatched.append(update)
+        return update["update_id"] > 0
+
+    server = WebhookServer(("127.0.0.1", 0), "/tgbot", "secret", dispatch)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+
+    host, port = server.server_address
+    server.url = f"http://{host}:{port}/tgbot"
+    server.dispatched = dispatched
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_webhook_server_dispatches_updates(webhook_server):
+    res = requests.post(
+        webhook_server.url,
+        json=make_update(1),
+        headers={SECRET_TOKEN_HEADER: "secret"},
+    )
+
+    assert res.status_code == 200
+    assert webhook_server.dispatched == [make_update(1)]
+
+
+def test_webhook_server_asks_to_redeliver_not_queued_update(webhook_server):
+    res = requests.post(
+        webhook_server.url,
+        json=make_update(0),
+        headers={SECRET_TOKEN_HEADER: "secret"},
+    )
+
+    assert res.status_code == 503
+    assert webhook_server.dispatched == [make_update(0)]
+
+
+@pytest.mark.parametrize(
+    "path,headers,data,expected_status",
+    [
+        ("/other", {SECRET_TOKEN_HEADER: "secret"}, "{}", 404),
+        ("/tgbot", {}, '{"update_id": 1}', 403),
+        ("/tgbot", {SECRET_TOKEN_HEADER: "wrong"}, '{"update_id": 1}', 403),
+        ("/tgbot", {SECRET_TOKEN_HEADER: "secret"}, "not json", 400),
+        ("/tgbot", {SECRET_TOKEN_HEADER: "secret"}, '{"message": {}}', 400),
+    ],
+)
+def test_webhook_server_rejects_requests(
+    webhook_server, path, headers, data, expected_status
+):
+    url = webhook_server.url.replace("/tgbot", path)
+    res = requests.post(url, data=data, headers=headers)
+
+    assert res.status_code == expected_status
+    assert webhook_server.dispatched == []
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_bot_webhook(config, fake_telegram, monkeypatch):
+    port = get_free_port()
+    config.TGBOT_WEBHOOK_URL = f"http://127.0.0.1:{port}/tgbot"
+    config.TGBOT_WEBHOOK_SECRET = "secret"
+    config.TGBOT_WEBHOOK_HOST = "127.0.0.1"
+    config.TGBOT_WEBHOOK_PORT = port
+
+    bot = Bot(config)
+    processed = []
+    monkeypatch.setattr(bot, "_process_update", processed.append)
+
+    thread = threading.Thread(target=bot.run_webhook, daemon=True)
+    thread.start()
+    wait_for(lambda: bot._webhook_server is not None)
+
+    assert fake_telegram.get_calls("setWebhook") == [
+        {
+            "url": config.TGBOT_WEBHOOK_URL,
+            "secret_token": "secret",
+            "allowed_updates": ["message", "callback_query"],
+        }
+    ]
+    assert fake_telegram.deliver(make_update(1)).status_code == 200
+    assert fake_telegram.deliver(make_update(2)).status_code == 200
+    assert fake_telegram.deliver(make_update(3), "wrong").status_code == 403
+
+    bot.stop()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert processed == [make_update(1), make_update(2)]
+
+
+def test_bot_polling(config, fake_telegram, monkeypatch):
+    edited_update = {
+        "update_id": 2,
+        "edited_message": {"chat": {"id": 1}, "text": "/start"},
+    }
+    bot = Bot(config)
+    processed = []
+    monkeypatch.setattr(bot, "_process_update", processed.append)
+    fake_telegram.responses["getUpdates"] = [
+        (200, {"ok": True, "result": []}),
+        (200, {"ok": True, "result": [make_update(1), edited_update]}),
+        (200, {"ok": True, "result": [make_update(3)]}),
+        (200, {"ok": True, "result": []}),
+    ]
+
+    thread = threading.Thread(target=bot.run, daemon=True)
+    thread.start()
+    wait_for(lambda: len(fake_telegram.get_calls("getUpdates")) > 4)
+
+    bot.stop()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert processed == [make_update(1), make_update(3)]
+    assert len(fake_telegram.get_calls("deleteWebhook")) == 1
+
+    calls = fake_telegram.get_calls("getUpdates")
+    assert [i.get("offset") for i in calls[:5]] == [None, None, "3", "4", "4"]
+    assert calls[0]["allowed_updates"] == '["message", "callback_query"]'
@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+
+from myfunds.tgbot.workers import WorkerPool
+from myfunds.tgbot.workers import WorkerPoolClosed
+
+
+def test_key_tasks_run_in_order():
+    pool = WorkerPool(workers=4, max_pending=100, max_key_pending=100)
+    done = {"a": [], "b": []}
+
+    for i in range(20):
+        for key in done:
+            assert pool.submit(key, done[key].append, i)
+
+    assert pool.shutdown(5)
+    assert done == {"a": list(range(20)), "b": list(range(20))}
+
+
+def test_keys_run_concurrently():
+    pool = WorkerPool(workers=2, max_pending=10, max_key_pending=10)
+    barrier = threading.Barrier(2, timeout=1)
+    passed = []
+
+    def wait():
+        barrier.wait()
+        passed.append(True)
+
+    pool.submit("a", wait)
+    pool.submit("b", wait)
+
+    assert pool.shutdown(5)
+    assert passed == [True, True]
+
+
+def test_full_key_rejects_tasks():
+    pool = WorkerPool(workers=2, max_pending=10, max_key_pending=2)
+    release = threading.Event()
+
+    assert pool.submit("a", release.wait, 5)
+    assert pool.submit("a", lambda: None)
+    assert not pool.submit("a", lambda: None)
+    assert pool.submit("b", lambda: None)
+
+    release.set()
+    assert pool.shutdown(5)
+
+
+def test_full_pool_blocks_submit():
+    pool = WorkerPool(workers=1, max_pending=2, max_key_pending=10)
+    release = threading.Event()
+
+    assert pool.submit("a", release.wait, 5)
+    assert pool.submit("b", lambda: None)
+    assert not pool.submit("c", lambda: None, timeout=0.1)
+
+    release.set()
+    assert pool.submit("c", lambda: None, timeout=5)
+    assert pool.shutdown(5)
+
+
+def test_shutdown_drains_pending_tasks():
+    pool = WorkerPool(workers=1, max_pending=10, max_key_pending=10)
+    release = threading.Event()
+    done = []
+
+    pool.submit("a", release.wait, 5)
+    pool.submit("a", done.append, 1)
+    pool.submit("b", done.append, 2)
+    threading.Timer(0.1, release.set).start()
+
+    assert pool.shutdown(5)
+    assert sorted(done) == [1, 2]
+
+    with pytest.raises(WorkerPoolClosed):
+        pool.submit("a", done.append, 3)
+
+
+def test_shutdown_drops_tasks_on_timeout():
+    pool = WorkerPool(workers=1, max_pending=10, max_key_pending=10)
+    release = threading.Event()
+    done = []
+
+    pool.submit("a", release.wait, 5)
+    pool.submit("a", done.append, 1)
+
+    assert not pool.shutdown(0.1)
+    release.set()
+    assert done == []
+
+
+def test_failed_task_doesnt_stop_key(caplog):
+    pool = WorkerPool(workers=1, max_pending=10, max_key_pending=10)
+    done = []
+
+    pool.submit("a", lambda: 1 / 0)
+    pool.submit("a", done.append, 1)
+
+    assert pool.shutdown(5)
+    assert done == [1]
+    assert "ZeroDivisionError" in caplog.text
@@ -0,0 +1,122 @@
+from datetime import date
+from datetime import datetime
+
+import pytest
+
+from myfunds.core import models
+from myfunds.core.constants import FundsDirection
+from myfunds.core.usecase import aggregates
+from myfunds.core.usecase import transactions as txn_usecase
+from myfunds.core.usecase.transactions import NewTransaction
+from myfunds.modules import check
+
+
+def aggregates_state(balance):
+    query = (
+        models.BalanceAggregate.select()
+        .where(models.BalanceAggregate.balance == balance)
+        .order_by(
+            models.BalanceAggregate.month,
+            models.BalanceAggregate.direction,
+            models.BalanceAggregate.category_id,
+        )
+    )
+    return [
+        (i.month, i.direction, i.category_id, i.amount, i.transactions_count)
+        for i in query
+    ]
+
+
+def make_history(balance, category):
+    txn_usecase.make_replenishment(
+        balance=balance, amount=10000, created_at=datetime(2021, 1, 15)
+    )
+    txn_usecase.make_withdrawal(
+        balance=balance,
+        amount=300,
+        category=category,
+        created_at=datetime(2021, 1, 20),
+    )
+    txn = txn_usecase.make_withdrawal(
+        balance=balance, amount=200, created_at=datetime(2021, 2, 1)
+    )
+    txn_usecase.make_withdrawal(
+        balance=balance,
+        amount=50,
+        category=category,
+        created_at=datetime(2021, 2, 20),
+        defer_remainders=True,
+    )
+    txn_usecase.make_transactions(
+        balance,
+        [
+            NewTransaction(FundsDirection.EXPENSE, 70, datetime(2021, 1, 1)),
+            NewTransaction(
+                FundsDirection.EXPENSE, 30, datetime(2021, 2, 5), category=category
+            ),
+        ],
+    )
+    txn_usecase.remove_transaction(txn)
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_usecases_maintain_aggregates(make_balance, make_expense_category):
+    balance = make_balance()
+    category = make_expense_category(account=balance.account)
+    make_history(balance, category)
+
+    assert aggregates_state(balance) == [
+        (date(2021, 1, 1), FundsDirection.EXPENSE, None, 70, 1),
+        (date(2021, 1, 1), FundsDirection.EXPENSE, category.id, 300, 1),
+        (date(2021, 1, 1), FundsDirection.INCOME, None, 10000, 1),
+        (date(2021, 2, 1), FundsDirection.EXPENSE, category.id, 80, 2),
+    ]
+
+    state = aggregates_state(balance)
+    aggregates.rebuild(balance)
+    assert aggregates_state(balance) == state
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_category_update(make_balance, make_expense_category, make_income_category):
+    balance = make_balance()
+    category = make_expense_category(account=balance.account)
+    txn = txn_usecase.make_withdrawal(
+        balance=balance, amount=300, created_at=datetime(2021, 1, 20)
+    )
+
+    with pytest.raises(check.ValidationError):
+        txn_usecase.update_transaction_category(
+            txn, make_income_category(account=balance.account)
+        )
+
+    txn_usecase.update_transaction_category(txn, category)
+    assert models.Transaction.get_by_id(txn.id).category_id == category.id
+    assert aggregates_state(balance) == [
+        (date(2021, 1, 1), FundsDirection.EXPENSE, category.id, 300, 1),
+    ]
+
+    txn_usecase.update_transaction_category(txn, None)
+    assert models.Transaction.get_by_id(txn.id).category_id is None
+    assert aggregates_state(balance) == [
+        (date(2021, 1, 1), FundsDirection.EXPENSE, None, 300, 1),
+    ]
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_detach_category(make_balance, make_expense_category):
+    balance = make_balance()
+    other_balance = make_balance(account=balance.account)
+    category = make_expense_category(account=balance.account)
+    make_history(balance, category)
+    make_history(other_balance, category)
+
+    aggregates.detach_category(category)
+    category.delete_instance()
+
+    for i in [balance, other_balance]:
+        assert aggregates_state(i) == [
+            (date(2021, 1, 1), FundsDirection.EXPENSE, None, 370, 2),
+            (date(2021, 1, 1), FundsDirection.INCOME, None, 10000, 1),
+            (date(2021, 2, 1), FundsDirection.EXPENSE, None, 80, 2),
+        ]
@@ -0,0 +1,120 @@
+from datetime import date
+from datetime import datetime
+
+import pytest
+
+from myfunds.core import models
+from myfunds.core.constants import FundsDirection
+from myfunds.core.usecase import checkpoints
+from myfunds.core.usecase import transactions as txn_usecase
+from myfunds.core.usecase.transactions import NewTransaction
+
+
+def checkpoints_state(balance):
+    query = (
+        models.BalanceCheckpoint.select()
+        .where(
+            (models.BalanceCheckpoint.balance == balance)
+            & (models.BalanceCheckpoint.transactions_count > 0)
+        )
+        .order_by(models.BalanceCheckpoint.month)
+    )
+    return [(i.month, i.closing_amount, i.transactions_count) for i in query]
+
+
+def make_history(balance):
+    txn_usecase.make_replenishment(
+        balance=balance, amount=10000, created_at=datetime(2021, 1, 15)
+    )
+    txn_usecase.make_withdrawal(
+        balance=balance, amount=300, created_at=datetime(2021, 3, 10)
+    )
+    txn = txn_usecase.make_withdrawal(
+        balance=balance, amount=200, created_at=datetime(2021, 2, 1)
+    )
+    txn_usecase.make_withdrawal(
+        balance=balance,
+        amount=50,
+        created_at=datetime(2021, 2, 20),
+        defer_remainders=True,
+    )
+    txn_usecase.make_transactions(
+        balance,
+        [
+            NewTransaction(FundsDirection.INCOME, 500, datetime(2020, 12, 31)),
+            NewTransaction(FundsDirection.EXPENSE, 70, datetime(2021, 3, 1)),
+            NewTransaction(FundsDirection.EXPENSE, 30, datetime(2021, 5, 1)),
+        ],
+    )
+    txn_usecase.remove_transaction(txn)
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_usecases_maintain_checkpoints(make_balance):
+    balance = make_balance()
+    make_history(balance)
+
+    assert checkpoints_state(balance) == [
+        (date(2020, 12, 1), 500, 1),
+        (date(2021, 1, 1), 10500, 1),
+        (date(2021, 2, 1), 10450, 1),
+        (date(2021, 3, 1), 10080, 2),
+        (date(2021, 5, 1), 10050, 1),
+    ]
+
+    state = checkpoints_state(balance)
+    checkpoints.rebuild(balance)
+    assert checkpoints_state(balance) == state
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_removed_month_is_skipped(make_balance):
+    balance = make_balance()
+    txn_usecase.make_replenishment(
+        balance=balance, amount=100, created_at=datetime(2021, 1, 15)
+    )
+    txn = txn_usecase.make_replenishment(
+        balance=balance, amount=200, created_at=datetime(2021, 2, 15)
+    )
+    txn_usecase.remove_transaction(txn)
+
+    assert checkpoints.get_end_balance(balance, date(2021, 2, 1)) is None
+    assert checkpoints.get_start_balance(balance, date(2021, 3, 1)) == 100
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_start_and_end_balances(make_balance):
+    balance = make_balance()
+    other_balance = make_balance()
+    make_history(balance)
+    make_history(other_balance)
+    txn_usecase.repair_balance_remainders(balance)
+
+    for month in [date(2020, 11, 1), date(2021, 2, 1), date(2021, 4, 1)]:
+        next_month = date(month.year, month.month + 1, 1)
+
+        last_txn_before = (
+            models.Transaction.select()
+            .where(
+                (models.Transaction.balance == balance)
+                & (models.Transaction.created_at < month)
+            )
+            .order_by(models.Transaction.created_at.desc())
+            .first()
+        )
+        last_txn_of_month = (
+            models.Transaction.select()
+            .where(
+                (models.Transaction.balance == balance)
+                & (models.Transaction.created_at.between(month, next_month))
+            )
+            .order_by(models.Transaction.created_at.desc())
+            .first()
+        )
+
+        assert checkpoints.get_start_balance(balance, month) == (
+            last_txn_before.balance_remainder if last_txn_before else None
+        )
+        assert checkpoints.get_end_balance(balance, month) == (
+            last_txn_of_month.balance_remainder if last_txn_of_month else None
+        )
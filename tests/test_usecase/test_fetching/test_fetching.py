@@ -0,0 +1,148 @@
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+
+from myfunds.core.models import TransactionImportSettings
+from myfunds.core.usecase import fetching
+from myfunds.core.usecase.transactions import make_transactions
+from myfunds.modules import txnfetcher
+from myfunds.modules.txnfetcher.base import BaseTxnFetcher
+from myfunds.modules.txnfetcher.base import Replenishment
+from myfunds.modules.txnfetcher.base import Withdrawal
+
+
+NOW = datetime.now().replace(microsecond=0)
+
+
+class FakeTxnFetcher(BaseTxnFetcher):
+    provider_id = "fake"
+    require_config = False
+    fetched_since = []
+
+    def _fetch_transactions(self, since):
+        self.fetched_since.append(since)
+        return [
+            Replenishment(1000, NOW - timedelta(hours=3)),
+            Withdrawal(200, NOW - timedelta(hours=2), "coffee"),
+        ]
+
+
+@pytest.fixture
+def fake_fetcher(monkeypatch):
+    FakeTxnFetcher.fetched_since = []
+    monkeypatch.setattr(
+        txnfetcher, "get_fetcher", lambda i: FakeTxnFetcher if i == "fake" else None
+    )
+    return FakeTxnFetcher
+
+
+@pytest.fixture
+def make_settings(make_balance):
+    def _make_settings(balance=None, provider="fake", **internal_data):
+        return TransactionImportSettings.create(
+            balance=(make_balance() if balance is None else balance),
+            provider=provider,
+            config={},
+            internal_data=internal_data,
+        )
+
+    return _make_settings
+
+
+@pytest.mark.usefixtures("with_memory_database")
+@pytest.mark.parametrize(
+    "internal_data,interval,expected_result",
+    [
+        ({}, 0, 0),
+        ({}, 3600, 0),
+        ({"last_fetch_at": "2021-03-01 10:00:00"}, 0, 0),
+        ({"last_fetch_at": "2021-03-01 10:00:00"}, 3600, 1800),
+        ({"last_fetch_at": "2021-03-01 10:00:00", "min_interval": 60}, 0, 0),
+        ({"last_fetch_at": "2021-03-01 10:29:30", "min_interval": 60}, 0, 30),
+        ({"last_fetch_at": "2021-03-01 10:29:30", "min_interval": 60}, 10, 30),
+        (
+            {
+                "last_fetch_at": "2021-03-01 10:29:30",
+                "min_interval": 60,
+                "cursor": {"since": 0, "until": 1},
+            },
+            3600,
+            30,
+        ),
+    ],
+)
+def test_seconds_to_next_fetch(make_settings, internal_data, interval, expected_result):
+    settings = make_settings(**internal_data)
+    now = datetime(2021, 3, 1, 10, 30)
+
+    assert fetching.seconds_to_next_fetch(settings, interval, now) == expected_result
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_fetch_since(make_settings, make_balance, make_withdrawal):
+    balance = make_balance()
+    settings = make_settings(balance=balance, since_offset=1)
+
+    month_start = NOW.replace(day=1, hour=0, minute=0, second=0)
+    assert fetching.fetch_since(settings) == month_start + timedelta(seconds=1)
+
+    make_withdrawal(balance=balance, created_at=NOW - timedelta(days=40))
+    make_withdrawal(balance=balance, created_at=NOW - timedelta(days=35))
+    assert fetching.fetch_since(settings) == NOW - timedelta(days=35, seconds=-1)
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_fetch_new_transactions(make_settings, make_balance, fake_fetcher):
+    balance = make_balance()
+    settings = make_settings(balance=balance)
+    since = NOW - timedelta(days=1)
+
+    txns = fetching.fetch_new_transactions(settings, since)
+
+    assert [(i.direction, i.amount, i.comment) for i in txns] == [
+        ("INCOME", 1000, None),
+        ("EXPENSE", 200, "coffee"),
+    ]
+    assert fake_fetcher.fetched_since == [since]
+    assert fetching.get_last_fetch_at(
+        TransactionImportSettings.get_by_id(settings.id)
+    ) >= NOW - timedelta(seconds=1)
+
+    make_transactions(balance, txns[:1])
+    assert fetching.fetch_new_transactions(settings, since) == txns[1:]
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_fetch_new_transactions_by_unknown_provider(make_settings, fake_fetcher):
+    settings = make_settings(provider="unknown")
+
+    with pytest.raises(ValueError):
+        fetching.fetch_new_transactions(settings, NOW)
+
+    assert fetching.get_last_fetch_at(settings) is not None
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_fetch_new_transactions_keeps_concurrent_changes(
+    make_settings, fake_fetcher, monkeypatch
+):
+    settings = make_settings(min_interval=60, cursor={"since": 0, "until": 1})
+
+    def fetch_transactions(self, since):
+        # The other fetch of the same balance saves its state meanwhile.
+        TransactionImportSettings.update(
+            internal_data={"min_interval": 60, "cursor": None, "split_by_days": True}
+        ).execute()
+        self.state.pop("cursor")
+        self.state["since_offset"] = 10
+        return []
+
+    monkeypatch.setattr(FakeTxnFetcher, "_fetch_transactions", fetch_transactions)
+    fetching.fetch_new_transactions(settings, NOW)
+
+    assert TransactionImportSettings.get_by_id(settings.id).internal_data == {
+        "min_interval": 60,
+        "split_by_days": True,
+        "since_offset": 10,
+    }
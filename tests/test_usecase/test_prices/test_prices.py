@@ -0,0 +1,220 @@
+import threading
+from datetime import datetime
+from datetime import timedelta
+
+import peewee as pw
+import pytest
+
+from myfunds.core.models import CryptoPrice
+from myfunds.core.models import ExchangeRatesSnapshot
+from myfunds.core.models import get_models
+from myfunds.core.usecase import prices
+from myfunds.modules import cmc
+from myfunds.modules import convertmymoney
+
+
+@pytest.fixture(autouse=True)
+def clear_process_cache(monkeypatch):
+    monkeypatch.setattr(prices, "_prices", {})
+    monkeypatch.setattr(prices, "_exchange_rates", None)
+
+
+@pytest.fixture
+def fake_cmc(monkeypatch):
+    calls = []
+
+    def fetch_prices(currencies_ids, convert="USD"):
+        calls.append(sorted(currencies_ids))
+        return {i: float(i * 10 + len(calls)) for i in currencies_ids}
+
+    monkeypatch.setattr(cmc, "fetch_prices", fetch_prices)
+    return calls
+
+
+@pytest.fixture
+def failing_cmc(monkeypatch):
+    def fetch_prices(currencies_ids, convert="USD"):
+        raise cmc.CMCRequestError("Network error.")
+
+    monkeypatch.setattr(cmc, "fetch_prices", fetch_prices)
+
+
+@pytest.fixture
+def fake_convertmymoney(monkeypatch):
+    calls = []
+
+    def fetch_exchange_rates():
+        calls.append(None)
+        return {"USD": 1.0, "EUR": 0.8 + len(calls) / 100}
+
+    monkeypatch.setattr(convertmymoney, "fetch_exchange_rates", fetch_exchange_rates)
+    return calls
+
+
+@pytest.fixture
+def failing_convertmymoney(monkeypatch):
+    def fetch_exchange_rates():
+        raise ValueError("Invalid JSON.")
+
+    monkeypatch.setattr(convertmymoney, "fetch_exchange_rates", fetch_exchange_rates)
+
+
+@pytest.fixture
+def with_file_database(tmp_path, models_db_init_context):
+    # The background refresh uses its own connection, the memory database isn't
+    # shared between the threads.
+    db = pw.SqliteDatabase(str(tmp_path / "myfunds.db"))
+    with models_db_init_context(db):
+        db.create_tables(get_models())
+        yield
+        db.close()
+
+
+def make_price(cmc_id, price, age, convert="USD", **kwargs):
+    return CryptoPrice.create(
+        cmc_id=cmc_id,
+        convert=convert,
+        price=price,
+        fetched_at=(datetime.now() - timedelta(seconds=age)),
+        **kwargs,
+    )
+
+
+def make_snapshot(rates, age, **kwargs):
+    return ExchangeRatesSnapshot.create(
+        source=prices.EXCHANGE_RATES_SOURCE,
+        rates=rates,
+        fetched_at=(datetime.now() - timedelta(seconds=age)),
+        **kwargs,
+    )
+
+
+def wait_for_refresh():
+    for thread in threading.enumerate():
+        if thread.name == "prices-refresh":
+            thread.join(5)
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_missing_prices_are_fetched_once(fake_cmc):
+    assert prices.get_crypto_prices([1, 2]) == {1: 11.0, 2: 21.0}
+    assert prices.get_crypto_prices([2, 1]) == {1: 11.0, 2: 21.0}
+    assert fake_cmc == [[1, 2]]
+    assert CryptoPrice.select().count() == 2
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_prices_cached_by_another_process_are_used(fake_cmc):
+    make_price(1, 5.0, age=10)
+
+    assert prices.get_crypto_prices([1], ttl=60) == {1: 5.0}
+    assert fake_cmc == []
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_convert_is_part_of_the_key(fake_cmc):
+    make_price(1, 5.0, age=10, convert="EUR")
+
+    assert prices.get_crypto_prices([1], "USD") == {1: 11.0}
+    assert fake_cmc == [[1]]
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_too_stale_prices_are_fetched_with_the_stale_ones(fake_cmc):
+    make_price(1, 5.0, age=120)
+    make_price(2, 6.0, age=7200)
+
+    result = prices.get_crypto_prices([1, 2, 3], ttl=60, max_stale=3600)
+
+    assert result == {1: 11.0, 2: 21.0, 3: 31.0}
+    assert fake_cmc == [[1, 2, 3]]
+    assert CryptoPrice.get(cmc_id=2).price == 21.0
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_cached_prices_are_returned_on_error(failing_cmc):
+    make_price(1, 5.0, age=7200)
+
+    assert prices.get_crypto_prices([1, 2], ttl=60, max_stale=3600) == {1: 5.0}
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_error_is_raised_without_cached_prices(failing_cmc):
+    with pytest.raises(cmc.CMCError):
+        prices.get_crypto_prices([1])
+
+
+@pytest.mark.usefixtures("with_file_database")
+def test_stale_prices_are_refreshed_in_background(fake_cmc):
+    make_price(1, 5.0, age=120)
+
+    assert prices.get_crypto_prices([1], ttl=60) == {1: 5.0}
+    wait_for_refresh()
+
+    assert fake_cmc == [[1]]
+    price = CryptoPrice.get(cmc_id=1)
+    assert price.price == 11.0
+    assert price.refresh_started_at is None
+    assert prices.get_crypto_prices([1], ttl=60) == {1: 11.0}
+
+
+@pytest.mark.usefixtures("with_file_database")
+def test_claimed_refresh_is_not_repeated(fake_cmc):
+    make_price(1, 5.0, age=120, refresh_started_at=datetime.now())
+
+    assert prices.get_crypto_prices([1], ttl=60) == {1: 5.0}
+    wait_for_refresh()
+
+    assert fake_cmc == []
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_missing_exchange_rates_are_fetched_once(fake_convertmymoney):
+    exchange_rates = prices.get_exchange_rates()
+    assert exchange_rates.rates == {"USD": 1.0, "EUR": 0.81}
+    assert exchange_rates.fetched_at is not None
+
+    assert prices.get_exchange_rates() == exchange_rates
+    assert len(fake_convertmymoney) == 1
+
+    snapshot = ExchangeRatesSnapshot.get()
+    assert snapshot.rates == exchange_rates.rates
+    assert snapshot.fetched_at == exchange_rates.fetched_at
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_too_stale_exchange_rates_are_fetched(fake_convertmymoney):
+    make_snapshot({"EUR": 0.7}, age=7200)
+
+    exchange_rates = prices.get_exchange_rates(ttl=60, max_stale=3600)
+
+    assert exchange_rates.rates["EUR"] == 0.81
+    assert ExchangeRatesSnapshot.select().count() == 1
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_cached_exchange_rates_are_returned_on_error(failing_convertmymoney):
+    snapshot = make_snapshot({"EUR": 0.7}, age=7200)
+
+    exchange_rates = prices.get_exchange_rates(ttl=60, max_stale=3600)
+
+    assert exchange_rates.rates == {"EUR": 0.7}
+    assert exchange_rates.fetched_at == snapshot.fetched_at
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_exchange_rates_error_is_raised_without_cache(failing_convertmymoney):
+    with pytest.raises(ValueError):
+        prices.get_exchange_rates()
+
+
+@pytest.mark.usefixtures("with_file_database")
+def test_stale_exchange_rates_are_refreshed_in_background(fake_convertmymoney):
+    make_snapshot({"EUR": 0.7}, age=120)
+
+    assert prices.get_exchange_rates(ttl=60).rates == {"EUR": 0.7}
+    wait_for_refresh()
+
+    assert len(fake_convertmymoney) == 1
+    assert prices.get_exchange_rates(ttl=60).rates["EUR"] == 0.81
+    assert ExchangeRatesSnapshot.get().refresh_started_at is None
@@ -0,0 +1,160 @@
+import pytest
+
+from myfunds.core.models import Account
+from myfunds.core.models import Balance
+from myfunds.core.models import BalanceLimit
+from myfunds.core.models import CacheVersion
+from myfunds.core.models import Category
+from myfunds.core.models import CryptoBalance
+from myfunds.core.models import CryptoCurrency
+from myfunds.core.models import Currency
+from myfunds.core.usecase import refdata
+from myfunds.modules import check
+from myfunds.web.constants import FundsDirection
+
+
+def bump_version_by_other_process(scope: str) -> None:
+    # fmt: off
+    (
+        CacheVersion
+        .insert(name=scope, version=1)
+        .on_conflict(
+            conflict_target=[CacheVersion.name],
+            update={CacheVersion.version: CacheVersion.version + 1},
+        )
+        .execute()
+    )
+    # fmt: on
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_scope_value_checking():
+    with pytest.raises(check.ValidationError):
+        refdata.invalidate("unknown")
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_account_is_cached(make_account):
+    account = make_account(username="john")
+
+    assert refdata.get_account(account.id).username == "john"
+
+    Account.update(username="jane").where(Account.id == account.id).execute()
+    assert refdata.get_account(account.id).username == "john"
+
+    refdata.invalidate(refdata.ACCOUNTS)
+    assert refdata.get_account(account.id).username == "jane"
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_missing_account_is_not_cached(make_account):
+    assert refdata.get_account(1) is None
+
+    account = make_account()
+    assert refdata.get_account(1) == account
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_sync_drops_data_changed_by_other_process(make_account, make_currency):
+    account = make_account(username="john")
+    currency = make_currency("USD")
+    refdata.sync()
+
+    assert refdata.get_account(account.id).username == "john"
+    assert refdata.get_currency(currency.id).code_alpha == "USD"
+
+    Account.update(username="jane").where(Account.id == account.id).execute()
+    bump_version_by_other_process(refdata.ACCOUNTS)
+
+    refdata.sync()
+    assert refdata.get_account(account.id).username == "jane"
+    assert refdata.get_currency(currency.id) is refdata.get_currency(currency.id)
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_categories_are_cached(make_account, make_expense_category):
+    account = make_account()
+    make_expense_category(account=account, name="b")
+    make_expense_category(account=account, name="a")
+    make_expense_category(name="c")
+
+    categories = refdata.get_categories(account.id, FundsDirection.EXPENSE.value)
+    assert [i.name for i in categories] == ["a", "b"]
+    assert refdata.get_categories(account.id, FundsDirection.INCOME.value) == []
+
+    Category.delete().execute()
+    assert (
+        refdata.get_categories(account.id, FundsDirection.EXPENSE.value) == categories
+    )
+
+    refdata.invalidate(refdata.CATEGORIES)
+    assert refdata.get_categories(account.id, FundsDirection.EXPENSE.value) == []
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_data_loaded_before_invalidation_is_not_cached(make_account, monkeypatch):
+    account = make_account(username="john")
+    get_or_none = Account.get_or_none
+
+    def get_or_none_with_invalidation(*args, **kwargs):
+        result = get_or_none(*args, **kwargs)
+        Account.update(username="jane").where(Account.id == account.id).execute()
+        refdata.invalidate(refdata.ACCOUNTS)
+        return result
+
+    monkeypatch.setattr(Account, "get_or_none", get_or_none_with_invalidation)
+    assert refdata.get_account(account.id).username == "john"
+
+    monkeypatch.setattr(Account, "get_or_none", get_or_none)
+    assert refdata.get_account(account.id).username == "jane"
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_currencies_are_cached(make_currency):
+    eur = make_currency("EUR")
+    usd = make_currency("USD")
+    btc = CryptoCurrency.create(symbol="BTC", name="Bitcoin", cmc_id=1, icon="")
+
+    assert refdata.get_currencies() == [eur, usd]
+    assert refdata.get_currency(usd.id) is refdata.get_currencies()[1]
+    assert refdata.get_currency(0) is None
+    assert refdata.get_crypto_currencies() == [btc]
+    assert refdata.get_crypto_currency(btc.id) == btc
+
+    make_currency("CZK")
+    assert refdata.get_currencies() == [eur, usd]
+
+    refdata.invalidate(refdata.CURRENCIES)
+    assert [i.code_alpha for i in refdata.get_currencies()] == ["CZK", "EUR", "USD"]
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_attach_currencies(make_account, make_balance):
+    account = make_account()
+    make_balance(account=account)
+    make_balance(account=account)
+    btc = CryptoCurrency.create(symbol="BTC", name="Bitcoin", cmc_id=1, icon="")
+    CryptoBalance.create(account=account, currency=btc, name="cold", quantity=1)
+    currency = refdata.get_currency(Currency.get().id)
+    refdata.get_crypto_currency(btc.id)
+
+    balances = refdata.attach_currencies(Balance.select())
+    crypto_balances = refdata.attach_currencies(CryptoBalance.select())
+
+    assert [i.currency for i in balances] == [currency, currency]
+    assert balances[0].currency is balances[1].currency
+    assert crypto_balances[0].currency is refdata.get_crypto_currency(btc.id)
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_attach_categories(make_account, make_balance, make_expense_category):
+    account = make_account()
+    balance = make_balance(account=account)
+    category = make_expense_category(account=account)
+    BalanceLimit.create(balance=balance, category=category, amount=100)
+
+    assert refdata.get_category(account.id, category.id) == category
+    assert refdata.get_category(account.id, 0) is None
+
+    limits = refdata.attach_categories(account.id, BalanceLimit.select())
+    assert limits[0].category is refdata.get_category(account.id, category.id)
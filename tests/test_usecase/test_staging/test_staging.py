@@ -0,0 +1,114 @@
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+
+from myfunds.core import models
+from myfunds.core.constants import FundsDirection
+from myfunds.core.usecase import staging
+from myfunds.core.usecase.transactions import NewTransaction
+
+
+def new_txns():
+    now = datetime.now().replace(microsecond=0)
+    return [
+        NewTransaction(FundsDirection.INCOME, 1000, now - timedelta(days=2)),
+        NewTransaction(FundsDirection.EXPENSE, 300, now - timedelta(days=1), None, "a"),
+        NewTransaction(FundsDirection.EXPENSE, 200, now, None, "b"),
+    ]
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_stage_transactions(make_balance):
+    balance = make_balance()
+    txns = new_txns()
+
+    token = staging.stage_transactions(balance, txns)
+    staged = staging.get_staged_transactions(balance, token)
+
+    assert [(i.direction, i.amount, i.created_at, i.comment) for i in staged] == [
+        (i.direction, i.amount, i.created_at, i.comment) for i in txns
+    ]
+    assert staging.get_staged_transactions(make_balance(), token) == []
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_stage_transactions_discards_previous_ones(make_balance):
+    balance = make_balance()
+    other_balance = make_balance()
+
+    other_token = staging.stage_transactions(other_balance, new_txns())
+    old_token = staging.stage_transactions(balance, new_txns())
+    token = staging.stage_transactions(balance, new_txns())
+
+    assert staging.get_staged_transactions(balance, old_token) == []
+    assert len(staging.get_staged_transactions(balance, token)) == 3
+    assert len(staging.get_staged_transactions(other_balance, other_token)) == 3
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_expired_staging(make_balance):
+    balance = make_balance()
+    token = staging.stage_transactions(balance, new_txns())
+
+    models.StagedTransaction.update(
+        staged_at=(datetime.now() - staging.STAGING_TTL - timedelta(minutes=1))
+    ).execute()
+
+    assert staging.get_staged_transactions(balance, token) == []
+    assert not staging.has_staged_transactions(balance, token)
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_import_staged_transactions(make_balance):
+    balance = make_balance()
+    token = staging.stage_transactions(balance, new_txns())
+    staged = staging.get_staged_transactions(balance, token)
+
+    approved_ids = [staged[0].id, staged[2].id]
+    assert staging.import_staged_transactions(balance, token, approved_ids) == 2
+
+    txns = models.Transaction.select().order_by(models.Transaction.created_at)
+    assert [(i.amount, i.balance_remainder) for i in txns] == [(1000, 1000), (200, 800)]
+    assert models.Balance.get_by_id(balance.id).amount == 800
+    assert models.StagedTransaction.select().count() == 0
+
+    assert staging.import_staged_transactions(balance, token, approved_ids) == 0
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_expired_staging_is_not_imported(make_balance):
+    balance = make_balance()
+    token = staging.stage_transactions(balance, new_txns())
+    approved_ids = [i.id for i in staging.get_staged_transactions(balance, token)]
+    assert staging.has_staged_transactions(balance, token)
+
+    models.StagedTransaction.update(
+        staged_at=(datetime.now() - staging.STAGING_TTL - timedelta(minutes=1))
+    ).execute()
+
+    assert staging.import_staged_transactions(balance, token, approved_ids) == 0
+    assert models.Transaction.select().count() == 0
+    assert models.StagedTransaction.select().count() == 0
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_import_many_staged_transactions(make_balance, caplog):
+    balance = make_balance()
+    now = datetime.now().replace(microsecond=0)
+    txns = [
+        NewTransaction(FundsDirection.INCOME, 100, now - timedelta(minutes=i))
+        for i in range(250)
+    ]
+    token = staging.stage_transactions(balance, txns)
+    approved_ids = [i.id for i in staging.get_staged_transactions(balance, token)]
+
+    caplog.set_level("DEBUG", logger="peewee")
+    imported = staging.import_staged_transactions(
+        balance, token, approved_ids[::-1] + approved_ids[:10]
+    )
+
+    assert imported == 250
+    assert models.Balance.get_by_id(balance.id).amount == 25000
+    staged_queries = [i for i in caplog.records if '"staged_transactions"' in i.msg[0]]
+    assert len(staged_queries) == 4
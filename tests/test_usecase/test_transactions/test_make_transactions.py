@@ -0,0 +1,247 @@
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+
+from myfunds.core import models
+from myfunds.core.constants import FundsDirection
+from myfunds.core.usecase import transactions as txn_usecase
+from myfunds.core.usecase.transactions import NewTransaction
+from myfunds.modules import check
+
+
+def make_sequentially(balance, txns):
+    for txn in txns:
+        func = (
+            txn_usecase.make_replenishment
+            if txn.direction == FundsDirection.INCOME
+            else txn_usecase.make_withdrawal
+        )
+        func(
+            balance=balance,
+            amount=txn.amount,
+            category=txn.category,
+            comment=txn.comment,
+            created_at=txn.created_at,
+        )
+
+
+def balance_state(balance):
+    balance = models.Balance.get_by_id(balance.id)
+    txns = (
+        models.Transaction.select()
+        .where(models.Transaction.balance == balance)
+        .order_by(models.Transaction.created_at, models.Transaction.amount)
+    )
+    return balance.amount, [
+        (i.created_at, i.direction, i.amount, i.balance_remainder) for i in txns
+    ]
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_empty_list(make_balance):
+    balance = make_balance()
+
+    assert txn_usecase.make_transactions(balance, []) == 0
+    assert models.Transaction.select().count() == 0
+    assert models.Balance.get().amount == 0
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_balance_value_checking(make_account):
+    with pytest.raises(check.ValidationError):
+        txn_usecase.make_transactions(make_account(), [])
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_txn_value_checking(make_account, make_balance, make_income_category):
+    account = make_account()
+    balance = make_balance(account=account)
+    now = datetime.now()
+
+    invalid_txns = [
+        (FundsDirection.INCOME, 100, now),
+        NewTransaction("unknown", 100, now),
+        NewTransaction(FundsDirection.INCOME, 0, now),
+        NewTransaction(FundsDirection.INCOME, 0.5, now),
+        NewTransaction(FundsDirection.INCOME, 100, 0),
+        NewTransaction(FundsDirection.INCOME, 100, now, comment=0),
+        NewTransaction(
+            FundsDirection.EXPENSE,
+            100,
+            now,
+            category=make_income_category(account=account),
+        ),
+        NewTransaction(
+            FundsDirection.INCOME, 100, now, category=make_income_category()
+        ),
+    ]
+    for txn in invalid_txns:
+        with pytest.raises(check.ValidationError):
+            txn_usecase.make_transactions(balance, [txn])
+
+    assert models.Transaction.select().count() == 0
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_calculation_on_empty_balance(make_balance):
+    balance = make_balance()
+    now = datetime.now()
+
+    txns = [
+        NewTransaction(FundsDirection.INCOME, 1050, now - timedelta(minutes=2)),
+        NewTransaction(FundsDirection.EXPENSE, 300, now),
+        NewTransaction(FundsDirection.INCOME, 2025, now - timedelta(minutes=1)),
+        NewTransaction(FundsDirection.INCOME, 500, now),
+    ]
+
+    assert txn_usecase.make_transactions(balance, txns) == 4
+    assert balance_state(balance) == (
+        3275,
+        [
+            (now - timedelta(minutes=2), FundsDirection.INCOME, 1050, 1050),
+            (now - timedelta(minutes=1), FundsDirection.INCOME, 2025, 3075),
+            (now, FundsDirection.EXPENSE, 300, 3275),
+            (now, FundsDirection.INCOME, 500, 3275),
+        ],
+    )
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_calculation_matches_sequential_usecases(make_balance):
+    balance0 = make_balance()
+    balance1 = make_balance()
+    now = datetime.now()
+
+    history = [
+        NewTransaction(FundsDirection.INCOME, 10000, now - timedelta(days=10)),
+        NewTransaction(FundsDirection.EXPENSE, 250, now - timedelta(days=7)),
+        NewTransaction(FundsDirection.EXPENSE, 120, now - timedelta(days=5)),
+        NewTransaction(FundsDirection.INCOME, 700, now - timedelta(days=5)),
+        NewTransaction(FundsDirection.EXPENSE, 80, now - timedelta(days=1)),
+    ]
+    imported = [
+        NewTransaction(FundsDirection.EXPENSE, 15, now - timedelta(days=12)),
+        NewTransaction(FundsDirection.EXPENSE, 30, now - timedelta(days=7)),
+        NewTransaction(FundsDirection.INCOME, 45, now - timedelta(days=6)),
+        NewTransaction(FundsDirection.EXPENSE, 45, now - timedelta(days=6)),
+        NewTransaction(FundsDirection.INCOME, 90, now - timedelta(days=5)),
+        NewTransaction(FundsDirection.EXPENSE, 60, now - timedelta(days=3)),
+        NewTransaction(FundsDirection.INCOME, 5, now),
+    ]
+
+    make_sequentially(balance0, history)
+    make_sequentially(balance0, imported)
+
+    make_sequentially(balance1, history)
+    assert txn_usecase.make_transactions(balance1, imported) == len(imported)
+
+    assert balance_state(balance0) == balance_state(balance1)
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_calculation_keeps_other_balances(make_balance):
+    balance0 = make_balance()
+    balance1 = make_balance()
+    now = datetime.now()
+
+    make_sequentially(
+        balance0, [NewTransaction(FundsDirection.INCOME, 100, now + timedelta(days=1))]
+    )
+    state = balance_state(balance0)
+
+    txn_usecase.make_transactions(
+        balance1, [NewTransaction(FundsDirection.INCOME, 200, now)]
+    )
+
+    assert balance_state(balance0) == state
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_fingerprints():
+    now = datetime.now()
+    txns = [
+        NewTransaction(FundsDirection.EXPENSE, 100, now, comment="Coffee  shop"),
+        NewTransaction(FundsDirection.EXPENSE, 100, now, comment=" coffee SHOP"),
+        NewTransaction(FundsDirection.INCOME, 100, now, comment="Coffee shop"),
+        NewTransaction(FundsDirection.EXPENSE, 100, now),
+        NewTransaction(FundsDirection.EXPENSE, 100, now, comment=""),
+    ]
+
+    fingerprints = txn_usecase.make_fingerprints(txns)
+
+    # Equal transactions differ by occurrence only.
+    assert len(set(fingerprints)) == len(fingerprints)
+    assert txn_usecase.make_fingerprints(txns[1:2]) == fingerprints[:1]
+    assert txn_usecase.make_fingerprints(txns[4:]) == fingerprints[3:4]
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_known_transactions_are_skipped(make_balance):
+    balance = make_balance()
+    other_balance = make_balance()
+    now = datetime.now()
+
+    first_report = [
+        NewTransaction(FundsDirection.INCOME, 1000, now - timedelta(days=3)),
+        NewTransaction(FundsDirection.EXPENSE, 50, now - timedelta(days=2), None, "a"),
+        NewTransaction(FundsDirection.EXPENSE, 50, now - timedelta(days=2), None, "a"),
+    ]
+    second_report = first_report + [
+        NewTransaction(FundsDirection.EXPENSE, 50, now - timedelta(days=2), None, "a"),
+        NewTransaction(FundsDirection.EXPENSE, 70, now - timedelta(days=1)),
+    ]
+
+    assert txn_usecase.make_transactions(balance, first_report) == 3
+    assert txn_usecase.make_transactions(balance, first_report) == 0
+    assert txn_usecase.make_transactions(balance, second_report) == 2
+
+    assert txn_usecase.make_transactions(other_balance, second_report) == 5
+    assert balance_state(balance) == balance_state(other_balance)
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_known_transactions_are_selected_in_batches(make_balance, caplog):
+    balance = make_balance()
+    now = datetime.now()
+    txns = [
+        NewTransaction(FundsDirection.INCOME, 100, now - timedelta(minutes=i))
+        for i in range(250)
+    ]
+    fingerprints = txn_usecase.make_fingerprints(txns)
+    txn_usecase.make_transactions(balance, txns[:120])
+
+    caplog.set_level("DEBUG", logger="peewee")
+    known = txn_usecase.select_known_fingerprints(balance, fingerprints)
+
+    assert known == set(fingerprints[:120])
+    assert len(caplog.records) == 3
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_manual_transactions_are_fingerprinted(make_balance):
+    balance = make_balance()
+    now = datetime.now()
+    report = [
+        NewTransaction(FundsDirection.INCOME, 1000, now - timedelta(days=3)),
+        NewTransaction(FundsDirection.EXPENSE, 50, now - timedelta(days=2), None, "a"),
+        NewTransaction(FundsDirection.EXPENSE, 50, now - timedelta(days=2), None, "a"),
+    ]
+
+    txns = [
+        txn_usecase.make_replenishment(balance, 1000, created_at=report[0].created_at),
+        txn_usecase.make_withdrawal(
+            balance, 50, comment="A ", created_at=report[1].created_at
+        ),
+        txn_usecase.make_withdrawal(
+            balance, 50, comment="a", created_at=report[2].created_at
+        ),
+    ]
+
+    assert [i.fingerprint for i in txns] == txn_usecase.make_fingerprints(report)
+    assert txn_usecase.make_transactions(balance, report) == 0
+
+    txn = txn_usecase.make_withdrawal(
+        balance, 50, comment="a", created_at=report[2].created_at, defer_remainders=True
+    )
+    assert txn.fingerprint == txn_usecase.make_fingerprints(report + report[1:2])[-1]
@@ -0,0 +1,108 @@
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+
+from myfunds.core import models
+from myfunds.core.usecase import transactions as txn_usecase
+from myfunds.modules import check
+
+
+def balance_state(balance):
+    balance = models.Balance.get_by_id(balance.id)
+    txns = (
+        models.Transaction.select()
+        .where(models.Transaction.balance == balance)
+        .order_by(models.Transaction.created_at, models.Transaction.amount)
+    )
+    return balance.amount, [
+        (i.created_at, i.direction, i.amount, i.balance_remainder) for i in txns
+    ]
+
+
+def make_history(balance, now, defer_remainders):
+    txn_usecase.make_replenishment(
+        balance=balance, amount=5000, created_at=now - timedelta(days=3)
+    )
+    txn_usecase.make_withdrawal(
+        balance=balance, amount=700, created_at=now - timedelta(days=1)
+    )
+    txn_usecase.make_replenishment(
+        balance=balance,
+        amount=300,
+        created_at=now - timedelta(days=2),
+        defer_remainders=defer_remainders,
+    )
+    txn = txn_usecase.make_withdrawal(
+        balance=balance,
+        amount=150,
+        created_at=now - timedelta(days=2),
+        defer_remainders=defer_remainders,
+    )
+    txn_usecase.make_withdrawal(
+        balance=balance,
+        amount=40,
+        created_at=now - timedelta(days=4),
+        defer_remainders=defer_remainders,
+    )
+    txn_usecase.remove_transaction(txn, defer_remainders=defer_remainders)
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_balance_value_checking(make_account):
+    with pytest.raises(check.ValidationError):
+        txn_usecase.repair_balance_remainders(make_account())
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_clean_balance_repair(make_balance):
+    balance = make_balance()
+    txn_usecase.make_replenishment(balance=balance, amount=100)
+
+    assert txn_usecase.repair_balance_remainders(balance) is False
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_deferred_writes_mark_balance(make_balance):
+    balance = make_balance()
+    now = datetime.now()
+
+    txn_usecase.make_replenishment(
+        balance=balance, amount=100, created_at=now, defer_remainders=True
+    )
+    assert models.Balance.get().remainders_dirty_since == now
+    assert models.Balance.get().amount == 100
+
+    txn = txn_usecase.make_withdrawal(
+        balance=balance,
+        amount=50,
+        created_at=now - timedelta(days=1),
+        defer_remainders=True,
+    )
+    assert models.Balance.get().remainders_dirty_since == now - timedelta(days=1)
+    assert models.Balance.get().amount == 50
+
+    txn_usecase.make_replenishment(
+        balance=balance, amount=10, created_at=now, defer_remainders=True
+    )
+    assert models.Balance.get().remainders_dirty_since == now - timedelta(days=1)
+
+    txn_usecase.remove_transaction(txn, defer_remainders=True)
+    assert models.Balance.get().remainders_dirty_since == now - timedelta(days=1)
+    assert models.Balance.get().amount == 110
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_repair_matches_immediate_calculation(make_balance):
+    balance0 = make_balance()
+    balance1 = make_balance()
+
+    now = datetime.now()
+    make_history(balance0, now, defer_remainders=False)
+    make_history(balance1, now, defer_remainders=True)
+
+    assert txn_usecase.repair_balance_remainders(balance1) is True
+    assert models.Balance.get_by_id(balance1.id).remainders_dirty_since is None
+    assert balance_state(balance0) == balance_state(balance1)
+
+    assert txn_usecase.repair_balance_remainders(balance1) is False
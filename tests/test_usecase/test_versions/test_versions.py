@@ -0,0 +1,75 @@
+from datetime import datetime
+
+import pytest
+
+from myfunds.core.constants import FundsDirection
+from myfunds.core.models import Account
+from myfunds.core.usecase import transactions as txn_usecase
+from myfunds.core.usecase import versions
+from myfunds.modules import check
+
+
+def get_data_version(account: Account) -> int:
+    return Account.get_by_id(account.id).data_version
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_value_checking():
+    with pytest.raises(check.ValidationError):
+        versions.bump_account_data_version("1")
+
+    with pytest.raises(check.ValidationError):
+        versions.bump_balance_account_data_version(None)
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_bump_account_data_version(make_account):
+    account = make_account()
+    other_account = make_account()
+    assert get_data_version(account) == 0
+
+    versions.bump_account_data_version(account.id)
+    versions.bump_account_data_version(account.id)
+
+    assert get_data_version(account) == 2
+    assert get_data_version(other_account) == 0
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_bump_balance_account_data_version(make_account, make_balance):
+    account = make_account()
+    other_account = make_account()
+    balance = make_balance(account=account)
+    make_balance(account=other_account)
+
+    versions.bump_balance_account_data_version(balance.id)
+
+    assert get_data_version(account) == 1
+    assert get_data_version(other_account) == 0
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_transaction_usecases_bump_data_version(
+    make_account, make_balance, make_expense_category
+):
+    account = make_account()
+    balance = make_balance(account=account)
+    category = make_expense_category(account=account)
+
+    txn_usecase.make_replenishment(balance, 1000)
+    assert get_data_version(account) == 1
+
+    txn = txn_usecase.make_withdrawal(balance, 500, defer_remainders=True)
+    assert get_data_version(account) == 2
+
+    txn_usecase.update_transaction_category(txn, category)
+    assert get_data_version(account) == 3
+
+    txn_usecase.remove_transaction(txn)
+    assert get_data_version(account) == 4
+
+    txn_usecase.make_transactions(
+        balance,
+        [txn_usecase.NewTransaction(FundsDirection.EXPENSE, 100, datetime.now())],
+    )
+    assert get_data_version(account) == 5
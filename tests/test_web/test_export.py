@@ -0,0 +1,46 @@
+import gzip
+import json
+
+from myfunds.web import export
+
+
+COLUMNS = ["Time", "Message"]
+ROWS = [
+    ("2021-03-01 10:00:00", "first"),
+    ("2021-03-02 10:00:00", 'with "quotes"; and delimiter'),
+    ("2021-03-03 10:00:00", None),
+]
+
+
+def test_iter_csv():
+    assert "".join(export.iter_csv(COLUMNS, iter(ROWS))) == (
+        '"Time";"Message"\r\n'
+        '"2021-03-01 10:00:00";"first"\r\n'
+        '"2021-03-02 10:00:00";"with ""quotes""; and delimiter"\r\n'
+        '"2021-03-03 10:00:00";""\r\n'
+    )
+
+
+def test_iter_ndjson():
+    lines = "".join(export.iter_ndjson(COLUMNS, iter(ROWS))).splitlines()
+    assert [json.loads(i) for i in lines] == [
+        {"time": "2021-03-01 10:00:00", "message": "first"},
+        {"time": "2021-03-02 10:00:00", "message": 'with "quotes"; and delimiter'},
+        {"time": "2021-03-03 10:00:00", "message": None},
+    ]
+
+
+def test_chunks_are_bounded(monkeypatch):
+    monkeypatch.setattr(export, "CHUNK_SIZE", 100)
+    rows = [("2021-03-01 10:00:00", "x" * 30)] * 50
+
+    for func in [export.iter_csv, export.iter_ndjson]:
+        chunks = list(func(COLUMNS, iter(rows)))
+        assert len(chunks) > 10
+        assert all(len(i) < 200 for i in chunks)
+
+
+def test_iter_gzip():
+    chunks = ["first chunk\n", "", "second chunk\n"]
+    data = b"".join(export.iter_gzip(iter(chunks)))
+    assert gzip.decompress(data).decode() == "".join(chunks)
@@ -0,0 +1,18 @@
+from werkzeug.datastructures import MultiDict
+
+from myfunds.web.forms import ImportStagedTransactionsForm
+
+
+def test_import_staged_transactions_form():
+    form = ImportStagedTransactionsForm(
+        MultiDict([("token", "abc"), ("txn_ids", "1"), ("txn_ids", "3")])
+    )
+    assert form.validate()
+    assert form.txn_ids.data == [1, 3]
+
+    form = ImportStagedTransactionsForm(MultiDict([("token", "abc")]))
+    assert form.validate()
+    assert form.txn_ids.data == []
+
+    form = ImportStagedTransactionsForm(MultiDict([("token", "abc"), ("txn_ids", "x")]))
+    assert not form.validate()
@@ -0,0 +1,41 @@
+import logging
+from datetime import datetime
+
+import pytest
+
+from myfunds.core.models import CryptoActionLog
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_query_stats_headers(web_client, make_account, caplog):
+    client = web_client(make_account())
+
+    with caplog.at_level(logging.INFO, logger="myfunds.web.requests"):
+        res = client.get("/crypto/actions")
+
+    queries = int(res.headers["X-SQL-Queries"])
+    assert queries > 0
+    assert res.headers["Server-Timing"].startswith("sql;dur=")
+    assert f"GET /crypto/actions 200, {queries} queries in" in caplog.text
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_query_stats_of_streamed_response(web_client, make_account, caplog):
+    account = make_account()
+    for i in range(3):
+        CryptoActionLog.create(
+            account=account, message=f"m{i}", created_at=datetime.now()
+        )
+    client = web_client(account)
+
+    with caplog.at_level(logging.INFO, logger="myfunds.web.requests"):
+        res = client.get("/crypto/actions/export")
+        assert "X-SQL-Queries" not in res.headers
+        assert "GET /crypto/actions/export" not in caplog.text
+
+        assert res.get_data(as_text=True).count("m") >= 3
+        res.close()
+
+    # The export queries run while the body is streamed, after the hook.
+    (record,) = [i for i in caplog.records if "/crypto/actions/export" in i.message]
+    assert int(record.message.split(", ")[-1].split()[0]) > 0
@@ -0,0 +1,89 @@
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+
+from myfunds.core.constants import FundsDirection
+from myfunds.core.models import Transaction
+from myfunds.web import pagination
+
+
+def walk_forward(query, limit):
+    pages = [pagination.paginate(query, None, limit)]
+    while pages[-1].next_cursor is not None:
+        cursor = pagination.decode_cursor(pages[-1].next_cursor)
+        pages.append(pagination.paginate(query, cursor, limit))
+    return pages
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_cursor_encoding(make_balance, make_replenishment):
+    txn = make_replenishment(
+        balance=make_balance(), created_at=datetime(2021, 3, 1, 10, 30, 0, 125)
+    )
+
+    cursor = pagination.encode_cursor(pagination.NEXT, txn)
+    assert "=" not in cursor
+    assert pagination.decode_cursor(cursor) == pagination.Cursor(
+        pagination.NEXT, txn.created_at, txn.id
+    )
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "",
+        "not a cursor",
+        "WyJuZXh0IiwgIjIwMjEtMDMtMDEiLCAxXQ",  # ["next", "2021-03-01", 1]
+        "WyJ1cCIsICIyMDIxLTAzLTAxVDEwOjMwOjAwLjAwMDAwMCIsIDFd",  # ["up", ...]
+        "WyJuZXh0IiwgIjIwMjEtMDMtMDFUMTA6MzA6MDAuMDAwMDAwIiwgIjEiXQ",  # "1" id
+    ],
+)
+def test_invalid_cursor(value):
+    with pytest.raises(ValueError):
+        pagination.decode_cursor(value)
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_paginate(make_balance, make_replenishment, make_withdrawal):
+    balance = make_balance()
+    other_balance = make_balance()
+    now = datetime.now()
+
+    for i in range(7):
+        # Pairs of transactions share the creation time.
+        created_at = now - timedelta(minutes=i // 2)
+        make_replenishment(balance=balance, created_at=created_at)
+        make_withdrawal(balance=balance, created_at=created_at)
+        make_replenishment(balance=other_balance, created_at=created_at)
+
+    query = Transaction.select().where(
+        (Transaction.balance == balance)
+        & (Transaction.direction == FundsDirection.INCOME)
+    )
+    expected = list(
+        query.order_by(Transaction.created_at.desc(), Transaction.id.desc())
+    )
+
+    pages = walk_forward(query, 3)
+    assert [i.items for i in pages] == [expected[:3], expected[3:6], expected[6:]]
+    assert pages[0].prev_cursor is None
+    assert all(i.prev_cursor is not None for i in pages[1:])
+
+    prev_page = pagination.paginate(
+        query, pagination.decode_cursor(pages[2].prev_cursor), 3
+    )
+    assert prev_page == pages[1]
+
+    first_page = pagination.paginate(
+        query, pagination.decode_cursor(pages[1].prev_cursor), 3
+    )
+    assert first_page.items == pages[0].items
+    assert first_page.prev_cursor is None
+    assert first_page.next_cursor == pages[0].next_cursor
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_paginate_empty(make_balance):
+    query = Transaction.select().where(Transaction.balance == make_balance())
+    assert pagination.paginate(query, None, 10) == pagination.Page([], None, None)
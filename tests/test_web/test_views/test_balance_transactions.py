@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+from flask import Flask
+from flask import g
+
+from myfunds.web.views.balances.balance.views import transactions
+
+
+@pytest.mark.parametrize(
+    "text,expected_result",
+    [
+        ("coffee", '"coffee"*'),
+        ("  coffee   shop ", '"coffee"* "shop"*'),
+        ('say "hi" OR NOT', '"say"* """hi"""* "OR"* "NOT"*'),
+    ],
+)
+def test_make_search_query(text, expected_result):
+    assert transactions.make_search_query(text) == expected_result
+
+
+@pytest.mark.usefixtures("with_memory_database")
+def test_filtered_transactions_by_comment(make_balance, make_withdrawal):
+    balance = make_balance()
+    other_balance = make_balance(account=balance.account)
+
+    created_at = datetime(2021, 3, 10)
+    coffee = make_withdrawal(balance=balance, comment="Coffee", created_at=created_at)
+    make_withdrawal(balance=balance, comment="Taxi", created_at=created_at)
+    make_withdrawal(balance=other_balance, comment="Coffee", created_at=created_at)
+
+    filters = transactions.TransactionFilters(
+        direction="",
+        category_id=None,
+        categories=[],
+        created_at_range=(datetime(2021, 3, 1), datetime(2021, 4, 1)),
+        created_at_range_hrf="",
+        comment="cof",
+        limit=10,
+        cursor=None,
+    )
+
+    with Flask(__name__).app_context():
+        g.balance = balance
+        g.authorized_account = balance.account
+
+        assert [i.id for i in transactions.filtered_transactions(filters)] == [
+            coffee.id
+        ]
@@ -1,5 +1,7 @@
 import atexit
 import logging.config
+import signal
+import sys
 
 from myfunds.config import init_config
 from myfunds.config import init_env_parser
@@ -28,7 +30,7 @@ def main() -> None:
     if config.LOGGING_CONFIG != {}:
         logging.config.dictConfig(config.LOGGING_CONFIG)
 
-    db = init_database(config.DATABASE_PATH)
+    db = init_database(config.DATABASE_PATH, config.SLOW_QUERY_THRESHOLD)
     db_proxy.initialize(db)
 
     bot = Bot(config)
@@ -37,7 +39,16 @@ def main() -> None:
     bot.add_handler("/total_budget", total_budget.handler)
     bot.add_handler("/joint_limits", joint_limits.handler)
     bot.add_handler("/balance_stats", balance_stats.handler)
-    bot.run()
+
+    # SIGTERM exits like Ctrl+C, the dispatched updates are processed before it.
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+    try:
+        if config.TGBOT_WEBHOOK_URL:
+            bot.run_webhook()
+        else:
+            bot.run()
+    finally:
+        bot.stop()
 
 
 if __name__ == "__main__":